@@ -1,6 +1,7 @@
 from flask import Flask
 from app.config import DevelopmentConfig
-from app.extensions import db
+from app.extensions import db, room_catalog, conversations, scheduler, principals, occupancy
+from app.utils.serialization import init_json
 
 def create_app(config_class=DevelopmentConfig):
     app = Flask(__name__)
@@ -8,7 +9,25 @@ def create_app(config_class=DevelopmentConfig):
 
     # Initialize extensions
     db.init_app(app)
+    room_catalog.init_app(app)
+    conversations.init_app(app)
+    scheduler.init_app(app)
+    principals.init_app(app)
+    occupancy.init_app(app)
+    init_json(app)
 
+    # Background jobs
+    from app.services.calendar_service import CalendarService
+    from app.services.booking_service import BookingService
+    scheduler.add_job(app, 'calendar_sync', app.config['CALENDAR_SYNC_CHECK_INTERVAL'], CalendarService.sync_due_users)
+    scheduler.add_job(app, 'booking_retention', app.config['BOOKING_RETENTION_INTERVAL'], BookingService.archive_bookings)
+
+    if app.config.get('BACKGROUND_JOBS_ENABLED'):
+        # Started on the first request rather than here, so that scripts (seed.py) and
+        # a preloading gunicorn master don't run jobs: each worker starts its own thread.
+        @app.before_request
+        def start_background_jobs():
+            scheduler.start(app)
     
     # Register Blueprints
     from app.api.routes.auth import auth_bp
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.utils.decorators import token_required, admin_required
 from app.models import User, Room
-from app.extensions import db
-from werkzeug.security import generate_password_hash
+from app.extensions import db, room_catalog, conversations, scheduler, principals, occupancy
+from app.services.history_manager import HistoryManager
+from app.services.intent_classifier import FastIntentClassifier
+from app.services.nlp_service import NLPService
+from app.services.password_service import PasswordService, PasswordServiceBusy
 import traceback
 
 admin_bp = Blueprint('admin', __name__)
@@ -33,7 +36,7 @@ def create_user(current_user):
         if not data.get('password'):
             return jsonify({'message': 'Password is required'}), 400
             
-        hashed_password = generate_password_hash(data.get('password'))
+        hashed_password = PasswordService.hash_password(data.get('password'))
         new_user = User(
             username=data.get('username'),
             email=data.get('email'),
@@ -43,6 +46,8 @@ def create_user(current_user):
         db.session.add(new_user)
         db.session.commit()
         return jsonify({'message': 'User created successfully', 'user': new_user.to_dict()}), 201
+    except PasswordServiceBusy as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error creating user: {e}\n{traceback.format_exc()}")
@@ -64,9 +69,14 @@ def update_user(current_user, user_id):
     if 'role' in data:
         user.role = data['role']
     if 'password' in data and data['password']:
-        user.password_hash = generate_password_hash(data['password'])
+        try:
+            user.password_hash = PasswordService.hash_password(data['password'])
+        except PasswordServiceBusy as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
         
     db.session.commit()
+    principals.invalidate_user(user.id)
     return jsonify({'message': 'User updated', 'user': user.to_dict()}), 200
 
 @admin_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -83,6 +93,7 @@ def delete_user(current_user, user_id):
         
     db.session.delete(user)
     db.session.commit()
+    principals.invalidate_user(user_id)
     return jsonify({'message': 'User deleted'}), 200
 
 
@@ -111,6 +122,7 @@ def create_room(current_user):
     )
     db.session.add(new_room)
     db.session.commit()
+    room_catalog.invalidate()
     return jsonify({'message': 'Room created', 'room': new_room.to_dict()}), 201
 
 @admin_bp.route('/rooms/<int:room_id>', methods=['PUT'])
@@ -132,6 +144,7 @@ def update_room(current_user, room_id):
         room.is_active = data['is_active']
         
     db.session.commit()
+    room_catalog.invalidate()
     return jsonify({'message': 'Room updated', 'room': room.to_dict()}), 200
 
 @admin_bp.route('/rooms/<int:room_id>', methods=['DELETE'])
@@ -148,7 +161,27 @@ def delete_room(current_user, room_id):
     try:
         db.session.delete(room)
         db.session.commit()
+        room_catalog.invalidate()
         return jsonify({'message': 'Room deleted'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Cannot delete room (likely has bookings)', 'error': str(e)}), 400
+
+
+# --- METRICS ---
+
+@admin_bp.route('/metrics', methods=['GET'])
+@token_required
+@admin_required
+def get_metrics(current_user):
+    return jsonify({
+        'conversations': conversations.metrics(),
+        'room_catalog': room_catalog.stats(),
+        'occupancy': occupancy.stats(),
+        'nlu_prompt': HistoryManager.stats(),
+        'nlu_fast_path': FastIntentClassifier.stats(),
+        'response_cache': NLPService.response_cache.stats(),
+        'scheduler': scheduler.stats(),
+        'auth': principals.stats(),
+        'passwords': PasswordService.stats()
+    }), 200
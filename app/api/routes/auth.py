@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.models import User
 from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.password_service import PasswordService, PasswordServiceBusy, LoginRateLimited
 import jwt
+from sqlalchemy import update
 from datetime import datetime, timedelta
 
 auth_bp = Blueprint('auth', __name__)
@@ -12,10 +13,28 @@ auth_bp = Blueprint('auth', __name__)
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
-    user = User.query.filter_by(username=data.get('username')).first()
-    
-    if not user or not check_password_hash(user.password_hash, data.get('password')):
-        return jsonify({'message': 'Invalid credentials'}), 401
+    username = data.get('username')
+
+    try:
+        # Throttling first: rejected attempts cost neither a query nor a hash
+        PasswordService.check_login_allowed(username, request.remote_addr)
+        user = db.session.query(User.id, User.username, User.role, User.password_hash).filter_by(username=username).first()
+        # End the read transaction before hashing (hundreds of ms): an open one would hold a
+        # pooled connection and, on SQLite, block every writer meanwhile
+        db.session.rollback()
+
+        ok, upgraded_hash = PasswordService.authenticate(user.password_hash if user else None, username, data.get('password'))
+        if not ok:
+            return jsonify({'message': 'Invalid credentials'}), 401
+    except LoginRateLimited as e:
+        return jsonify({'message': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except PasswordServiceBusy as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
+
+    if upgraded_hash:
+        # Hash parameters changed since this password was stored
+        db.session.execute(update(User).where(User.id == user.id).values(password_hash=upgraded_hash))
+        db.session.commit()
     
     token = jwt.encode({
         'user_id': user.id,
@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify
-from app.services.booking_service import BookingService
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from app.services.booking_service import BookingService, BookingConflictError
+from app.services.slot_search import SlotSearchService
+from app.services.room_assignment import RoomAssignmentService
 from app.utils.decorators import token_required
+from app.utils.serialization import booking_to_dict
 from app.models import Booking
-from datetime import datetime
+from app.config import Config
+from datetime import datetime, date, timedelta
 
 bookings_bp = Blueprint('bookings', __name__)
 
@@ -28,6 +32,8 @@ def create_booking(current_user):
             CalendarService.link_event_to_booking(data['event_id'], booking.id)
             
         return jsonify(booking.to_dict()), 201
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -50,6 +56,8 @@ def update_booking(current_user, booking_id):
             attendees=data.get('attendees')
         )
         return jsonify(booking.to_dict()), 200
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -58,8 +66,8 @@ def update_booking(current_user, booking_id):
 @bookings_bp.route('/my_bookings', methods=['GET'])
 @token_required
 def get_my_bookings(current_user):
-    bookings = BookingService.get_user_bookings(current_user.id)
-    return jsonify([b.to_dict() for b in bookings])
+    rows = BookingService.get_user_booking_rows(current_user.id)
+    return jsonify([booking_to_dict(row) for row in rows])
 
 @bookings_bp.route('/<int:booking_id>', methods=['DELETE'])
 @token_required
@@ -75,8 +83,190 @@ def delete_booking(current_user, booking_id):
 @bookings_bp.route('/batch', methods=['DELETE'])
 @token_required
 def delete_all_bookings(current_user):
-    success, message = BookingService.cancel_all_bookings(current_user.id)
+    # Optional JSON body: {"booking_ids": [...]} and/or {"start": iso, "end": iso}; none: every future booking
+    data = request.get_json(silent=True) or {}
+    try:
+        booking_ids = data.get('booking_ids')
+        if booking_ids is not None:
+            if not isinstance(booking_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in booking_ids):
+                raise ValueError("booking_ids must be a list of booking ids.")
+        start = datetime.fromisoformat(data['start']) if data.get('start') else None
+        end = datetime.fromisoformat(data['end']) if data.get('end') else None
+        if start and end and end <= start:
+            raise ValueError("end must be after start.")
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    success, message, count = BookingService.cancel_all_bookings(current_user.id, booking_ids=booking_ids, start=start, end=end)
     if success:
-         return jsonify({'message': message}), 200
+         return jsonify({'message': message, 'count': count}), 200
+    else:
+         return jsonify({'error': message, 'count': count}), 400
+
+def _local_datetime(value):
+    # Bookings are stored in naive local time: an offset, if any, is converted to it
+    value = datetime.fromisoformat(value)
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+@bookings_bp.route('/batch', methods=['POST'])
+@token_required
+def create_bookings(current_user):
+    # {"bookings": [{"room_id", "start_time", "end_time", "title"?, "attendees"?}, ...]}
+    # or {"recurrence": {"room_id" | "room_ids", "start_time", "end_time", "frequency": "weekly", "count": 12,
+    #                    "interval"?, "title"?, "attendees"?}}
+    # "atomic": true creates nothing unless every item can be created
+    data = request.get_json(silent=True) or {}
+    try:
+        if data.get('recurrence') is not None:
+            pattern = data['recurrence']
+            room_ids = pattern.get('room_ids') or [pattern['room_id']]
+            items = BookingService.recurring_items(
+                room_ids=[int(room_id) for room_id in room_ids],
+                start_time=_local_datetime(pattern['start_time']),
+                end_time=_local_datetime(pattern['end_time']),
+                frequency=pattern.get('frequency', 'weekly'),
+                count=int(pattern.get('count', 1)),
+                interval=int(pattern.get('interval', 1)),
+                title=pattern.get('title', 'Meeting'),
+                attendees=int(pattern.get('attendees', 1))
+            )
+        elif isinstance(data.get('bookings'), list) and data['bookings']:
+            items = [{
+                'room_id': int(item['room_id']),
+                'start_time': _local_datetime(item['start_time']),
+                'end_time': _local_datetime(item['end_time']),
+                'title': item.get('title', 'Meeting'),
+                'attendees': int(item.get('attendees', 1))
+            } for item in data['bookings']]
+        else:
+            raise ValueError("Provide a non-empty bookings list or a recurrence.")
+    except KeyError as e:
+        return jsonify({'error': f"Missing field: {e.args[0]}"}), 400
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = BookingService.create_bookings(current_user, items, atomic=bool(data.get('atomic')))
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    conflicts = any(result['status'] == 'conflict' for result in results)
+    status_code = 201 if created else (409 if conflicts else 400)
+    return jsonify({'created': created, 'results': results}), status_code
+
+@bookings_bp.route('/assign', methods=['POST'])
+@token_required
+def assign_rooms(current_user):
+    # {"requests": [{"start_time", "end_time", "attendees"?, "equipment"?, "title"?}, ...], "book"?: false, "atomic"?: false}
+    # Rooms for all the requests at once; "book": true also books the assigned ones (as POST /batch)
+    data = request.get_json(silent=True) or {}
+    try:
+        if not isinstance(data.get('requests'), list) or not data['requests']:
+            raise ValueError("Provide a non-empty requests list.")
+        if len(data['requests']) > Config.ROOM_ASSIGNMENT_MAX_REQUESTS:
+            raise ValueError(f"At most {Config.ROOM_ASSIGNMENT_MAX_REQUESTS} requests at once.")
+        requests = [{
+            'start_time': _local_datetime(item['start_time']),
+            'end_time': _local_datetime(item['end_time']),
+            'attendees': int(item.get('attendees', 1)),
+            'equipment': [str(e) for e in item.get('equipment') or []],
+            'title': item.get('title', 'Meeting')
+        } for item in data['requests']]
+    except KeyError as e:
+        return jsonify({'error': f"Missing field: {e.args[0]}"}), 400
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = RoomAssignmentService.assign(requests)
+    assigned = [result for result in results if result['room_id'] is not None]
+    if not data.get('book'):
+        return jsonify({'assigned': len(assigned), 'results': results}), 200
+    if data.get('atomic') and len(assigned) < len(results):
+        return jsonify({'assigned': len(assigned), 'created': 0, 'results': results}), 409
+
+    try:
+        booked = BookingService.create_bookings(current_user, [
+            dict(requests[result['index']], room_id=result['room_id']) for result in assigned], atomic=bool(data.get('atomic')))
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:  # more than BOOKING_BATCH_MAX_ITEMS to book
+        return jsonify({'error': str(e)}), 400
+    for result, outcome in zip(assigned, booked):
+        result['status'] = outcome['status']
+        if 'booking' in outcome:
+            result['booking'] = outcome['booking']
+        else:
+            result['error'] = outcome['error']
+    created = sum(1 for outcome in booked if outcome['status'] == 'created')
+    return jsonify({'assigned': len(assigned), 'created': created, 'results': results}), 201 if created else 409
+
+@bookings_bp.route('/availability', methods=['GET'])
+@token_required
+def stream_availability(current_user):
+    # ?from=YYYY-MM-DD&to=YYYY-MM-DD&min_capacity=4&equipment=projector,tv&room_ids=1,2
+    # NDJSON, one line per room and day with free slots, sent while the rest is computed
+    args = request.args
+    try:
+        from_date = date.fromisoformat(args['from'][:10]) if args.get('from') else date.today()
+        to_date = date.fromisoformat(args['to'][:10]) if args.get('to') else from_date
+        if to_date < from_date:
+            raise ValueError("to must not be before from.")
+        if (to_date - from_date).days >= Config.AVAILABILITY_MAX_DAYS:
+            raise ValueError(f"The range cannot exceed {Config.AVAILABILITY_MAX_DAYS} days.")
+        min_capacity = int(args.get('min_capacity', 1))
+        equipment = [e.strip() for e in args.get('equipment', '').split(',') if e.strip()]
+        room_ids = [int(i) for i in args['room_ids'].split(',') if i.strip()] if args.get('room_ids') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    items = BookingService.iter_availabilities(from_date, to_date, min_capacity, equipment=equipment, room_ids=room_ids,
+                                               chunk_size=Config.AVAILABILITY_STREAM_CHUNK_ROOMS)
+    lines = (current_app.json.dumps(item) + "\n" for item in items)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _isoformat(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_isoformat(v) for v in value]
+    return value
+
+@bookings_bp.route('/search', methods=['GET'])
+@token_required
+def search_slots(current_user):
+    # ?duration=45&attendees=8&equipment=projector,whiteboard&date=YYYY-MM-DD&days=1
+    # mode=earliest (&limit=5&not_before=iso) | all | common (&room_ids=1,2&min_rooms=2)
+    args = request.args
+    try:
+        mode = args.get('mode', 'earliest')
+        if mode not in ('earliest', 'all', 'common'):
+            raise ValueError("mode must be one of earliest, all, common.")
+        day = date.fromisoformat(args['date'][:10]) if args.get('date') else date.today()
+        days = int(args.get('days', 1))
+        if not 1 <= days <= Config.SLOT_SEARCH_MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {Config.SLOT_SEARCH_MAX_DAYS}.")
+        duration = int(args.get('duration', 60))
+        attendees = int(args.get('attendees', 1))
+        if duration <= 0 or attendees <= 0:
+            raise ValueError("duration and attendees must be positive.")
+        equipment = [e.strip() for e in args.get('equipment', '').split(',') if e.strip()]
+        room_ids = [int(i) for i in args['room_ids'].split(',') if i.strip()] if args.get('room_ids') else None
+        not_before = _local_datetime(args['not_before']) if args.get('not_before') else None
+        limit = int(args.get('limit', 5))
+        min_rooms = int(args['min_rooms']) if args.get('min_rooms') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    grid = SlotSearchService.grid(day, days=days, attendees=attendees, equipment=equipment, room_ids=room_ids)
+    if mode == 'earliest':
+        results = SlotSearchService.earliest_fits(grid, timedelta(minutes=duration), limit=limit, not_before=not_before)
+    elif mode == 'all':
+        results = SlotSearchService.all_fits(grid, timedelta(minutes=duration))
     else:
-         return jsonify({'error': message}), 400
+        results = SlotSearchService.common_free_windows(grid, timedelta(minutes=duration), min_rooms=min_rooms)
+    return jsonify({'mode': mode, 'date': day.isoformat(), 'days': days, 'duration': duration, 'results': _isoformat(results)})
@@ -1,23 +1,16 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from app.models import User
-from app.extensions import db
+from app.extensions import db, scheduler, principals
 from app.services.calendar_service import CalendarService
-import jwt
+from app.utils.auth import AuthError, bearer_token
 
 calendar_bp = Blueprint('calendar', __name__)
 
 def get_auth_user():
-    token = None
-    if 'Authorization' in request.headers:
-        token = request.headers['Authorization'].split(" ")[1]
-    
-    if not token:
-        return None
-        
+    """Cached principal of the caller (see app/utils/auth.py), or None."""
     try:
-        data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-        return User.query.get(data['user_id'])
-    except:
+        return principals.authenticate(bearer_token())
+    except AuthError:
         return None
 
 @calendar_bp.route('/events', methods=['GET'])
@@ -25,10 +18,26 @@ def get_events():
     user = get_auth_user()
     if not user:
         return jsonify({'message': 'Unauthorized'}), 401
-        
-    CalendarService.sync_user_events(user)
+
+    # Feeds are refreshed by the background scheduler; only a never-synced feed is
+    # pushed to the front of the queue. Without the scheduler, sync inline (conditional GET).
+    state = CalendarService.get_sync_state(user)
+    if user.ics_url:
+        if not scheduler.is_running():
+            CalendarService.sync_user_events(user)
+            state = CalendarService.get_sync_state(user)
+        elif state is None or state.last_synced_at is None:
+            CalendarService.request_sync(user)
+            scheduler.wake('calendar_sync')
+
     events = CalendarService.get_stored_events(user)
-    return jsonify(events)
+    response = jsonify(events)
+    # The body stays a plain array for the frontend; sync info travels in headers
+    if state is not None and state.last_synced_at:
+        response.headers['X-Calendar-Last-Synced'] = state.last_synced_at.isoformat() + 'Z'
+    if state is not None and state.last_status:
+        response.headers['X-Calendar-Sync-Status'] = state.last_status
+    return response
 
 @calendar_bp.route('/settings', methods=['POST'])
 def update_settings():
@@ -43,8 +52,15 @@ def update_settings():
     if ics_url and not ics_url.startswith('http'):
          return jsonify({'message': 'Invalid URL'}), 400
          
+    changed = user.ics_url != ics_url
+    user = db.session.get(User, user.id)  # the principal is read-only
     user.ics_url = ics_url
     db.session.commit()
+    if changed:
+        principals.invalidate_user(user.id)
+    if changed and ics_url:
+        CalendarService.request_sync(user)
+        scheduler.wake('calendar_sync')
     
     return jsonify({'message': 'Settings updated', 'ics_url': user.ics_url})
 
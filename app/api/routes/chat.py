@@ -1,30 +1,26 @@
 from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app.services.nlp_service import NLPService
 from app.services.booking_service import BookingService
+from app.services.slot_search import SlotSearchService
 from app.services.calendar_service import CalendarService
+from app.services.history_manager import HistoryManager
 from app.utils.decorators import token_required
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 import json
-from app.models import Booking, Room
+from app.models import Booking
+from app.extensions import room_catalog, conversations
 from app.config import Config
-import unicodedata
 
 chat_bp = Blueprint('chat', __name__)
 
-# Simple in-memory context store: { user_id: { 'intent': '...', 'slots': {...} } }
-CHAT_CONTEXT = {}
-
 @chat_bp.route('/message', methods=['POST'])
 @token_required
 def chat(current_user):
     data = request.get_json()
     message = data.get('message', '')
     
-    # Retrieve previous context
-    if current_user.id not in CHAT_CONTEXT:
-        CHAT_CONTEXT[current_user.id] = {'messages': [], 'slots': {}, 'intent': None}
-    
-    user_context = CHAT_CONTEXT[current_user.id]
+    # Retrieve previous context (shared store: the follow-up message may land on another worker)
+    user_context = conversations.load(current_user.id)
 
     # Ensure context structure integrity
     if 'messages' not in user_context:
@@ -37,11 +33,13 @@ def chat(current_user):
     # New NLP Service call (ChatGPT) with history
     # Note: We pass the history of PREVIOUS messages. The current message is added inside parse_intent temporarily for the call,
     # but we must persist it to history manually after.
-    intent, slots = NLPService.parse_intent(message, history=history)
+    # Older turns are summarized from the known state to keep the prompt under budget.
+    intent, slots = NLPService.parse_intent(message, history=history, state=user_context)
     
-    # Persist User Message + Assistant NLU State
+    # Persist User Message + Assistant NLU State (bounded: older turns are never sent verbatim anyway)
     user_context['messages'].append({"role": "user", "content": message})
     user_context['messages'].append({"role": "assistant", "content": json.dumps({"intent": intent, "slots": slots})})
+    user_context['messages'] = HistoryManager.trim(user_context['messages'], Config.CHAT_HISTORY_MAX_TURNS)
     
     # Update Slots State
     if intent not in ['UNKNOWN', 'API_ERROR', 'GREETING']:
@@ -52,15 +50,20 @@ def chat(current_user):
         # So we can overwrite.
         user_context['slots'] = slots
 
+    conversations.save(current_user.id, user_context)
+
     # Helper to save verbal response
     def save_verbal_response(text):
         user_context['messages'].append({"role": "assistant", "content": text})
+        conversations.save(current_user.id, user_context)
     
     # Common args via partial? No, just pass lambda.
     stream_args = {'on_complete': save_verbal_response}
 
     def respond(context_text, payload_data=None):
-        return Response(NLPService.generate_response_stream(context_text, payload_data, **stream_args), mimetype='application/x-ndjson')
+        # Keep the app context alive while streaming: on_complete writes to the conversation store
+        stream = stream_with_context(NLPService.generate_response_stream(context_text, payload_data, **stream_args))
+        return Response(stream, mimetype='application/x-ndjson')
 
     if intent == 'BOOK_INTENT':
         start_time_str = slots.get('start_time')
@@ -196,8 +199,11 @@ def chat(current_user):
         )
         
         if not rooms:
-            # Proactive suggestions & Diagnosis
-            alternatives = BookingService.get_availabilities(start_time.strftime("%Y-%m-%d"), min_capacity=attendees)
+            # Proactive suggestions & Diagnosis: the earliest fits of the same meeting that day
+            grid = SlotSearchService.grid(start_time.date(), attendees=attendees, equipment=equipment)
+            alternatives = SlotSearchService.earliest_fits(grid, end_time - start_time, limit=5, not_before=start_time, spacing=end_time - start_time)
+            if not alternatives:  # nothing after the requested time: earlier that day
+                alternatives = SlotSearchService.earliest_fits(grid, end_time - start_time, limit=5, spacing=end_time - start_time)
             
             ctx = f"User wanted to book for {attendees} people on {start_time.strftime('%d/%m at %H:%M')}.\n"
             if equipment:
@@ -208,9 +214,8 @@ def chat(current_user):
             if room_name:
                 # User asked for a specific room, but it wasn't returned using find_potential_rooms.
                 # Let's find out why.
-                # 1. Find the room by loosely matching name again (manual or simple query)
-                all_rooms = Room.query.all()
-                target_room = next((r for r in all_rooms if room_name.lower() in r.name.lower()), None)
+                # 1. Find the room by loosely matching name again
+                target_room = room_catalog.find_by_name(room_name)
                 
                 if not target_room:
                      diagnosis_msg = f"The requested room '{room_name}' does not exist.\n"
@@ -235,8 +240,8 @@ def chat(current_user):
             if alternatives:
                 ctx += "Alternatives found for the same day (Present these clearly):\n"
                 for item in alternatives:
-                    slots_text = ", ".join([f"{s['start']}-{s['end']}" for s in item['slots']])
-                    ctx += f"- {item['room_name']} ({item['capacity']}p): {slots_text}\n"
+                    rooms_text = ", ".join([f"{r['room_name']} ({r['capacity']}p)" for r in item['rooms'][:3]])
+                    ctx += f"- {item['start'].strftime('%H:%M')}-{item['end'].strftime('%H:%M')}: {rooms_text}\n"
             else:
                 ctx += "No other availabilities found for this day."
             
@@ -281,17 +286,36 @@ def chat(current_user):
     elif intent == 'QUERY_AVAILABILITY':
         start_time_str = slots.get('start_time')
         attendees = slots.get('attendees') or 1
-        
-        availabilities = BookingService.get_availabilities(start_time_str, min_capacity=attendees)
+        room_name = slots.get('room_name')
+
+        # A single day, or a range ("this week") when the NLU found an end date
+        from_date = BookingService.parse_target_date(start_time_str)
+        to_date = BookingService.parse_target_date(slots['end_date']) if slots.get('end_date') else from_date
+        to_date = min(max(to_date, from_date), from_date + timedelta(days=Config.AVAILABILITY_MAX_DAYS - 1))
+
+        room_ids = None
+        if room_name:
+            target_room = room_catalog.find_by_name(room_name)
+            if not target_room:
+                return respond(f"Je ne trouve pas la salle '{room_name}'.")
+            room_ids = [target_room.id]
+
+        availabilities = list(BookingService.iter_availabilities(from_date, to_date, attendees, room_ids=room_ids))
         
         ctx = f"User asked for availability (Attendees: {attendees}).\n"
         if not availabilities:
-             ctx += "Outcome: No availability found for this day."
-        else:
+             ctx += "Outcome: No availability found for this day." if to_date == from_date else "Outcome: No availability found for this period."
+        elif to_date == from_date:
              ctx += f"Found {len(availabilities)} available rooms. List:\n"
              for item in availabilities:
                 slots_text = ", ".join([f"{s['start']}-{s['end']}" for s in item['slots']])
                 ctx += f"- {item['room_name']} ({item['capacity']}p): {slots_text}\n"
+        else:
+             ctx += f"Availabilities from {from_date.strftime('%d/%m')} to {to_date.strftime('%d/%m')}:\n"
+             for item in availabilities:
+                slots_text = ", ".join([f"{s['start']}-{s['end']}" for s in item['slots']])
+                day = date.fromisoformat(item['date']).strftime('%a %d/%m')
+                ctx += f"- {item['room_name']} ({item['capacity']}p) {day}: {slots_text}\n"
 
         return respond(ctx)
 
@@ -299,13 +323,8 @@ def chat(current_user):
         room_name = slots.get('room_name')
         
         if room_name:
-            # Search for specific room with normalization
-            all_rooms = Room.query.all()
-            
-            def normalize(t):
-                 return ''.join(c for c in unicodedata.normalize('NFD', t) if unicodedata.category(c) != 'Mn').lower()
-            
-            target_room = next((r for r in all_rooms if normalize(room_name) in normalize(r.name)), None)
+            # Search for specific room with normalization (accents/case, precomputed in the catalog)
+            target_room = room_catalog.find_by_name(room_name)
             
             if target_room:
                  eq_list = ", ".join(target_room.equipment) if target_room.equipment else "Aucun"
@@ -315,7 +334,7 @@ def chat(current_user):
                  return respond(f"Je ne trouve pas la salle '{room_name}'.")
         else:
             # List all rooms
-            rooms = Room.query.filter_by(is_active=True).all()
+            rooms = room_catalog.active()
             info = "Voici les salles disponibles :\n"
             for r in rooms:
                  eq_list = ", ".join(r.equipment) if r.equipment else "Standard"
@@ -328,7 +347,7 @@ def chat(current_user):
     elif intent == 'CANCEL_INTENT':
         start_time_str = slots.get('start_time')
         scope = slots.get('scope', 'SINGLE')
-        bookings = BookingService.get_user_bookings(current_user.id)
+        bookings = BookingService.get_user_bookings(current_user.id, with_room=True)
         
         if not bookings:
             return respond("User wants to cancel, but has no upcoming bookings.")
@@ -338,7 +357,7 @@ def chat(current_user):
              return respond(f"User wants to cancel ALL {len(bookings)} bookings. Ask specifically for confirmation.", payload)
         
         if scope == 'LAST':
-             last_booking = BookingService.get_last_created_booking(current_user.id)
+             last_booking = BookingService.get_last_created_booking(current_user.id, with_room=True)
              if not last_booking:
                  return respond("User wants to cancel last booking, but none found.")
              
@@ -442,7 +461,7 @@ def chat(current_user):
                        return respond(f"Modification impossible: la salle '{preferred_room_name}' n'est pas disponible.")
              else:
                   # Check if current room still fits capacity
-                  current_room = Room.query.get(new_room_id)
+                  current_room = room_catalog.get(new_room_id)
                   if current_room.capacity < new_attendees:
                        # Need to find a new room
                        candidates = BookingService.find_potential_rooms(new_start_time, new_end_time, new_attendees, exclude_booking_id=target_booking_id)
@@ -461,7 +480,7 @@ def chat(current_user):
                               return respond("Modification impossible: le créneau n'est plus disponible.")
 
              # Generate Confirmation Request
-             room = Room.query.get(new_room_id)
+             room = room_catalog.get(new_room_id)
              ctx = f"Propose modification of booking {target_booking_id}. New details: Room {room.name}, {new_start_time.strftime('%d/%m %H:%M')}, {new_attendees} pax. Ask confirm."
              
              # Payload for update
@@ -493,8 +512,7 @@ def chat(current_user):
 @chat_bp.route('/context', methods=['DELETE'])
 @token_required
 def clear_context(current_user):
-    if current_user.id in CHAT_CONTEXT:
-        del CHAT_CONTEXT[current_user.id]
+    conversations.delete(current_user.id)
     return jsonify({"message": "Context cleared"}), 200
 
 @chat_bp.route('/context/last_booking', methods=['POST'])
@@ -503,13 +521,12 @@ def update_context_last_booking(current_user):
     data = request.get_json()
     booking_id = data.get('booking_id')
     
-    if current_user.id not in CHAT_CONTEXT:
-        CHAT_CONTEXT[current_user.id] = {'messages': [], 'slots': {}, 'intent': None}
-        
-    CHAT_CONTEXT[current_user.id]['last_confirmed_booking_id'] = booking_id
+    user_context = conversations.load(current_user.id)
+    user_context['last_confirmed_booking_id'] = booking_id
     # Reset intent but keep last booking reference
-    CHAT_CONTEXT[current_user.id]['intent'] = None
-    CHAT_CONTEXT[current_user.id]['slots'] = {}
+    user_context['intent'] = None
+    user_context['slots'] = {}
+    conversations.save(current_user.id, user_context)
     
     return jsonify({"message": "Context updated with last booking"}), 200
 
@@ -8,7 +8,94 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///gbook.db'
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # None: official API
+
+    # OpenAI HTTP client (one keep-alive pool per worker process)
+    OPENAI_TIMEOUT = 30.0
+    OPENAI_CONNECT_TIMEOUT = 5.0
+    OPENAI_POOL_MAX_CONNECTIONS = 20
+    OPENAI_POOL_MAX_KEEPALIVE = 10
+    OPENAI_KEEPALIVE_EXPIRY = 60.0
+    OPENAI_MAX_RETRIES = 3
+    OPENAI_RETRY_BACKOFF = 0.5  # seconds, doubled at each attempt (full jitter)
+    OPENAI_RETRY_MAX_BACKOFF = 8.0
+
+    JSON_FAST_ENCODER = True  # orjson for responses, if installed
+
+    # Cross-worker cache invalidation (version files shared by the gunicorn workers)
+    CACHE_SIGNAL_DIR = os.environ.get('CACHE_SIGNAL_DIR') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance')
+    ROOM_CATALOG_CHECK_INTERVAL = 1.0  # seconds between two version checks
+
+    # Authenticated principals cached per JWT (per process, invalidated on admin user changes)
+    AUTH_PRINCIPAL_TTL = 60  # seconds
+    AUTH_CACHE_MAX_ENTRIES = 10000
+    AUTH_CACHE_CHECK_INTERVAL = 1.0
+
+    # Password hashing (bounded pool per process) and login throttling
+    # werkzeug's default, which accounts created through the admin API already use. Stored hashes
+    # with another method are rehashed at their next successful login (one extra hash each)
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = 2  # 0: hash in the request thread
+    PASSWORD_HASH_QUEUE_LIMIT = 16  # hashes running or waiting before answering 503
+    PASSWORD_HASH_TIMEOUT = 10
+    LOGIN_RATE_WINDOW = 60  # seconds
+    LOGIN_RATE_LIMIT_PER_ADDRESS = 30  # attempts per window
+    LOGIN_RATE_LIMIT_PER_USERNAME = 5  # failed attempts per window
+
+    # Chat context storage: 'sql' (shared by all workers) or 'memory' (single process)
+    CHAT_CONTEXT_BACKEND = os.environ.get('CHAT_CONTEXT_BACKEND', 'sql')
+    CHAT_CONTEXT_TTL = 2 * 3600  # seconds of inactivity before a conversation is dropped
+    CHAT_CONTEXT_MAX_ENTRIES = 1000  # memory backend only (LRU)
+
+    # NLU prompt size: recent turns verbatim, older ones summarized as the slot state
+    NLU_PROMPT_TOKEN_BUDGET = 2500  # whole prompt (system + history + message), estimated
+    NLU_HISTORY_KEEP_TURNS = 3
+    CHAT_HISTORY_MAX_TURNS = 20  # turns kept in the conversation store
+
+    # Cache of generated responses for templated situations (per process)
+    RESPONSE_CACHE_TTL = 6 * 3600
+    RESPONSE_CACHE_MAX_ENTRIES = 500
     
+    # Background jobs (one leader worker per host, see app/services/scheduler.py)
+    BACKGROUND_JOBS_ENABLED = os.environ.get('BACKGROUND_JOBS_ENABLED', '1') == '1'
+    SCHEDULER_TICK = 5.0  # seconds between two checks of the job list
+
+    # ICS calendar synchronization
+    CALENDAR_SYNC_INTERVAL = 15 * 60  # seconds between two fetches of the same feed
+    CALENDAR_SYNC_CHECK_INTERVAL = 30  # seconds between two scans for due feeds
+    CALENDAR_SYNC_WORKERS = 4
+    CALENDAR_SYNC_PER_HOST = 2  # concurrent fetches against one calendar server
+    CALENDAR_FETCH_TIMEOUT = 10
+    CALENDAR_RECURRENCE_HORIZON_DAYS = 60  # recurring events are expanded this far ahead
+    CALENDAR_RECURRENCE_MAX_OCCURRENCES = 500  # per recurring event and sync
+    
+    # Booking writes (serialized per room, see BookingService.booking_write)
+    BOOKING_LOCK_RETRIES = 3  # SQLite: extra attempts when the write lock stays busy
+    BOOKING_LOCK_BACKOFF = 0.05  # seconds, doubled at each attempt (full jitter)
+    BOOKING_BATCH_MAX_ITEMS = 200  # per POST /api/bookings/batch (recurrences expanded)
+    ROOM_ASSIGNMENT_MAX_REQUESTS = 500  # per POST /api/bookings/assign
+
+    # In-memory occupancy index of confirmed bookings (per process, see OccupancyIndex)
+    OCCUPANCY_INDEX_ENABLED = True
+    OCCUPANCY_INDEX_DAYS = 14  # indexed from today 00:00; queries beyond fall back to SQL
+    OCCUPANCY_INDEX_CHECK_INTERVAL = 1.0  # seconds between two checks of the other workers' writes
+    OCCUPANCY_INDEX_MAX_AGE = 3600  # seconds, full reload (slides the window)
+
+    # Retention job: expired and cancelled bookings are moved to booking_archives
+    BOOKING_RETENTION_INTERVAL = 10 * 60  # seconds between two runs
+    BOOKING_RETENTION_BATCH_SIZE = 500  # rows per transaction (short write locks)
+    BOOKING_RETENTION_MAX_BATCHES = 20  # per run, the rest waits for the next one
+    BOOKING_ARCHIVE_MAX_AGE_DAYS = None  # purge archived bookings older than this (None: keep)
+
+    # Availability listings (BookingService.iter_availabilities, /api/bookings/availability)
+    AVAILABILITY_SKIP_WEEKENDS = False
+    AVAILABILITY_MAX_DAYS = 31  # per request
+    AVAILABILITY_STREAM_CHUNK_ROOMS = 200  # rooms per bookings lookup when streaming
+
+    # Multi-room free-slot search (see SlotSearchService)
+    SLOT_SEARCH_GRANULARITY = 5  # minutes per slot; must divide the working hours
+    SLOT_SEARCH_MAX_DAYS = 7  # per request
+
     # Business Rules Defaults
     SINGLE_USER_CAPACITY_THRESHOLD = 6
     WORKING_HOURS_START = 8  # 8 AM
@@ -20,6 +107,11 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_SIGNAL_DIR = None  # process-local signals
+    CHAT_CONTEXT_BACKEND = 'memory'
+    BACKGROUND_JOBS_ENABLED = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # fast hashes for the test suite
+    OCCUPANCY_INDEX_ENABLED = False  # SQL paths; tests/test_occupancy_index.py enables it
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -1,4 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
+from app.services.room_catalog import RoomCatalog
+from app.services.conversation_store import Conversations
+from app.services.scheduler import BackgroundScheduler
+from app.services.occupancy_index import OccupancyIndex
+from app.utils.auth import PrincipalCache
 
 
 db = SQLAlchemy()
+room_catalog = RoomCatalog()
+conversations = Conversations()
+scheduler = BackgroundScheduler()
+principals = PrincipalCache()
+occupancy = OccupancyIndex()
@@ -0,0 +1,110 @@
+"""
+Schema migrations for databases created before a schema change.
+
+`db.create_all()` creates missing tables but never alters existing ones, so changes to
+existing tables (new indexes...) are listed here as numbered steps. Applied steps are
+recorded in the `schema_migrations` table; `upgrade()` runs the others in order, each in
+its own transaction. Steps must be idempotent: a fresh database already has everything
+create_all() builds.
+
+    python -m app.migrations            # apply pending steps
+    python -m app.migrations --status   # list steps and whether they are applied
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select, text
+from app.extensions import db
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(128), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def _create_missing_tables(connection):
+    """Tables added since the database was created (calendar_sync_states, booking_archives...)."""
+    db.metadata.create_all(connection, checkfirst=True)
+
+
+def _add_booking_event_indexes(connection):
+    """Composite indexes matching the availability, "my bookings" and upcoming events queries."""
+    from app.models import Booking, Event
+    names = ('ix_bookings_room_status_time', 'ix_bookings_user_status_end',
+             'ix_events_user_end', 'ix_events_user_booking_start')
+    for table in (Booking.__table__, Event.__table__):
+        for index in table.indexes:
+            if index.name in names:
+                index.create(connection, checkfirst=True)
+
+
+def _rebuild_booking_archives(connection):
+    """
+    booking_archives keyed by its own id, the booking's id moved to a non-unique booking_id:
+    SQLite reuses the ids of deleted bookings, so an archived id can come back.
+    """
+    from app.models import BookingArchive
+    inspector = inspect(connection)
+    if 'booking_archives' not in inspector.get_table_names():
+        BookingArchive.__table__.create(connection)
+        return
+    if 'booking_id' in {column['name'] for column in inspector.get_columns('booking_archives')}:
+        return
+    for index in inspector.get_indexes('booking_archives'):
+        connection.execute(text(f'DROP INDEX {index["name"]}'))
+    connection.execute(text('ALTER TABLE booking_archives RENAME TO booking_archives_old'))
+    BookingArchive.__table__.create(connection)
+    columns = 'user_id, room_id, start_time, end_time, title, attendees_count, status, created_at, archived_at'
+    connection.execute(text(f'INSERT INTO booking_archives (booking_id, {columns}) '
+                            f'SELECT id, {columns} FROM booking_archives_old ORDER BY id'))
+    connection.execute(text('DROP TABLE booking_archives_old'))
+
+
+MIGRATIONS = [
+    (1, 'create missing tables', _create_missing_tables),
+    (2, 'composite indexes on bookings and events', _add_booking_event_indexes),
+    (3, 'booking_archives table', _create_missing_tables),
+    (4, 'booking_archives keyed apart from booking ids', _rebuild_booking_archives),
+]
+
+
+def applied_versions(engine):
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def upgrade(engine=None):
+    """Applies pending migrations, returns the versions applied."""
+    engine = engine or db.engine
+    done = applied_versions(engine)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(insert(schema_migrations).values(
+                version=version, name=name, applied_at=datetime.utcnow()))
+        applied.append(version)
+    return applied
+
+
+def main(argv=None):
+    from app import create_app
+    argv = sys.argv[1:] if argv is None else argv
+    app = create_app()
+    with app.app_context():
+        if '--status' in argv:
+            done = applied_versions(db.engine)
+            for version, name, _ in MIGRATIONS:
+                print(f"{version:3d}  {'applied' if version in done else 'pending':8s} {name}")
+            return
+        applied = upgrade()
+        print(f"Applied migrations: {', '.join(map(str, applied))}" if applied else "Database schema up to date.")
+
+
+if __name__ == '__main__':
+    main()
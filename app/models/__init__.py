@@ -2,3 +2,6 @@ from .user import User
 from .room import Room
 from .booking import Booking
 from .event import Event
+from .conversation import Conversation
+from .calendar_sync_state import CalendarSyncState
+from .booking_archive import BookingArchive
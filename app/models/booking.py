@@ -1,8 +1,15 @@
 from app.extensions import db
+from app.utils.serialization import booking_to_dict
 from datetime import datetime
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Availability checks: one room's confirmed bookings overlapping an interval
+        db.Index('ix_bookings_room_status_time', 'room_id', 'status', 'start_time', 'end_time'),
+        # A user's upcoming (or expired) confirmed bookings
+        db.Index('ix_bookings_user_status_end', 'user_id', 'status', 'end_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -21,15 +28,5 @@ class Booking(db.Model):
     room = db.relationship('Room', lazy=True)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'room_id': self.room_id,
-            'room_name': self.room.name if self.room else f"Room {self.room_id}",
-            'room_capacity': self.room.capacity if self.room else 0,
-            'start_time': self.start_time.isoformat(),
-            'end_time': self.end_time.isoformat(),
-            'title': self.title,
-            'attendees_count': self.attendees_count,
-            'status': self.status
-        }
+        # Room details come from the in-memory catalog rather than the lazy `room` relationship
+        return booking_to_dict(self)
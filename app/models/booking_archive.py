@@ -0,0 +1,20 @@
+from app.extensions import db
+from datetime import datetime
+
+class BookingArchive(db.Model):
+    """Bookings moved out of `bookings` by the retention job once expired or cancelled (history)."""
+    __tablename__ = 'booking_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Id the booking had: not unique, SQLite hands the freed ids of deleted bookings out again
+    booking_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    room_id = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    title = db.Column(db.String(128))
+    attendees_count = db.Column(db.Integer, default=1)
+    status = db.Column(db.String(20))  # status when archived: confirmed (expired) or cancelled
+    created_at = db.Column(db.DateTime)
+
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
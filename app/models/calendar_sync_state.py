@@ -0,0 +1,16 @@
+from app.extensions import db
+
+class CalendarSyncState(db.Model):
+    """Background ICS synchronization bookkeeping, one row per user with a feed."""
+    __tablename__ = 'calendar_sync_states'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    url = db.Column(db.String(512), nullable=True)          # feed the validators below belong to
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)  # raw Last-Modified header
+    last_synced_at = db.Column(db.DateTime, nullable=True)   # last successful fetch (200 or 304), UTC
+    next_sync_at = db.Column(db.DateTime, nullable=True, index=True)  # due when <= now, UTC
+    last_status = db.Column(db.String(32), nullable=True)    # 'updated', 'not_modified', 'error'
+    last_error = db.Column(db.String(512), nullable=True)
+    # JSON {master uid: {"fp": content hash, "until": expanded up to (UTC ISO), "ics": master + overrides}}
+    recurrences = db.Column(db.Text, nullable=True)
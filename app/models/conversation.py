@@ -0,0 +1,10 @@
+from app.extensions import db
+from datetime import datetime
+
+class Conversation(db.Model):
+    """Chat context (messages, slots, intent) of a user, shared by every worker."""
+    __tablename__ = 'conversations'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Text, nullable=False)  # JSON-encoded context
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
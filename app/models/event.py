@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # A user's upcoming events
+        db.Index('ix_events_user_end', 'user_id', 'end_time'),
+        # A user's next event without a booking
+        db.Index('ix_events_user_booking_start', 'user_id', 'booking_id', 'start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     uid = db.Column(db.String(255), unique=True, nullable=False)
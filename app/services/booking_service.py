@@ -1,10 +1,67 @@
-from datetime import datetime
-from sqlalchemy import or_, and_
-from app.models import Room, Booking
-from app.extensions import db
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, and_, select, exists, insert, update, delete, literal, DateTime
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+from dateutil.rrule import rrule, DAILY, WEEKLY
+from app.models import Room, Booking, BookingArchive, Event
+from app.extensions import db, room_catalog, occupancy
 from app.config import Config
+from app.utils.serialization import booking_columns, booking_to_dict
+from app.services.occupancy_index import Interval, SortedIntervals
+
+
+class BookingConflictError(ValueError):
+    """The slot was taken (or is being taken) by a concurrent booking: answered with a 409."""
+
 
 class BookingService:
+
+    @staticmethod
+    @contextmanager
+    def booking_write(room_ids):
+        """
+        Serialized write section for bookings of `room_ids`: availability checked inside it
+        cannot be invalidated by a concurrent request before the commit.
+
+        - SQLite: the transaction is started with BEGIN IMMEDIATE, which takes the database
+          write lock up front (one booking writer at a time); a writer still holding it after
+          the busy timeout is retried a few times with jittered backoff, then reported as a conflict.
+        - Other databases: the room rows are locked with SELECT ... FOR UPDATE, in id order so
+          that two requests touching the same rooms cannot deadlock.
+
+        The body must commit; any exception rolls the transaction back.
+        """
+        attempts = Config.BOOKING_LOCK_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                BookingService._begin_booking_write(room_ids)
+                break
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e).lower() or attempt == attempts - 1:
+                    raise BookingConflictError("Réservation concurrente en cours, veuillez réessayer.") from e
+                time.sleep(random.uniform(0, Config.BOOKING_LOCK_BACKOFF * (2 ** attempt)))
+        try:
+            yield
+        except BaseException:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _begin_booking_write(room_ids):
+        connection = db.session.connection()
+        if connection.dialect.name == 'sqlite':
+            # pysqlite only opens its transaction before the first write: open it now, as a writer
+            if not connection.connection.dbapi_connection.in_transaction:
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+        else:
+            db.session.execute(
+                select(Room.id).where(Room.id.in_(sorted(set(room_ids)))).order_by(Room.id).with_for_update()
+            )
     
     @staticmethod
     def is_within_working_hours(start_time: datetime, end_time: datetime) -> bool:
@@ -32,8 +89,17 @@ class BookingService:
         return capacity <= threshold
 
     @staticmethod
-    def check_availability(room_id, start_time, end_time, exclude_booking_id=None):
-        """Check if room is free during interval, optionally excluding a specific booking."""
+    def check_availability(room_id, start_time, end_time, exclude_booking_id=None, use_index=True):
+        """
+        Check if room is free during interval, optionally excluding a specific booking.
+        Answered by the occupancy index when it covers the interval, unless `use_index` is
+        False (the authoritative check made inside booking_write).
+        """
+        if use_index:
+            busy = occupancy.is_busy(room_id, start_time, end_time, exclude_booking_id)
+            if busy is not None:
+                return not busy
+
         query = Booking.query.filter(
             Booking.room_id == room_id,
             Booking.status == 'confirmed',
@@ -47,104 +113,130 @@ class BookingService:
         conflict = query.first()
         return conflict is None
 
+    @staticmethod
+    def busy_room_ids_query(start_time, end_time, exclude_booking_id=None):
+        """Ids of rooms holding a confirmed booking overlapping [start_time, end_time)."""
+        query = db.session.query(Booking.room_id).filter(
+            Booking.status == 'confirmed',
+            Booking.start_time < end_time,
+            Booking.end_time > start_time
+        )
+        if exclude_booking_id:
+            query = query.filter(Booking.id != exclude_booking_id)
+        return query.distinct()
+
+    @staticmethod
+    def busy_room_ids(start_time, end_time, exclude_booking_id=None):
+        """Set of busy_room_ids_query, from the occupancy index when it covers the interval."""
+        busy = occupancy.busy_room_ids(start_time, end_time, exclude_booking_id)
+        if busy is None:
+            busy = {room_id for (room_id,) in BookingService.busy_room_ids_query(start_time, end_time, exclude_booking_id)}
+        return busy
+
     @staticmethod
     def find_potential_rooms(start_time, end_time, attendees: int, required_equipment: list = None, preferred_room_name: str = None, excluded_room_names: list = None, exclude_booking_id: int = None):
-        """Find all rooms that are free and fit the attendees."""
-        # 1. Filter by capacity
-        capable_rooms = Room.query.filter(Room.capacity >= attendees, Room.is_active == True).all()
-        
+        """
+        Find all rooms that are free and fit the attendees.
+        Returns CatalogRoom snapshots (see RoomCatalog), best fit first.
+        Costs a single query whatever the number of rooms: the set of rooms busy in the interval
+        (none when the occupancy index covers it); capacity, name and equipment filters run on the
+        cached room catalog.
+        """
+        # 1. Capacity + Availability (catalog is already sorted best fit first)
+        busy = BookingService.busy_room_ids(start_time, end_time, exclude_booking_id)
+        available_rooms = [r for r in room_catalog.active(attendees) if r.id not in busy]
+
         # 2. Filter by Preferred Name (if requested)
+        # If user asks for a specific room and it doesn't exist/fit/is busy, return empty to let Upper Layer explain.
         if preferred_room_name:
-            # Normalize for comparison
             pref = preferred_room_name.lower().strip()
-            # Try exact/partial match
-            named_matches = [r for r in capable_rooms if pref in r.name.lower()]
-            if named_matches:
-                 capable_rooms = named_matches
-            # If no match found, we might fall back to all capable rooms or return empty.
-            # Decision: if user asks for specific room and it doesn't exist/fit, return empty to let Upper Layer explain.
-            else:
-                 return []
-                 
+            available_rooms = [r for r in available_rooms if pref in r.name.lower()]
+            if not available_rooms:
+                return []
+
         # 2.5 Filter Excluded Rooms
         if excluded_room_names:
             excluded = [e.lower().strip() for e in excluded_room_names]
-            capable_rooms = [r for r in capable_rooms if not any(ex in r.name.lower() for ex in excluded)]
+            available_rooms = [r for r in available_rooms if not any(ex in r.name.lower() for ex in excluded)]
 
         # 3. Filter by Equipment (if requested)
         if required_equipment:
-            filtered_rooms = []
-            for room in capable_rooms:
-                if not room.equipment:
-                    continue
-                    
-                room_eq_lower = [e.lower() for e in room.equipment]
-                has_all = True
-                for req in required_equipment:
-                    if req.lower() not in room_eq_lower:
-                        has_all = False
-                        break
-                if has_all:
-                    filtered_rooms.append(room)
-            capable_rooms = filtered_rooms
-
-        available_rooms = []
-        for room in capable_rooms:
-            if BookingService.check_availability(room.id, start_time, end_time, exclude_booking_id=exclude_booking_id):
-                available_rooms.append(room)
-        
-        # Sort by capacity ascending (Best fit first)
-        available_rooms.sort(key=lambda r: r.capacity)
-        
+            required = {req.lower() for req in required_equipment}
+            available_rooms = [r for r in available_rooms if required.issubset(r.equipment_set)]
+
         # 4. Smart Filtering: Hide oversized rooms if "Good Fit" rooms are available.
-        # "Good fit" = capacity <= attendees * 3 (arbitrary heuristic, e.g. 4 people fit in 12-person room, but 50-person is too big)
+        # "Good fit" = capacity <= attendees * 4 (arbitrary heuristic, e.g. 4 people fit in 12-person room, but 50-person is too big)
         # Only apply if we have multiple options.
         if len(available_rooms) > 1 and not preferred_room_name:
              good_fits = [r for r in available_rooms if r.capacity <= (attendees * 4)]
              if good_fits:
                  # If we have good fits, only return those.
                  available_rooms = good_fits
-        
+
         return available_rooms
 
     @staticmethod
-    def validate_booking_rules(room: Room, attendees: int, start_time: datetime, end_time: datetime):
+    def smaller_room_available(start_time, end_time, attendees, max_capacity, exclude_booking_id=None) -> bool:
+        """
+        Whether an active room seating `attendees` to `max_capacity` people is free over
+        [start_time, end_time): answered by the occupancy index and the room catalog when the
+        index covers the interval, else a single EXISTS query stopping at the first such room.
+        """
+        rooms = [r for r in room_catalog.active(attendees) if r.capacity <= max_capacity]
+        free = occupancy.any_free(rooms, start_time, end_time, exclude_booking_id)
+        if free is not None:
+            return free
+
+        overlapping = select(Booking.id).where(
+            Booking.room_id == Room.id,
+            Booking.status == 'confirmed',
+            Booking.start_time < end_time,
+            Booking.end_time > start_time
+        )
+        if exclude_booking_id:
+            overlapping = overlapping.where(Booking.id != exclude_booking_id)
+        return db.session.scalar(select(exists().where(
+            Room.is_active == True,
+            Room.capacity >= attendees,
+            Room.capacity <= max_capacity,
+            ~overlapping.exists()
+        )))
+
+    @staticmethod
+    def validate_booking_rules(room: Room, attendees: int, start_time: datetime, end_time: datetime, candidates=None, exclude_booking_id=None):
         """
         Apply strict business rules.
         Rule: Single-user (or small group) cannot reserve huge room unless no choice.
+
+        `candidates`: rooms the caller already found free for this interval and attendee count
+        (find_potential_rooms without name/equipment filters), used instead of querying again.
+        `exclude_booking_id`: the booking being modified, whose current slot doesn't count as busy.
         """
         threshold = Config.SINGLE_USER_CAPACITY_THRESHOLD
         
-        # If request is small but room is huge
+        # If request is small but room is huge, it is only allowed when no smaller room is free
         if attendees <= 1 and room.capacity > threshold:
-            # Check if there was a "better" room that was available?
-            # Actually, the rule says: "unless no other suitable room exists"
-            # So we need to check if there are SMALLER rooms available.
-            
-            # Find all available rooms for this slot
-            possible_rooms = BookingService.find_potential_rooms(start_time, end_time, attendees)
-            
-            # If there is any room in possible_rooms with capacity <= threshold, we should have taken that.
-            # If the current 'room' is the only one, then it's allowed.
-            
-            better_options = [r for r in possible_rooms if r.capacity <= threshold]
-            if better_options:
-                # If the current room is not in the better options (meaning it's big), reject.
-                if room not in better_options:
-                     return False, "Optimization Violation: Smaller rooms are available for this request."
+            if candidates is not None:
+                better_option = any(r.capacity <= threshold and r.id != room.id for r in candidates)
+            else:
+                better_option = BookingService.smaller_room_available(
+                    start_time, end_time, attendees, threshold, exclude_booking_id=exclude_booking_id)
+            if better_option:
+                return False, "Optimization Violation: Smaller rooms are available for this request."
         
         return True, "OK"
 
     @staticmethod
-    def create_booking(user, room_id, start_time, end_time, title, attendees=1):
+    def create_booking(user, room_id, start_time, end_time, title, attendees=1, candidates=None):
         """
         Main entry point to book a room.
+        `candidates`: free rooms the caller already computed for this slot (see validate_booking_rules).
         """
         # 0. Working Hours
         if not BookingService.is_within_working_hours(start_time, end_time):
              raise ValueError("Booking outside of working hours.")
 
-        room = Room.query.get(room_id)
+        room = room_catalog.get(room_id)
         if not room:
             raise ValueError("Room not found.")
 
@@ -152,28 +244,146 @@ class BookingService:
         if room.capacity < attendees:
             raise ValueError(f"Room capacity error: Room holds {room.capacity}, requested {attendees}.")
 
-        # 2. Availability Check (Concurrency note: strict locking needed for high load, using optimistic check for MVP)
-        if not BookingService.check_availability(room_id, start_time, end_time):
-            raise ValueError("Room is already booked for this interval.")
-
-        # 3. Optimization Rule
-        valid, msg = BookingService.validate_booking_rules(room, attendees, start_time, end_time)
-        if not valid:
-             raise ValueError(msg)
-
-        # 4. Transaction
-        booking = Booking(
-            user_id=user.id,
-            room_id=room.id,
-            start_time=start_time,
-            end_time=end_time,
-            title=title,
-            attendees_count=attendees
-        )
-        db.session.add(booking)
-        db.session.commit()
+        with BookingService.booking_write([room.id]):
+            # 2. Availability Check, inside the write section: no concurrent booking can slip in before the commit
+            if not BookingService.check_availability(room_id, start_time, end_time, use_index=False):
+                raise BookingConflictError("Room is already booked for this interval.")
+
+            # 3. Optimization Rule
+            valid, msg = BookingService.validate_booking_rules(room, attendees, start_time, end_time, candidates=candidates)
+            if not valid:
+                 raise ValueError(msg)
+
+            # 4. Transaction
+            booking = Booking(
+                user_id=user.id,
+                room_id=room.id,
+                start_time=start_time,
+                end_time=end_time,
+                title=title,
+                attendees_count=attendees
+            )
+            db.session.add(booking)
+            db.session.commit()
+        occupancy.booking_saved(booking)
         return booking
 
+    @staticmethod
+    def create_bookings(user, items, atomic=False):
+        """
+        Books several slots in one transaction. `items`: dicts with room_id, start_time, end_time
+        and optionally title and attendees (see recurring_items for a pattern).
+
+        Each item goes through the checks of create_booking, against one snapshot of the confirmed
+        bookings of the rooms involved, loaded with a single query inside the write section and
+        extended with the items accepted so far (items of the batch cannot overlap each other).
+        Items subject to the single-user rule are checked last, so that the small rooms other
+        items of the batch take count as busy. The accepted items are inserted together, with
+        one commit.
+
+        Returns one result per item, in order: {"index", "status", "booking" or "error"}, status
+        being "created", "conflict" (slot taken) or "invalid". `atomic`: if any item fails, none
+        is created (the others are reported "aborted").
+        """
+        if len(items) > Config.BOOKING_BATCH_MAX_ITEMS:
+            raise ValueError(f"At most {Config.BOOKING_BATCH_MAX_ITEMS} bookings per batch.")
+        threshold = Config.SINGLE_USER_CAPACITY_THRESHOLD
+
+        # 0-1. Checks needing no database: working hours, room, capacity
+        results, pending = [None] * len(items), []
+        for index, item in enumerate(items):
+            room = room_catalog.get(item['room_id'])
+            attendees = item.get('attendees') or 1
+            if item['end_time'] <= item['start_time'] or not BookingService.is_within_working_hours(item['start_time'], item['end_time']):
+                error = "Booking outside of working hours."
+            elif not room:
+                error = "Room not found."
+            elif room.capacity < attendees:
+                error = f"Room capacity error: Room holds {room.capacity}, requested {attendees}."
+            else:
+                # Rooms the optimization rule may point to instead (see smaller_room_available)
+                smaller = [r for r in room_catalog.active(attendees) if r.capacity <= threshold and r.id != room.id] \
+                    if attendees <= 1 and room.capacity > threshold else []
+                pending.append((index, item, room, attendees, smaller))
+                continue
+            results[index] = {'index': index, 'status': 'invalid', 'error': error}
+        if not pending:
+            return results
+
+        room_ids = sorted({room.id for _, _, room, _, _ in pending})
+        snapshot_ids = set(room_ids).union(r.id for *_, smaller in pending for r in smaller)
+        created = []
+        with BookingService.booking_write(room_ids):
+            # 2. One snapshot of the rooms' confirmed bookings over the whole batch, inside the write section
+            snapshot = {}
+            for row in db.session.query(Booking.start_time, Booking.end_time, Booking.id, Booking.room_id).filter(
+                Booking.room_id.in_(snapshot_ids),
+                Booking.status == 'confirmed',
+                Booking.start_time < max(item['end_time'] for _, item, *_ in pending),
+                Booking.end_time > min(item['start_time'] for _, item, *_ in pending)
+            ).order_by(Booking.start_time, Booking.id):
+                snapshot.setdefault(row.room_id, SortedIntervals()).add(Interval(*row))
+
+            def busy(room_id, start, end):
+                intervals = snapshot.get(room_id)
+                return intervals is not None and next(intervals.overlapping(start, end), None) is not None
+
+            for index, item, room, attendees, smaller in sorted(pending, key=lambda p: bool(p[4])):
+                start, end = item['start_time'], item['end_time']
+                if busy(room.id, start, end):
+                    results[index] = {'index': index, 'status': 'conflict', 'error': "Room is already booked for this interval."}
+                # 3. Optimization Rule
+                elif any(not busy(r.id, start, end) for r in smaller):
+                    results[index] = {'index': index, 'status': 'invalid', 'error': "Optimization Violation: Smaller rooms are available for this request."}
+                else:
+                    created.append((index, {'user_id': user.id, 'room_id': room.id, 'start_time': start, 'end_time': end,
+                                            'title': item.get('title') or 'Meeting', 'attendees_count': attendees, 'status': 'confirmed'}))
+                    # Negative ids: not inserted yet, only needed to tell snapshot entries apart
+                    snapshot.setdefault(room.id, SortedIntervals()).add(Interval(start, end, -len(created), room.id))
+
+            if atomic and len(created) < len(items):
+                db.session.rollback()
+                for index, _ in created:
+                    results[index] = {'index': index, 'status': 'aborted', 'error': "Not created: another item of the batch failed."}
+                return results
+
+            # 4. Transaction: every accepted booking in one multi-row INSERT, one commit
+            saved = []
+            if created:
+                rows = db.session.execute(insert(Booking).returning(Booking.id, Booking.room_id, Booking.start_time),
+                                          [values for _, values in created]).all()
+                # Accepted bookings of a room never overlap: (room, start) identifies each returned row
+                ids = {(row.room_id, row.start_time): row.id for row in rows}
+                for index, values in created:
+                    booking = Booking(id=ids[(values['room_id'], values['start_time'])], **values)  # transient, for serialization
+                    results[index] = {'index': index, 'status': 'created', 'booking': booking_to_dict(booking)}
+                    saved.append(Interval(booking.start_time, booking.end_time, booking.id, booking.room_id))
+            db.session.commit()
+        if saved:
+            occupancy.bookings_saved(saved)
+        return results
+
+    @staticmethod
+    def recurring_items(room_ids, start_time, end_time, frequency='weekly', count=1, interval=1, title=None, attendees=1):
+        """
+        Items for create_bookings: the slot [start_time, end_time) repeated `count` times, every
+        `interval` days or weeks (`frequency`), in each room of `room_ids`.
+        """
+        freq = {'daily': DAILY, 'weekly': WEEKLY}.get(frequency)
+        if freq is None:
+            raise ValueError("frequency must be daily or weekly.")
+        if count < 1 or interval < 1:
+            raise ValueError("count and interval must be positive.")
+        # Checked before expanding: create_bookings would refuse the items anyway
+        if count * len(room_ids) > Config.BOOKING_BATCH_MAX_ITEMS:
+            raise ValueError(f"At most {Config.BOOKING_BATCH_MAX_ITEMS} bookings per batch.")
+        duration = end_time - start_time
+        return [
+            {'room_id': room_id, 'start_time': occurrence, 'end_time': occurrence + duration, 'title': title, 'attendees': attendees}
+            for occurrence in rrule(freq, dtstart=start_time, count=count, interval=interval)
+            for room_id in room_ids
+        ]
+
     @staticmethod
     def update_booking(booking_id, user_id, start_time=None, end_time=None, attendees=None, room_id=None):
         """
@@ -196,7 +406,7 @@ class BookingService:
         if not BookingService.is_within_working_hours(start_time, end_time):
              raise ValueError("Les nouveaux horaires sont hors des heures d'ouverture.")
 
-        target_room = Room.query.get(target_room_id)
+        target_room = room_catalog.get(target_room_id)
         if not target_room:
              raise ValueError("Salle introuvable.")
              
@@ -204,170 +414,320 @@ class BookingService:
         if target_room.capacity < attendees:
              raise ValueError(f"La salle {target_room.name} est trop petite pour {attendees} personnes.")
 
-        # 2. Availability Check (Excluding current booking)
-        if not BookingService.check_availability(target_room_id, start_time, end_time, exclude_booking_id=booking_id):
-             raise ValueError("La salle est déjà prise sur ce nouveau créneau.")
-             
-        # 3. Optimization Rule
-        valid, msg = BookingService.validate_booking_rules(target_room, attendees, start_time, end_time)
-        if not valid:
-             raise ValueError(msg)
-             
-        # Apply updates
-        booking.start_time = start_time
-        booking.end_time = end_time
-        booking.attendees_count = attendees
-        booking.room_id = target_room_id
-        
-        db.session.commit()
+        with BookingService.booking_write([booking.room_id, target_room_id]):
+            # 2. Availability Check (Excluding current booking), inside the write section
+            if not BookingService.check_availability(target_room_id, start_time, end_time, exclude_booking_id=booking_id, use_index=False):
+                 raise BookingConflictError("La salle est déjà prise sur ce nouveau créneau.")
+
+            # 3. Optimization Rule
+            valid, msg = BookingService.validate_booking_rules(target_room, attendees, start_time, end_time, exclude_booking_id=booking_id)
+            if not valid:
+                 raise ValueError(msg)
+
+            # Apply updates
+            booking.start_time = start_time
+            booking.end_time = end_time
+            booking.attendees_count = attendees
+            booking.room_id = target_room_id
+
+            db.session.commit()
+        occupancy.booking_saved(booking)
         return booking
 
     @staticmethod
-    def get_availabilities(date_str=None, min_capacity=1):
-        """
-        Return available time slots for all rooms on a specific date (default today).
-        """
-        from datetime import timedelta # Local import to avoid top-level clutter or circular deps if any
-        
+    def parse_target_date(date_str):
+        """Parse 'YYYY-MM-DD' or an ISO datetime; fall back to today."""
         if not date_str:
-            target_date = datetime.now().date()
-        else:
-            try:
-                if 'T' in date_str:
-                    target_date = datetime.fromisoformat(date_str).date()
-                else:
-                    target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except:
-                target_date = datetime.now().date()
+            return datetime.now().date()
+        try:
+            if 'T' in date_str:
+                return datetime.fromisoformat(date_str).date()
+            return datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return datetime.now().date()
 
-        # Define working hours for that day
-        start_of_day = datetime.combine(target_date, datetime.min.time()).replace(hour=Config.WORKING_HOURS_START)
-        end_of_day = datetime.combine(target_date, datetime.min.time()).replace(hour=Config.WORKING_HOURS_END)
-        
-        # Get all rooms
-        rooms = Room.query.filter(Room.capacity >= min_capacity, Room.is_active == True).all()
-        
-        results = []
-        
-        for room in rooms:
-            # Get bookings for this room on this day
-            bookings = Booking.query.filter(
-                Booking.room_id == room.id,
-                Booking.status == 'confirmed',
-                Booking.start_time >= start_of_day,
-                Booking.end_time <= end_of_day
-            ).order_by(Booking.start_time).all()
-            
-            # Calculate free slots (naive approach: find gaps)
-            free_slots = []
-            current_cursor = start_of_day
-            
-            # If now is later than start_of_day (and same day), move cursor to now (can't book in past)
-            if datetime.now().date() == target_date and datetime.now() > current_cursor:
-                 current_cursor = datetime.now()
-                 # Round up to next 15 min for cleanliness
-                 minute = current_cursor.minute
-                 if minute % 15 != 0:
-                     add_mins = 15 - (minute % 15)
-                     current_cursor += timedelta(minutes=add_mins)
-            
-            for b in bookings:
-                if b.start_time > current_cursor:
-                    # Found a gap
-                    free_slots.append({
-                        "start": current_cursor.strftime("%H:%M"),
-                        "end": b.start_time.strftime("%H:%M")
-                    })
-                current_cursor = max(current_cursor, b.end_time)
-            
-            # Final gap
-            if current_cursor < end_of_day:
+    @staticmethod
+    def _free_slots(window_start, window_end, bookings):
+        """Gaps inside [window_start, window_end) left by `bookings` (sorted by start_time)."""
+        free_slots = []
+        current_cursor = window_start
+        for b in bookings:
+            if b.start_time > current_cursor:
                 free_slots.append({
                     "start": current_cursor.strftime("%H:%M"),
-                    "end": end_of_day.strftime("%H:%M")
+                    "end": min(b.start_time, window_end).strftime("%H:%M")
                 })
-            
-            if free_slots:
-                results.append({
-                    "room_name": room.name,
-                    "capacity": room.capacity,
-                    "slots": free_slots
-                })
-                
-                
-        return results
+            current_cursor = max(current_cursor, b.end_time)
+            if current_cursor >= window_end:
+                break
+
+        # Final gap
+        if current_cursor < window_end:
+            free_slots.append({
+                "start": current_cursor.strftime("%H:%M"),
+                "end": window_end.strftime("%H:%M")
+            })
+        return free_slots
 
     @staticmethod
-    def get_user_bookings(user_id):
-        """Get upcoming confirmed bookings for a user and auto-delete expired ones."""
-        # 1. Auto-delete expired bookings
-        expired_bookings = Booking.query.filter(
+    def bookings_by_room(room_ids, range_start, range_end):
+        """
+        {room_id: [bookings sorted by start_time]} of the confirmed bookings of `room_ids`
+        overlapping [range_start, range_end), each with start_time and end_time: from the
+        occupancy index when it covers the range, else a single ordered query.
+        """
+        bookings_by_room = occupancy.bookings(room_ids, range_start, range_end)
+        if bookings_by_room is None:
+            rows = db.session.query(Booking.room_id, Booking.start_time, Booking.end_time).filter(
+                Booking.room_id.in_(room_ids),
+                Booking.status == 'confirmed',
+                Booking.start_time < range_end,
+                Booking.end_time > range_start
+            ).order_by(Booking.room_id, Booking.start_time).all()
+
+            bookings_by_room = {}
+            for row in rows:
+                bookings_by_room.setdefault(row.room_id, []).append(row)
+        return bookings_by_room
+
+    @staticmethod
+    def get_availabilities(date_str=None, min_capacity=1, days=1):
+        """
+        Return available time slots for all rooms on a specific date (default today),
+        or on `days` consecutive days starting at that date.
+        Costs a single query whatever the number of rooms/days: rooms come from the catalog,
+        every confirmed booking of the range is fetched in one ordered pass (grouped by room).
+        No query at all when the occupancy index covers the range.
+        """
+        target_date = BookingService.parse_target_date(date_str)
+        return list(BookingService.iter_availabilities(target_date, target_date + timedelta(days=max(days, 1) - 1), min_capacity))
+
+    @staticmethod
+    def iter_availabilities(from_date, to_date, min_capacity=1, equipment=None, room_ids=None, chunk_size=None):
+        """
+        Free slots of each active room fitting `min_capacity` (with `equipment`, among `room_ids`
+        if given) from `from_date` to `to_date` included, inside working hours, weekends left out
+        if AVAILABILITY_SKIP_WEEKENDS. Yields one item per room and day having free slots, room
+        by room: {"room_id", "room_name", "capacity", "date", "slots"}.
+
+        Rooms are processed `chunk_size` at a time (None: all at once), one bookings lookup per
+        chunk, so that a caller streaming the items can send the first ones early.
+        """
+        # Working hours window of each day
+        windows = []
+        now = datetime.now()
+        day = from_date
+        while day <= to_date:
+            if Config.AVAILABILITY_SKIP_WEEKENDS and day.weekday() >= 5:
+                day += timedelta(days=1)
+                continue
+            start_of_day = datetime.combine(day, datetime.min.time()).replace(hour=Config.WORKING_HOURS_START)
+            end_of_day = datetime.combine(day, datetime.min.time()).replace(hour=Config.WORKING_HOURS_END)
+
+            # If now is later than start_of_day (and same day), move cursor to now (can't book in past)
+            if now.date() == day and now > start_of_day:
+                start_of_day = now
+                # Round up to next 15 min for cleanliness
+                minute = start_of_day.minute
+                if minute % 15 != 0:
+                    start_of_day += timedelta(minutes=15 - (minute % 15))
+                start_of_day = start_of_day.replace(second=0, microsecond=0)
+            windows.append((day, start_of_day, end_of_day))
+            day += timedelta(days=1)
+
+        rooms = room_catalog.active(min_capacity)
+        if equipment:
+            required = {e.lower() for e in equipment}
+            rooms = [r for r in rooms if required.issubset(r.equipment_set)]
+        if room_ids is not None:
+            wanted = set(room_ids)
+            rooms = [r for r in rooms if r.id in wanted]
+        if not rooms or not windows:
+            return
+
+        range_start = datetime.combine(windows[0][0], datetime.min.time())
+        range_end = datetime.combine(windows[-1][0] + timedelta(days=1), datetime.min.time())
+        chunk_size = chunk_size or len(rooms)
+        for offset in range(0, len(rooms), chunk_size):
+            chunk = rooms[offset:offset + chunk_size]
+            # All confirmed bookings of the chunk over the range, each room's sorted by start time
+            bookings_by_room = BookingService.bookings_by_room([room.id for room in chunk], range_start, range_end)
+
+            for room in chunk:
+                room_bookings = bookings_by_room.get(room.id, [])
+                cursor = 0
+                for day, start_of_day, end_of_day in windows:
+                    # Bookings are sorted: skip the ones finished before this day's window
+                    while cursor < len(room_bookings) and room_bookings[cursor].end_time <= start_of_day:
+                        cursor += 1
+                    day_bookings = []
+                    i = cursor
+                    while i < len(room_bookings) and room_bookings[i].start_time < end_of_day:
+                        day_bookings.append(room_bookings[i])
+                        i += 1
+
+                    free_slots = BookingService._free_slots(start_of_day, end_of_day, day_bookings) if start_of_day < end_of_day else []
+                    if free_slots:
+                        yield {
+                            "room_id": room.id,
+                            "room_name": room.name,
+                            "capacity": room.capacity,
+                            "date": day.isoformat(),
+                            "slots": free_slots
+                        }
+
+    @staticmethod
+    def get_user_bookings(user_id, with_room=False):
+        """
+        Upcoming confirmed bookings of a user (read only: expired ones are archived by the
+        retention job). `with_room` loads Booking.room in the same query, for callers using it.
+        """
+        query = Booking.query.filter(
             Booking.user_id == user_id,
             Booking.status == 'confirmed',
-            Booking.end_time < datetime.now()
+            Booking.end_time > datetime.now()
+        )
+        if with_room:
+            query = query.options(joinedload(Booking.room))
+        return query.order_by(Booking.start_time).all()
+
+    @staticmethod
+    def get_user_booking_rows(user_id):
+        """Same bookings as get_user_bookings, as row tuples of booking_columns() (listings)."""
+        return db.session.execute(
+            select(*booking_columns()).where(
+                Booking.user_id == user_id,
+                Booking.status == 'confirmed',
+                Booking.end_time > datetime.now()
+            ).order_by(Booking.start_time)
         ).all()
-        
-        if expired_bookings:
-            for b in expired_bookings:
-                db.session.delete(b)
+
+    @staticmethod
+    def archive_bookings(now=None, batch_size=None, max_batches=None):
+        """
+        Retention job: moves expired and cancelled bookings to booking_archives, by batches
+        of BOOKING_RETENTION_BATCH_SIZE, each in its own short transaction (copy, unlink the
+        calendar events pointing to them, delete). Stops after BOOKING_RETENTION_MAX_BATCHES;
+        what is left goes with the next run. Archived rows older than BOOKING_ARCHIVE_MAX_AGE_DAYS
+        are purged. Returns the rows processed.
+        """
+        config = current_app.config
+        now = now or datetime.now()
+        batch_size = batch_size or config.get('BOOKING_RETENTION_BATCH_SIZE', 500)
+        max_batches = max_batches or config.get('BOOKING_RETENTION_MAX_BATCHES', 20)
+        started = time.perf_counter()
+
+        archivable = or_(Booking.status == 'cancelled', Booking.end_time <= now)
+        columns = ['user_id', 'room_id', 'start_time', 'end_time', 'title', 'attendees_count', 'status', 'created_at']
+        archived = batches = 0
+        while batches < max_batches:
+            ids = db.session.scalars(select(Booking.id).where(archivable).order_by(Booking.id).limit(batch_size)).all()
+            if not ids:
+                break
+            db.session.execute(insert(BookingArchive).from_select(
+                ['booking_id'] + columns + ['archived_at'],
+                select(Booking.id, *[getattr(Booking, c) for c in columns], literal(datetime.utcnow(), DateTime)).where(Booking.id.in_(ids))
+            ))
+            db.session.execute(update(Event).where(Event.booking_id.in_(ids)).values(booking_id=None))
+            db.session.execute(delete(Booking).where(Booking.id.in_(ids)))
             db.session.commit()
+            archived += len(ids)
+            batches += 1
 
-        # 2. Return valid upcoming bookings
-        return Booking.query.filter(
-            Booking.user_id == user_id,
-            Booking.status == 'confirmed',
-            Booking.end_time > datetime.now()
-        ).order_by(Booking.start_time).all()
+        purged = 0
+        max_age = config.get('BOOKING_ARCHIVE_MAX_AGE_DAYS')
+        if max_age is not None:
+            purged = db.session.execute(
+                delete(BookingArchive).where(BookingArchive.archived_at < datetime.utcnow() - timedelta(days=max_age))
+            ).rowcount
+            db.session.commit()
+
+        return {
+            'archived': archived,
+            'batches': batches,
+            'purged': purged,
+            'complete': batches < max_batches,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
 
     @staticmethod
     def cancel_booking(booking_id, user_id):
         """Cancel a specific booking if it belongs to user."""
-        booking = Booking.query.get(booking_id)
+        booking = db.session.get(Booking, booking_id)
         if not booking:
             return False, "Booking not found."
         
         if booking.user_id != user_id:
             return False, "Unauthorized."
-            
-        # Update associated events
-        for event in booking.event:
-            event.booking_id = None
-            event.location = ""
-            
-        booking.status = 'cancelled'
-        db.session.commit()
+
+        BookingService._cancel_where([Booking.id == booking_id])
+        occupancy.bookings_removed([booking_id])
         return True, "Booking cancelled successfully."
 
     @staticmethod
-    def cancel_all_bookings(user_id):
-        """Cancel all future confirmed bookings for a user."""
-        bookings = Booking.query.filter(
-            Booking.user_id == user_id,
-            Booking.status == 'confirmed',
-            Booking.start_time >= datetime.now()
-        ).all()
-        
-        if not bookings:
-            return False, "Aucune réservation à annuler."
-            
-        count = 0
-        for b in bookings:
-            # Update associated events
-            for event in b.event:
-                event.booking_id = None
-                event.location = ""
-            
-            b.status = 'cancelled'
-            count += 1
-            
-        db.session.commit()
-        return True, f"{count} réservations annulées."
+    def cancel_bookings(user_id, booking_ids=None, start=None, end=None):
+        """
+        Cancels a user's bookings in one transaction, with two set-based UPDATEs whatever their
+        number: the linked calendar events are unlinked (booking_id and location cleared), then
+        the bookings are marked cancelled. Returns the number of bookings cancelled.
+
+        Selection: the ids in `booking_ids` if given (other users' ids are ignored), else the
+        bookings starting from `start` (default now); both restricted to those starting before
+        `end` if given.
+        """
+        conditions = [Booking.user_id == user_id, Booking.status == 'confirmed']
+        if booking_ids is not None:
+            conditions.append(Booking.id.in_(booking_ids))
+            if start:
+                conditions.append(Booking.start_time >= start)
+        else:
+            conditions.append(Booking.start_time >= (start or datetime.now()))
+        if end:
+            conditions.append(Booking.start_time < end)
+
+        count = BookingService._cancel_where(conditions)
+        if count and booking_ids is not None and count == len(set(booking_ids)):
+            occupancy.bookings_removed(set(booking_ids))
+        elif count:
+            occupancy.invalidate()  # which ones is unknown: reloaded
+        return count
+
+    @staticmethod
+    def _cancel_where(conditions):
+        """Unlinks the events of, then cancels, the bookings matching `conditions`; returns how many."""
+        try:
+            db.session.execute(
+                update(Event)
+                .where(Event.booking_id.in_(select(Booking.id).where(*conditions)))
+                .values(booking_id=None, location=""),
+                execution_options={'synchronize_session': False}
+            )
+            count = db.session.execute(
+                update(Booking).where(*conditions).values(status='cancelled'),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
+
+    @staticmethod
+    def cancel_all_bookings(user_id, booking_ids=None, start=None, end=None):
+        """Cancel all future confirmed bookings for a user (or the ones selected, see cancel_bookings)."""
+        count = BookingService.cancel_bookings(user_id, booking_ids=booking_ids, start=start, end=end)
+        if not count:
+            return False, "Aucune réservation à annuler.", 0
+        return True, f"{count} réservations annulées.", count
 
     @staticmethod
-    def get_last_created_booking(user_id):
+    def get_last_created_booking(user_id, with_room=False):
         """Get the most recently created confirmed booking for a user."""
-        return Booking.query.filter(
+        query = Booking.query.filter(
             Booking.user_id == user_id,
             Booking.status == 'confirmed',
             Booking.end_time > datetime.now()
-        ).order_by(Booking.created_at.desc()).first()
+        )
+        if with_room:
+            query = query.options(joinedload(Booking.room))
+        return query.order_by(Booking.created_at.desc()).first()
@@ -1,111 +1,326 @@
+import hashlib
+import json
+import threading
+import time
 import requests
-from icalendar import Calendar
+from collections import defaultdict
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import pytz
+from flask import current_app
+from sqlalchemy import insert, update, delete, select
 from app.extensions import db
 from app.models.event import Event
+from app.models.booking import Booking
+from app.models.calendar_sync_state import CalendarSyncState
+from app.services.ics_stream import ICSStreamParser
+from app.services.recurrence import RecurrenceExpander, event_times
+from app.utils.serialization import event_listing_columns, event_to_dict
+
+ICS_CHUNK_SIZE = 64 * 1024
 
 class CalendarService:
+    # One semaphore per calendar host, so a single provider is never hit by more
+    # than CALENDAR_SYNC_PER_HOST concurrent fetches from this process.
+    _host_limits = {}
+    _host_limits_lock = threading.Lock()
+
+    @classmethod
+    def _host_semaphore(cls, url):
+        host = (urlparse(url).hostname or '').lower()
+        with cls._host_limits_lock:
+            semaphore = cls._host_limits.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(current_app.config.get('CALENDAR_SYNC_PER_HOST', 2))
+                cls._host_limits[host] = semaphore
+            return semaphore
+
+    @staticmethod
+    def sync_due_users(now=None):
+        """
+        Background job: refreshes every feed whose next_sync_at is reached (or never synced).
+        Feeds are fetched by a small thread pool, each worker in its own app context.
+        Returns a summary dict for the scheduler stats.
+        """
+        from app.models.user import User
+
+        now = now or datetime.utcnow()
+        user_ids = [
+            row.id for row in db.session.query(User.id)
+            .outerjoin(CalendarSyncState, CalendarSyncState.user_id == User.id)
+            .filter(User.ics_url.isnot(None), User.ics_url != '')
+            .filter(db.or_(CalendarSyncState.next_sync_at.is_(None), CalendarSyncState.next_sync_at <= now))
+            .all()
+        ]
+        if not user_ids:
+            return {'due': 0, 'ok': 0, 'failed': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+
+        app = current_app._get_current_object()
+
+        def sync_one(user_id):
+            with app.app_context():
+                user = db.session.get(User, user_id)
+                if not user or not user.ics_url:
+                    return True
+                with CalendarService._host_semaphore(user.ics_url):
+                    return CalendarService.sync_user_events(user)
+
+        workers = min(app.config.get('CALENDAR_SYNC_WORKERS', 4), len(user_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ics-sync') as pool:
+            results = list(pool.map(sync_one, user_ids))
+
+        ok = sum(1 for r in results if r)
+        summary = {'due': len(user_ids), 'ok': ok, 'failed': len(user_ids) - ok}
+        for key in ('inserted', 'updated', 'unchanged', 'deleted'):
+            summary[key] = sum(r.get(key, 0) for r in results if isinstance(r, dict))
+        return summary
+
+    @staticmethod
+    def get_sync_state(user, create=False):
+        state = db.session.get(CalendarSyncState, user.id)
+        if state is None and create:
+            state = CalendarSyncState(user_id=user.id)
+            db.session.add(state)
+        if state is not None and state.url != user.ics_url:
+            # New feed: the stored validators no longer apply
+            state.url = user.ics_url
+            state.etag = None
+            state.last_modified = None
+        return state
+
+    @staticmethod
+    def request_sync(user):
+        """Marks the user's feed as due; the background sync job picks it up on its next tick."""
+        state = CalendarService.get_sync_state(user, create=True)
+        state.next_sync_at = datetime.utcnow()
+        db.session.commit()
+
     @staticmethod
     def sync_user_events(user):
         """
         Fetches events from the user's ICS URL and updates the database.
-        Returns the list of stored/updated Event objects (optional).
+        The request is conditional (ETag / Last-Modified from the previous fetch):
+        an unchanged feed answers 304 and is not downloaded nor parsed again.
+        Returns a summary dict (status, inserted/updated/unchanged/deleted counts, duration_ms)
+        on success, False on error.
         """
         if not user.ics_url:
             return []
 
+        started = time.perf_counter()
+        state = CalendarService.get_sync_state(user, create=True)
+        headers = {}
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+        interval = current_app.config.get('CALENDAR_SYNC_INTERVAL', 900)
+        state.next_sync_at = datetime.utcnow() + timedelta(seconds=interval)
+
         try:
-            response = requests.get(user.ics_url, timeout=10)
-            response.raise_for_status()
-            
-            cal = Calendar.from_ical(response.content)
-            events = []
-            
-            now = datetime.now(pytz.utc)
-            
-            for component in cal.walk():
-                if component.name == "VEVENT":
-                    summary = str(component.get('summary', ''))
-                    location = str(component.get('location', ''))
-                    start_dt = component.get('dtstart').dt
-                    end_dt = component.get('dtend').dt if component.get('dtend') else None
-
-                    # Handle all-day events (date objects) vs datetime objects
-                    if not isinstance(start_dt, datetime):
-                        # Convert date to datetime at midnight
-                        start_dt = datetime.combine(start_dt, datetime.min.time())
-                        start_dt = pytz.utc.localize(start_dt)
-                    elif start_dt.tzinfo is None:
-                        # Assume UTC if naive, or maybe better to assume configurable server time
-                        # But for now, let's localize to UTC
-                        start_dt = pytz.utc.localize(start_dt)
-                        
-                    if end_dt:
-                        if not isinstance(end_dt, datetime):
-                             end_dt = datetime.combine(end_dt, datetime.min.time())
-                             end_dt = pytz.utc.localize(end_dt)
-                        elif end_dt.tzinfo is None:
-                             end_dt = pytz.utc.localize(end_dt)
-                    else:
-                        # Default 1 hour duration if no end time
-                        end_dt = start_dt + timedelta(hours=1)
-
-                    # Filter past events? Maybe only keep recent past and future.
-                    # Let's keep all for now, or maybe last 30 days + future.
-                    # User request: "Detect meetings without assigned rooms". 
-                    # Probably implies future meetings.
-                    # Let's filter to start > now - 24 hours to be safe/relevant.
-                    # Actually, if we want to show "My Calendar", user might want to see history. 
-                    # But for "AI Agent", future is more important.
-                    # Filter past events: Only keep events that end in the future
-                    if end_dt < now:
-                        continue
-                        
-                    # We'll just parse all future/ongoing events.
-                    
-                    needs_room = False
-                    if not location or location.strip() == "":
-                        needs_room = True
-
-                    # Calculate attendee count
-                    attendee_count = 0
-                    attendees = component.get('attendee')
-                    if attendees:
-                        if isinstance(attendees, list):
-                            attendee_count = len(attendees)
+            # Streamed: the body is parsed event by event, never held in memory as a whole
+            response = requests.get(user.ics_url, headers=headers, stream=True,
+                                    timeout=current_app.config.get('CALENDAR_FETCH_TIMEOUT', 10))
+            with closing(response):
+                now = datetime.now(pytz.utc)
+                if response.status_code == 304:
+                    # Same feed, but the recurrence horizon may have slid: only extend it
+                    masters, overrides = CalendarService._stored_recurrences(state)
+                    incoming = {}
+                    kept = CalendarService._expand_recurrences(state, masters, overrides, now, incoming)
+                    counts = CalendarService._apply_events(user, incoming, now, kept_masters=kept, delete_missing=False)
+                    counts['status'] = 'not_modified'
+                else:
+                    response.raise_for_status()
+
+                    # Date-only pre-filter with a day of margin; _event_values applies the exact one
+                    parser = ICSStreamParser(
+                        response.iter_lines(chunk_size=ICS_CHUNK_SIZE),
+                        skip_ended_before=now - timedelta(days=1)
+                    )
+                    incoming, masters, overrides = {}, {}, defaultdict(list)
+                    for component in parser.events():
+                        uid = str(component.get('uid'))
+                        if RecurrenceExpander.is_override(component):
+                            overrides[uid].append(component)
+                        elif RecurrenceExpander.is_recurring(component):
+                            masters[uid] = component
                         else:
-                            attendee_count = 1
-
-                        
-                    existing_event = Event.query.filter_by(uid=str(component.get('uid')), user_id=user.id).first()
-                    
-                    if existing_event:
-                         existing_event.summary = summary
-                         existing_event.start_time = start_dt
-                         existing_event.end_time = end_dt
-                         existing_event.location = location
-                         existing_event.attendee_count = attendee_count
-                         existing_event.updated_at = datetime.utcnow()
-                    else:
-                        new_event = Event(
-                            uid=str(component.get('uid')),
-                            summary=summary,
-                            start_time=start_dt,
-                            end_time=end_dt,
-                            location=location,
-                            attendee_count=attendee_count,
-                            user_id=user.id
-                        )
-                        db.session.add(new_event)
-                        
+                            values = CalendarService._event_values(component, now)
+                            if values:
+                                incoming[uid] = values  # repeated uid: the last one wins
+
+                    kept = CalendarService._expand_recurrences(state, masters, overrides, now, incoming)
+                    counts = CalendarService._apply_events(user, incoming, now, kept_masters=kept)
+                    counts['status'] = 'updated'
+                    counts['skipped_past'] = parser.skipped
+                    state.etag = response.headers.get('ETag')
+                    state.last_modified = response.headers.get('Last-Modified')
+
+            state.last_synced_at = datetime.utcnow()
+            state.last_status = counts['status']
+            state.last_error = None
             db.session.commit()
-            return True
+
+            counts['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            current_app.logger.info(f"ICS sync user={user.id} {counts}")
+            return counts
 
         except Exception as e:
             print(f"Error fetching ICS: {e}")
+            db.session.rollback()
+            state = CalendarService.get_sync_state(user, create=True)
+            state.next_sync_at = datetime.utcnow() + timedelta(seconds=interval)
+            state.last_status = 'error'
+            state.last_error = str(e)[:512]
+            db.session.commit()
             return False
 
+    @staticmethod
+    def _event_values(component, now, uid=None, start_dt=None, end_dt=None):
+        """
+        Column values for one VEVENT (or one occurrence of it, with its own uid and times),
+        or None if the event is already over. Times are stored as naive UTC.
+        """
+        summary = str(component.get('summary', ''))
+        location = str(component.get('location', ''))
+        if start_dt is None:
+            start_dt, end_dt = event_times(component)
+
+        # Only keep events that end in the future: the AI agent works on upcoming meetings
+        if end_dt < now:
+            return None
+
+        # Calculate attendee count
+        attendee_count = 0
+        attendees = component.get('attendee')
+        if attendees:
+            attendee_count = len(attendees) if isinstance(attendees, list) else 1
+
+        return {
+            'uid': uid or str(component.get('uid')),
+            'summary': summary,
+            'start_time': start_dt.astimezone(pytz.utc).replace(tzinfo=None),
+            'end_time': end_dt.astimezone(pytz.utc).replace(tzinfo=None),
+            'location': location,
+            'attendee_count': attendee_count
+        }
+
+    @staticmethod
+    def _stored_recurrences(state):
+        """Masters and overrides kept from the last full sync (see _expand_recurrences)."""
+        masters, overrides = {}, defaultdict(list)
+        for uid, entry in json.loads(state.recurrences or '{}').items():
+            for component in ICSStreamParser(entry['ics'].splitlines()).events():
+                if RecurrenceExpander.is_override(component):
+                    overrides[uid].append(component)
+                else:
+                    masters[uid] = component
+        return masters, overrides
+
+    @staticmethod
+    def _expand_recurrences(state, masters, overrides, now, incoming):
+        """
+        Adds the occurrences of recurring events up to CALENDAR_RECURRENCE_HORIZON_DAYS to `incoming`.
+        A master unchanged since the last sync (same content hash) is only expanded past the
+        horizon it was already expanded to; its stored occurrences are kept as they are.
+        Returns the uids of those unchanged masters.
+        """
+        config = current_app.config
+        horizon = now + timedelta(days=config.get('CALENDAR_RECURRENCE_HORIZON_DAYS', 60))
+        max_count = config.get('CALENDAR_RECURRENCE_MAX_OCCURRENCES', 500)
+        previous = json.loads(state.recurrences or '{}')
+        entries, kept = {}, set()
+
+        for uid, master in masters.items():
+            master_overrides = overrides.pop(uid, [])
+            fingerprint = RecurrenceExpander.fingerprint(master, master_overrides)
+            entry = previous.get(uid)
+            window_start = now
+            if entry and entry['fp'] == fingerprint:
+                kept.add(uid)
+                window_start = max(now, datetime.fromisoformat(entry['until']))
+                ics = entry['ics']
+            else:
+                ics = b''.join(c.to_ical() for c in [master] + master_overrides).decode('utf-8')
+
+            for key, component, start, end in RecurrenceExpander.occurrences(master, master_overrides, window_start, horizon, max_count):
+                occurrence_uid = RecurrenceExpander.occurrence_uid(uid, key)
+                values = CalendarService._event_values(component, now, occurrence_uid, start, end)
+                if values:
+                    incoming[occurrence_uid] = values
+            entries[uid] = {'fp': fingerprint, 'until': horizon.isoformat(), 'ics': ics}
+
+        # Overrides of a master that is not in the feed: plain events
+        for uid, orphans in overrides.items():
+            for component in orphans:
+                key = RecurrenceExpander._key(component.get('recurrence-id').dt)
+                occurrence_uid = RecurrenceExpander.occurrence_uid(uid, key)
+                values = CalendarService._event_values(component, now, occurrence_uid)
+                if values:
+                    incoming[occurrence_uid] = values
+
+        state.recurrences = json.dumps(entries) if entries else None
+        return kept
+
+    @staticmethod
+    def _fingerprint(values):
+        """Content hash of the synced fields, same result for a stored row and a parsed VEVENT."""
+        parts = (
+            values['summary'] or '',
+            values['start_time'].isoformat(),
+            values['end_time'].isoformat(),
+            values['location'] or '',
+            str(values['attendee_count'] or 0)
+        )
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _apply_events(user, incoming, now, kept_masters=(), delete_missing=True):
+        """
+        Upserts the parsed events of one feed (uid -> values) in bulk.
+        The user's stored events are loaded once into a uid map; unchanged events are
+        skipped, changed ones updated, new ones inserted, and upcoming events missing
+        from the feed deleted (except occurrences of `kept_masters`). Does not commit.
+        """
+        existing = {
+            row.uid: row for row in db.session.query(
+                Event.id, Event.uid, Event.summary, Event.start_time, Event.end_time,
+                Event.location, Event.attendee_count
+            ).filter(Event.user_id == user.id)
+        }
+
+        stamp = datetime.utcnow()
+        inserts, updates, unchanged = [], [], 0
+        for uid, values in incoming.items():
+            row = existing.get(uid)
+            if row is None:
+                inserts.append(dict(values, user_id=user.id, created_at=stamp, updated_at=stamp))
+            elif CalendarService._fingerprint(row._asdict()) == CalendarService._fingerprint(values):
+                unchanged += 1
+            else:
+                updates.append(dict(values, id=row.id, updated_at=stamp))
+
+        # Past events are not part of the parsed window: only upcoming ones can have vanished
+        cutoff = now.astimezone(pytz.utc).replace(tzinfo=None)
+        vanished = [
+            row.id for uid, row in existing.items()
+            if uid not in incoming and row.end_time >= cutoff
+            and RecurrenceExpander.master_uid(uid) not in kept_masters
+        ] if delete_missing else []
+
+        if inserts:
+            db.session.execute(insert(Event), inserts)
+        if updates:
+            db.session.execute(update(Event), updates)
+        for i in range(0, len(vanished), 500):
+            db.session.execute(delete(Event).where(Event.id.in_(vanished[i:i + 500])))
+
+        return {'inserted': len(inserts), 'updated': len(updates), 'unchanged': unchanged, 'deleted': len(vanished)}
+
     @staticmethod
     def get_stored_events(user):
         """
@@ -124,30 +339,14 @@ class CalendarService:
         # Logic was: "if end_dt < now: continue"
         # So we want events where end_time >= now
         
-        events = Event.query.filter(Event.user_id == user.id, Event.end_time >= now).order_by(Event.start_time).all()
-        
-        results = []
-        for event in events:
-            # Replicate 'needs_room' logic
-            needs_room = False
-            location = event.location
-            
-            if event.booking:
-                 location = event.booking.room.name if event.booking.room else f"Room {event.booking.room_id}"
-                 needs_room = False
-            elif not location or location.strip() == "":
-                needs_room = True
-                
-            results.append({
-                'summary': event.summary,
-                'start': event.start_time.isoformat(),
-                'end': event.end_time.isoformat(),
-                'location': location,
-                'needs_room': needs_room,
-                'attendee_count': event.attendee_count
-            })
-            
-        return results
+        # One query: the room of linked bookings comes from an outer join, its name from the catalog
+        rows = db.session.execute(
+            select(*event_listing_columns())
+            .outerjoin(Booking, Booking.id == Event.booking_id)
+            .where(Event.user_id == user.id, Event.end_time >= now)
+            .order_by(Event.start_time)
+        ).all()
+        return [event_to_dict(row) for row in rows]
 
 
     @staticmethod
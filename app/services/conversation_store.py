@@ -0,0 +1,199 @@
+import json
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def new_context():
+    return {'messages': [], 'slots': {}, 'intent': None}
+
+
+class ConversationStore(ABC):
+    """
+    Interface of the chat context storage.
+    A context is a JSON-serializable dict: {'messages': [...], 'slots': {...}, 'intent': ..., ...}.
+    """
+
+    @abstractmethod
+    def load(self, user_id) -> dict:
+        """Return the user's context (a fresh one if missing or expired). Mutate it, then `save` it."""
+
+    @abstractmethod
+    def save(self, user_id, context: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, user_id):
+        ...
+
+    @abstractmethod
+    def metrics(self) -> dict:
+        ...
+
+
+class MemoryConversationStore(ConversationStore):
+    """Process-local LRU + TTL store. Only consistent with a single worker process."""
+
+    def __init__(self, max_entries=1000, ttl_seconds=7200):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # user_id -> (payload, expires_at); payload is the JSON text
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions_lru': 0, 'evictions_ttl': 0}
+
+    def load(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] < time.monotonic():
+                del self._entries[user_id]
+                self._stats['evictions_ttl'] += 1
+                entry = None
+            if not entry:
+                self._stats['misses'] += 1
+                return new_context()
+            self._entries.move_to_end(user_id)
+            self._stats['hits'] += 1
+            # Stored serialized: callers get their own copy, like with the shared backend
+            return json.loads(entry[0])
+
+    def save(self, user_id, context):
+        payload = json.dumps(context)
+        with self._lock:
+            self._entries[user_id] = (payload, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions_lru'] += 1
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats, backend='memory', entries=len(self._entries),
+                        bytes=sum(len(payload) for payload, _ in self._entries.values()))
+
+
+class SQLConversationStore(ConversationStore):
+    """
+    Store backed by the `conversations` table, shared by every worker process.
+    Writes go through their own short transaction, independent of the request's session.
+    """
+
+    PURGE_INTERVAL = 60  # seconds between two expired-rows sweeps (per process)
+    UPSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}  # INSERT ... ON CONFLICT DO UPDATE
+
+    def __init__(self, ttl_seconds=7200):
+        self.ttl_seconds = ttl_seconds
+        self._last_purge = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions_ttl': 0}
+
+    @property
+    def _table(self):
+        from app.models import Conversation
+        return Conversation.__table__
+
+    def _cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    def load(self, user_id):
+        from app.extensions import db
+        table = self._table
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                table.select().where(table.c.user_id == user_id)
+            ).first()
+        if row is None or row.updated_at < self._cutoff():
+            if row is not None:
+                self.delete(user_id)
+                self._stats['evictions_ttl'] += 1
+            self._stats['misses'] += 1
+            return new_context()
+        self._stats['hits'] += 1
+        return json.loads(row.data)
+
+    def save(self, user_id, context):
+        from app.extensions import db
+        table = self._table
+        values = {'data': json.dumps(context), 'updated_at': datetime.utcnow()}
+        with db.engine.begin() as conn:
+            upsert = self.UPSERTS.get(conn.dialect.name)
+            if upsert is not None:
+                # One statement: two workers saving a new user's first context cannot both insert
+                conn.execute(upsert(table).values(user_id=user_id, **values)
+                             .on_conflict_do_update(index_elements=[table.c.user_id], set_=values))
+            else:
+                updated = conn.execute(table.update().where(table.c.user_id == user_id).values(**values))
+                if updated.rowcount == 0:
+                    conn.execute(table.insert().values(user_id=user_id, **values))
+        self._purge_expired()
+
+    def delete(self, user_id):
+        from app.extensions import db
+        table = self._table
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.user_id == user_id))
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        from app.extensions import db
+        table = self._table
+        with db.engine.begin() as conn:
+            purged = conn.execute(table.delete().where(table.c.updated_at < self._cutoff()))
+        self._stats['evictions_ttl'] += purged.rowcount
+
+    def metrics(self):
+        from app.extensions import db
+        table = self._table
+        with db.engine.connect() as conn:
+            entries, size = conn.execute(
+                table.select().with_only_columns(func.count(), func.coalesce(func.sum(func.length(table.c.data)), 0))
+            ).one()
+        return dict(self._stats, backend='sql', entries=entries, bytes=size)
+
+
+class Conversations:
+    """Flask extension giving access to the configured ConversationStore backend."""
+
+    BACKENDS = {
+        'memory': lambda config: MemoryConversationStore(
+            max_entries=config.get('CHAT_CONTEXT_MAX_ENTRIES', 1000),
+            ttl_seconds=config.get('CHAT_CONTEXT_TTL', 7200)
+        ),
+        'sql': lambda config: SQLConversationStore(ttl_seconds=config.get('CHAT_CONTEXT_TTL', 7200)),
+    }
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CHAT_CONTEXT_BACKEND', 'memory')
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown CHAT_CONTEXT_BACKEND '{backend}'.")
+        app.extensions['conversation_store'] = self.BACKENDS[backend](app.config)
+
+    @property
+    def store(self) -> ConversationStore:
+        return current_app.extensions['conversation_store']
+
+    def load(self, user_id):
+        return self.store.load(user_id)
+
+    def save(self, user_id, context):
+        self.store.save(user_id, context)
+
+    def delete(self, user_id):
+        self.store.delete(user_id)
+
+    def metrics(self):
+        return self.store.metrics()
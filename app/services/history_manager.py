@@ -0,0 +1,94 @@
+import json
+import threading
+
+
+class HistoryManager:
+    """
+    Token-budgeted windowing of the chat history sent to the NLU.
+
+    The last `keep_turns` turns go verbatim; older turns are replaced by a compact summary of the
+    slot state. This is lossless for the NLU because it returns the FULL STATE of the slots at
+    every turn, so the latest state already contains everything the older messages said.
+    """
+
+    CHARS_PER_TOKEN = 4  # rough average for French/English text with the OpenAI tokenizers
+
+    _lock = threading.Lock()
+    _stats = {'calls': 0, 'prompt_tokens': 0, 'full_history_tokens': 0, 'last_prompt_tokens': 0, 'api_prompt_tokens': 0}
+
+    @staticmethod
+    def estimate_tokens(messages) -> int:
+        """Approximate token count of a message list (or a single string)."""
+        if isinstance(messages, str):
+            return max(1, len(messages) // HistoryManager.CHARS_PER_TOKEN)
+        # ~4 tokens of overhead per message for the role/separators
+        return sum(HistoryManager.estimate_tokens(m.get('content') or '') + 4 for m in messages)
+
+    @staticmethod
+    def split_turns(messages):
+        """Group messages into turns, each starting at a user message."""
+        turns = []
+        for message in messages or []:
+            if message.get('role') == 'user' or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    @staticmethod
+    def summarize(state):
+        """Compact message carrying the known slot state in place of the older turns."""
+        state = state or {}
+        summary = {'intent': state.get('intent'), 'slots': state.get('slots') or {}}
+        if state.get('last_confirmed_booking_id'):
+            summary['last_confirmed_booking_id'] = state['last_confirmed_booking_id']
+        return {
+            "role": "system",
+            "content": "Summary of the earlier conversation (known state): " + json.dumps(summary, ensure_ascii=False)
+        }
+
+    @staticmethod
+    def window(messages, state=None, budget_tokens=2000, keep_turns=3):
+        """
+        Return the messages to send: a summary of the older turns (if any) followed by
+        at most `keep_turns` recent turns, dropping the oldest of those while over `budget_tokens`.
+        """
+        turns = HistoryManager.split_turns(messages)
+        recent = turns[-keep_turns:] if keep_turns > 0 else []
+        older = turns[:len(turns) - len(recent)]
+
+        summary = [HistoryManager.summarize(state)] if older and state and (state.get('slots') or state.get('intent')) else []
+        windowed = summary + [m for turn in recent for m in turn]
+        while recent and HistoryManager.estimate_tokens(windowed) > budget_tokens:
+            recent = recent[1:]
+            if not summary and state and (state.get('slots') or state.get('intent')):
+                summary = [HistoryManager.summarize(state)]
+            windowed = summary + [m for turn in recent for m in turn]
+        return windowed
+
+    @staticmethod
+    def trim(messages, max_turns):
+        """Keep only the last `max_turns` turns of the stored history."""
+        turns = HistoryManager.split_turns(messages)
+        return [m for turn in turns[-max_turns:] for m in turn]
+
+    # --- Metrics ---
+
+    @staticmethod
+    def record(prompt_tokens, full_history_tokens, api_prompt_tokens=None):
+        """Record one NLU call: estimated prompt size sent vs. what the full history would have cost."""
+        with HistoryManager._lock:
+            stats = HistoryManager._stats
+            stats['calls'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['full_history_tokens'] += full_history_tokens
+            stats['last_prompt_tokens'] = prompt_tokens
+            if api_prompt_tokens:
+                stats['api_prompt_tokens'] += api_prompt_tokens
+
+    @staticmethod
+    def stats():
+        with HistoryManager._lock:
+            stats = dict(HistoryManager._stats)
+        stats['avg_prompt_tokens'] = round(stats['prompt_tokens'] / stats['calls'], 1) if stats['calls'] else 0
+        stats['saved_tokens'] = stats['full_history_tokens'] - stats['prompt_tokens']
+        return stats
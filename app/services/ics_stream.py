@@ -0,0 +1,102 @@
+from icalendar import Event as ICalEvent, Timezone as ICalTimezone
+
+# Properties that make a VEVENT produce occurrences after its own DTEND
+RECURRENCE_PROPERTIES = ('RRULE', 'RDATE')
+
+
+class ICSStreamParser:
+    """
+    Incremental VEVENT reader for large ICS feeds.
+
+    Consumes the body line by line (e.g. `response.iter_lines()` of a streamed
+    requests response), unfolds continuation lines and parses one VEVENT at a time,
+    so memory stays bounded by the largest single event instead of the whole calendar.
+    VTIMEZONE blocks are parsed as they come (icalendar caches them for the TZIDs
+    of the following events).
+
+    Events whose raw DTEND (or DTSTART) date is before `skip_ended_before` are
+    dropped before being parsed, unless they recur (RRULE / RDATE). The check is
+    done on the date only with a one day margin left to the caller, so it never
+    drops an event the caller would keep.
+    """
+
+    def __init__(self, lines, skip_ended_before=None):
+        self.lines = lines
+        self.cutoff = skip_ended_before.strftime('%Y%m%d') if skip_ended_before else None
+        self.parsed = 0
+        self.skipped = 0
+
+    @staticmethod
+    def unfold(lines):
+        """Yields logical content lines (RFC 5545 §3.1: a line starting with a space or tab continues the previous one)."""
+        current = None
+        for raw in lines:
+            line = raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            if line[0] in ' \t' and current is not None:
+                current += line[1:]
+                continue
+            if current is not None:
+                yield current
+            current = line
+        if current is not None:
+            yield current
+
+    @staticmethod
+    def _property_name(line):
+        end = len(line)
+        for sep in (';', ':'):
+            pos = line.find(sep)
+            if pos != -1 and pos < end:
+                end = pos
+        return line[:end].upper()
+
+    def _is_past(self, block):
+        if self.cutoff is None:
+            return False
+        values = {}
+        for line in block:
+            name = self._property_name(line)
+            if name in RECURRENCE_PROPERTIES:
+                return False
+            if name in ('DTSTART', 'DTEND', 'DURATION') and name not in values:
+                values[name] = line.rsplit(':', 1)[-1].strip()
+        if 'DTEND' in values:
+            raw = values['DTEND']
+        elif 'DTSTART' in values and 'DURATION' not in values:
+            raw = values['DTSTART']
+        else:
+            return False
+        day = raw[:8]
+        return day.isdigit() and day < self.cutoff
+
+    def events(self):
+        """Yields icalendar Event components, one at a time."""
+        block, depth, kind = None, 0, None
+        for line in self.unfold(self.lines):
+            upper = line.upper()
+            if block is None:
+                if upper in ('BEGIN:VEVENT', 'BEGIN:VTIMEZONE'):
+                    block, depth, kind = [line], 1, upper[6:]
+                continue
+
+            block.append(line)
+            if upper.startswith('BEGIN:'):
+                depth += 1
+            elif upper.startswith('END:'):
+                depth -= 1
+                if depth == 0:
+                    text = '\r\n'.join(block) + '\r\n'
+                    if kind == 'VTIMEZONE':
+                        ICalTimezone.from_ical(text)  # registers the TZID
+                    elif self._is_past(block):
+                        self.skipped += 1
+                    else:
+                        self.parsed += 1
+                        yield ICalEvent.from_ical(text)
+                    block = None
+
+    def stats(self):
+        return {'parsed': self.parsed, 'skipped': self.skipped}
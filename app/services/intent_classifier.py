@@ -0,0 +1,162 @@
+import re
+import threading
+import time
+from app.services.room_catalog import normalize_name
+
+
+class FastIntentClassifier:
+    """
+    Deterministic rule/lexicon classifier run before the LLM in NLPService.parse_intent.
+
+    It only answers messages it is sure about (greetings, room listing, cancel all/last,
+    bare numeric answers to a pending slot question) and returns None otherwise,
+    so that anything ambiguous still goes to the LLM.
+    """
+
+    MIN_CONFIDENCE = 0.9
+
+    GREETINGS = {
+        'bonjour', 'bonsoir', 'salut', 'coucou', 'hello', 'hi', 'hey', 'yo',
+        'bonjour gbook', 'salut gbook', 'hello gbook', 'bonjour a toi', 'bonjour a vous', 're bonjour', 'rebonjour',
+    }
+    ROOM_LISTING = [
+        r'^(la )?liste des salles( disponibles)?$',
+        r'^(donne|donnez|montre|montrez|affiche|affichez)[ -]?(moi)? (la liste des|les|toutes les) salles$',
+        r'^(lister|liste|lis) (les|toutes les) salles$',
+        r'^quelles (sont les )?salles (avez vous|as tu|existent|existe t il|y a t il)$',
+        r'^quelles sont (les|toutes les) salles$',
+        r'^(toutes les|les) salles$',
+    ]
+    CANCEL_VERBS = r'(annule|annuler|annulez|annules|supprime|supprimer|supprimez|efface|effacer|effacez)'
+    CANCEL_ALL = [
+        rf'^{CANCEL_VERBS} (tout|toutes|tous)$',
+        rf'^{CANCEL_VERBS} (tout|toutes|tous) (mes|les) (reservations|resas|reunions)$',
+        rf'^{CANCEL_VERBS} (toutes|tous) (mes|les) (reservations|resas|reunions)$',
+        rf'^{CANCEL_VERBS} (l ensemble de )?mes reservations$',
+    ]
+    CANCEL_LAST = [
+        rf'^{CANCEL_VERBS} (la|ma) derniere( reservation| resa)?$',
+        rf'^{CANCEL_VERBS} (ma|la) derniere (reservation|resa) (faite|effectuee)$',
+        rf'^{CANCEL_VERBS} (la|ma) (reservation|resa) precedente$',
+    ]
+
+    NUMBER_WORDS = {
+        'un': 1, 'une': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5, 'six': 6, 'sept': 7, 'huit': 8,
+        'neuf': 9, 'dix': 10, 'onze': 11, 'douze': 12, 'quinze': 15, 'vingt': 20, 'trente': 30,
+        'quarante': 40, 'quarante cinq': 45, 'cinquante': 50, 'soixante': 60,
+    }
+    PEOPLE_UNITS = r'(personnes?|pers|participants?|invites?|collegues?|pax|places?)'
+    NUMBER = r'(\d{1,3}|' + '|'.join(sorted((re.escape(w) for w in NUMBER_WORDS), key=len, reverse=True)) + ')'
+
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'fast_seconds': 0.0, 'llm_calls': 0, 'llm_seconds': 0.0, 'by_intent': {}}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = normalize_name(text).replace("'", ' ').replace('’', ' ')
+        text = re.sub(r'[^\w\s-]', ' ', text)
+        text = re.sub(r'\s*-\s*', ' ', text)
+        text = re.sub(r'\b(s il (te|vous) plait|svp|stp|merci|please)\b', ' ', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def _number(token):
+        if token.isdigit():
+            return int(token)
+        return FastIntentClassifier.NUMBER_WORDS.get(token)
+
+    @staticmethod
+    def _numeric_answer(text, state):
+        """Answer to "how many people?" / "how long?" while a booking is being collected."""
+        state = state or {}
+        if state.get('intent') != 'BOOK_INTENT':
+            return None
+        slots = dict(state.get('slots') or {})
+        cls = FastIntentClassifier
+        n = cls.NUMBER
+
+        match = re.fullmatch(rf'(on sera |nous serons |pour )?{n} {cls.PEOPLE_UNITS}', text)
+        if match:
+            slots['attendees'] = cls._number(match.group(2))
+            return 'BOOK_INTENT', slots, 0.95
+
+        match = re.fullmatch(rf'(pendant |pour |duree )?{n} ?(min|mn|minutes?)', text)
+        if match:
+            slots['duration_minutes'] = cls._number(match.group(2))
+            return 'BOOK_INTENT', slots, 0.95
+
+        match = re.fullmatch(rf'(pendant |pour |duree )?{n} ?(heures?|h) ?(\d{{2}})?', text)
+        if match:
+            minutes = cls._number(match.group(2)) * 60 + int(match.group(4) or 0)
+            # "10h" alone is more likely a start time: only read it as a duration when introduced
+            # as one, or when the start is known and the duration is the missing slot
+            explicit = bool(match.group(1))
+            pending_duration = slots.get('start_time') and not slots.get('duration_minutes')
+            if 0 < minutes <= 4 * 60 and (explicit or pending_duration):
+                slots['duration_minutes'] = minutes
+                return 'BOOK_INTENT', slots, 0.95
+            return None
+
+        match = re.fullmatch(n, text)
+        if match and slots.get('start_time'):
+            value = cls._number(match.group(1))
+            pending = [name for name in ('attendees', 'duration_minutes') if not slots.get(name)]
+            # A bare number is only unambiguous when exactly one numeric slot is still missing
+            # (and, for a duration, big enough to be minutes rather than hours)
+            if value and pending == ['attendees']:
+                slots['attendees'] = value
+                return 'BOOK_INTENT', slots, 0.9
+            if value and pending == ['duration_minutes'] and 15 <= value <= 4 * 60:
+                slots['duration_minutes'] = value
+                return 'BOOK_INTENT', slots, 0.9
+        return None
+
+    @staticmethod
+    def _match(text, state):
+        cls = FastIntentClassifier
+        # Like the LLM, return the FULL STATE: known slots + what this message changes
+        known_slots = dict((state or {}).get('slots') or {})
+        if text in cls.GREETINGS:
+            return 'GREETING', known_slots, 1.0
+        if any(re.fullmatch(p, text) for p in cls.ROOM_LISTING):
+            return 'ROOM_INFO', dict(known_slots, room_name=None), 0.95
+        if any(re.fullmatch(p, text) for p in cls.CANCEL_ALL):
+            return 'CANCEL_INTENT', dict(known_slots, scope='ALL'), 0.95
+        if any(re.fullmatch(p, text) for p in cls.CANCEL_LAST):
+            return 'CANCEL_INTENT', dict(known_slots, scope='LAST'), 0.95
+        return cls._numeric_answer(text, state)
+
+    @staticmethod
+    def classify(text: str, state: dict = None):
+        """Return (intent, slots) when confident enough, None to defer to the LLM."""
+        cls = FastIntentClassifier
+        started = time.perf_counter()
+        result = cls._match(cls.normalize(text or ''), state)
+        elapsed = time.perf_counter() - started
+
+        hit = result is not None and result[2] >= cls.MIN_CONFIDENCE
+        with cls._lock:
+            cls._stats['fast_seconds'] += elapsed
+            if hit:
+                cls._stats['hits'] += 1
+                cls._stats['by_intent'][result[0]] = cls._stats['by_intent'].get(result[0], 0) + 1
+            else:
+                cls._stats['misses'] += 1
+        return (result[0], result[1]) if hit else None
+
+    @staticmethod
+    def record_llm_call(seconds: float):
+        with FastIntentClassifier._lock:
+            FastIntentClassifier._stats['llm_calls'] += 1
+            FastIntentClassifier._stats['llm_seconds'] += seconds
+
+    @staticmethod
+    def stats():
+        with FastIntentClassifier._lock:
+            stats = dict(FastIntentClassifier._stats, by_intent=dict(FastIntentClassifier._stats['by_intent']))
+        total = stats['hits'] + stats['misses']
+        avg_llm = stats['llm_seconds'] / stats['llm_calls'] if stats['llm_calls'] else 0.0
+        stats['hit_rate'] = round(stats['hits'] / total, 3) if total else 0.0
+        # Each hit avoided one LLM round trip of average duration
+        stats['latency_saved_seconds'] = round(stats['hits'] * avg_llm - stats['fast_seconds'], 3)
+        return stats
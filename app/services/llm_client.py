@@ -0,0 +1,89 @@
+import os
+import random
+import threading
+import time
+import httpx
+import openai
+from openai import OpenAI
+from app.config import Config
+
+
+class LLMClientManager:
+    """
+    Process-wide OpenAI client sharing one keep-alive HTTP connection pool.
+
+    Fork-safe: gunicorn forks its workers after the app is imported, so a client created in the
+    master would share sockets with every worker. The client is dropped in forked children and
+    lazily rebuilt in each worker (also detected by pid, for fork paths that skip the hook).
+    """
+
+    RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+    _lock = threading.Lock()
+    _client = None
+    _pid = None
+
+    @classmethod
+    def get(cls) -> OpenAI:
+        pid = os.getpid()
+        if cls._client is None or cls._pid != pid:
+            with cls._lock:
+                if cls._client is None or cls._pid != pid:
+                    cls._client = cls._build()
+                    cls._pid = pid
+        return cls._client
+
+    @staticmethod
+    def _build() -> OpenAI:
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=Config.OPENAI_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.OPENAI_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(Config.OPENAI_TIMEOUT, connect=Config.OPENAI_CONNECT_TIMEOUT),
+        )
+        return OpenAI(
+            api_key=Config.OPENAI_API_KEY,
+            base_url=Config.OPENAI_BASE_URL or None,
+            http_client=http_client,
+            max_retries=0,  # retries are handled by call_with_retry (jittered backoff)
+        )
+
+    @classmethod
+    def reset(cls, close=True):
+        """Drop the shared client (closing its pool unless it belongs to the parent process)."""
+        with cls._lock:
+            client, cls._client, cls._pid = cls._client, None, None
+        if client is not None and close:
+            client.close()
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        # The lock may have been held by another thread at fork time
+        cls._lock = threading.Lock()
+        cls._client = None
+        cls._pid = None
+
+    @staticmethod
+    def backoff_delay(attempt: int) -> float:
+        """Exponential backoff with full jitter: uniform(0, min(max, base * 2^attempt))."""
+        return random.uniform(0, min(Config.OPENAI_RETRY_MAX_BACKOFF, Config.OPENAI_RETRY_BACKOFF * (2 ** attempt)))
+
+    @staticmethod
+    def call_with_retry(fn, max_retries=None):
+        """Run `fn()`, retrying connection errors, timeouts, 429 and 5xx with jittered backoff."""
+        max_retries = Config.OPENAI_MAX_RETRIES if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except LLMClientManager.RETRYABLE_ERRORS:
+                if attempt >= max_retries:
+                    raise
+                time.sleep(LLMClientManager.backoff_delay(attempt))
+                attempt += 1
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=LLMClientManager._after_fork_in_child)
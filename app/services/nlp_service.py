@@ -1,16 +1,34 @@
-from openai import OpenAI
 from datetime import datetime, timedelta
 import json
 import os
 from app.config import Config
+from app.services.history_manager import HistoryManager
+from app.services.intent_classifier import FastIntentClassifier
+from app.services.response_cache import ResponseCache
+from app.services.llm_client import LLMClientManager
+import time
 
 class NLPService:
+    # Responses to templated situations (greeting, missing fields...) are generated once
+    response_cache = ResponseCache(max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=Config.RESPONSE_CACHE_TTL)
+
     @staticmethod
     def get_client():
-        return OpenAI(api_key=Config.OPENAI_API_KEY)
+        # Shared per process: keeps the HTTP connections to the API alive between calls
+        return LLMClientManager.get()
 
     @staticmethod
-    def parse_intent(text: str, history: list = None):
+    def parse_intent(text: str, history: list = None, state: dict = None, fast_path: bool = True):
+        """
+        Extract intent + slots from the conversation.
+        `state` is the currently known {'intent', 'slots'}: older turns of `history` are replaced by it
+        so that the prompt stays under NLU_PROMPT_TOKEN_BUDGET.
+        Messages the local FastIntentClassifier is sure about never reach the LLM.
+        """
+        fast_result = FastIntentClassifier.classify(text, state) if fast_path else None
+        if fast_result:
+            return fast_result
+
         client = NLPService.get_client()
         
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -51,6 +69,7 @@ class NLPService:
         - start_time: ISO 8601 format (YYYY-MM-DDTHH:MM:ss). Calculate relative dates (tomorrow, next monday) based on Current Date. **IMPORTANT: If date is specified but NO time, use T00:00:00.**
         - duration_minutes: integer. Return NULL if not specified. Do NOT assume 60.
         - end_time: Calculate based on start_time + duration if not specified.
+        - end_date: for QUERY_AVAILABILITY over several days (e.g. "this week", "cette semaine", "d'ici vendredi"), last day included as YYYY-MM-DD; start_time is then the first day. Return NULL for a single day.
         - scope: for CANCEL_INTENT. Values: 'ALL' (if "all", "toutes"), 'LAST' (if "last", "dernière", "latest"), 'SINGLE' (default).
         - equipment: list of strings. Extract requested equipment (e.g. ["projector", "whiteboard", "TV"]). Empty list if none.
         - room_name: string. Identify if user requests a specific room (e.g. "Salle Alpha", "Room 1", "l'auditorium"). Return NULL if not specified. match reasonably.
@@ -80,20 +99,36 @@ class NLPService:
         
         # Prepare messages
         messages = [{"role": "system", "content": system_prompt}]
+        current_message = {"role": "user", "content": text}
+        fixed_tokens = HistoryManager.estimate_tokens(messages + [current_message])
+        full_history_tokens = fixed_tokens
         
         if history and isinstance(history, list):
-            # history is now a list of messages [{"role": "user", "content": ...}, ...]
-            messages.extend(history)
+            # history is a list of messages [{"role": "user", "content": ...}, ...]
+            # Window it: last turns verbatim, older ones summarized as the known slot state
+            full_history_tokens += HistoryManager.estimate_tokens(history)
+            messages.extend(HistoryManager.window(
+                history,
+                state=state,
+                budget_tokens=max(Config.NLU_PROMPT_TOKEN_BUDGET - fixed_tokens, 0),
+                keep_turns=Config.NLU_HISTORY_KEEP_TURNS
+            ))
         
         # Add current message
-        messages.append({"role": "user", "content": text})
+        messages.append(current_message)
+        prompt_tokens = HistoryManager.estimate_tokens(messages)
 
         try:
-            response = client.chat.completions.create(
+            started = time.perf_counter()
+            response = LLMClientManager.call_with_retry(lambda: client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 response_format={"type": "json_object"}
-            )
+            ))
+            FastIntentClassifier.record_llm_call(time.perf_counter() - started)
+            
+            usage = getattr(response, 'usage', None)
+            HistoryManager.record(prompt_tokens, full_history_tokens, getattr(usage, 'prompt_tokens', None))
             
             content = response.choices[0].message.content
             data = json.loads(content)
@@ -109,7 +144,19 @@ class NLPService:
         Protocol:
         - {"type": "delta", "content": "..."}  (Text chunks)
         - {"type": "action", "data": {...}}    (Action payload at the end)
+        Templated situations are replayed from NLPService.response_cache with the same protocol.
         """
+        cache_key = ResponseCache.key_for(situation_context)
+        if cache_key:
+            cached = NLPService.response_cache.get(cache_key)
+            if cached is not None:
+                yield from NLPService.response_cache.replay(cached)
+                if on_complete:
+                    on_complete(cached)
+                if action_data:
+                    yield json.dumps({"type": "action", "data": action_data}) + "\n"
+                return
+
         client = NLPService.get_client()
         
         system_prompt = """
@@ -134,19 +181,22 @@ class NLPService:
 
         full_response = ""
         try:
-            stream = client.chat.completions.create(
+            # Only opening the stream is retried: once chunks were sent, a retry would duplicate text
+            stream = LLMClientManager.call_with_retry(lambda: client.chat.completions.create(
                 model="gpt-4o",
                 messages=messages,
                 stream=True
-            )
+            ))
             
             for chunk in stream:
                 if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
                     content = chunk.choices[0].delta.content
                     full_response += content
                     yield json.dumps({"type": "delta", "content": content}) + "\n"
             
+            if cache_key and full_response:
+                NLPService.response_cache.put(cache_key, full_response)
+            
             if on_complete:
                 on_complete(full_response)
             
@@ -0,0 +1,285 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from heapq import merge
+from datetime import datetime, timedelta
+from flask import current_app
+from app.utils.version_signal import VersionSignal
+
+# A confirmed booking as the index holds it (same attribute names as Booking, for BookingService._free_slots)
+Interval = namedtuple('Interval', ['start_time', 'end_time', 'id', 'room_id'])
+
+
+class SortedIntervals:
+    """
+    Intervals sorted by start time. Those lasting at most LONG are found with two bisections:
+    the ones overlapping [start, end) start in [start - longest, end), `longest` being the
+    longest duration among them. It only grows until the structure is rebuilt (next reload),
+    but never past LONG. Longer intervals (bookings spanning days) are rare, kept apart and
+    always scanned, so one of them cannot widen every bisection.
+    """
+
+    LONG = timedelta(hours=12)  # longer than any booking within working hours
+
+    def __init__(self):
+        self.keys = []       # (start_time, id), sorted, of the intervals up to LONG
+        self.items = {}      # id -> Interval, those intervals
+        self.long = {}       # id -> Interval, the longer ones
+        self.longest = timedelta(0)
+
+    def add(self, interval, presorted=False):
+        """`presorted`: the interval starts after every one added so far (bulk loading)."""
+        duration = interval.end_time - interval.start_time
+        if duration > self.LONG:
+            self.long[interval.id] = interval
+            return
+        key = (interval.start_time, interval.id)
+        if presorted:
+            self.keys.append(key)
+        else:
+            self.keys.insert(bisect_left(self.keys, key), key)
+        self.items[interval.id] = interval
+        self.longest = max(self.longest, duration)
+
+    def remove(self, booking_id):
+        interval = self.long.pop(booking_id, None)
+        if interval is not None:
+            return interval
+        interval = self.items.pop(booking_id, None)
+        if interval is not None:
+            key = (interval.start_time, booking_id)
+            i = bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+        return interval
+
+    def _overlapping_short(self, start, end):
+        keys, items = self.keys, self.items
+        i = bisect_left(keys, (start - self.longest,))
+        hi = bisect_left(keys, (end,))
+        while i < hi:
+            interval = items[keys[i][1]]
+            if interval.end_time > start:
+                yield interval
+            i += 1
+
+    def overlapping(self, start, end):
+        """Intervals overlapping [start, end), by start time."""
+        if not self.long:
+            return self._overlapping_short(start, end)
+        long = sorted((i for i in self.long.values() if i.start_time < end and i.end_time > start),
+                      key=lambda i: (i.start_time, i.id))
+        return merge(self._overlapping_short(start, end), long, key=lambda i: (i.start_time, i.id))
+
+    def __len__(self):
+        return len(self.keys) + len(self.long)
+
+
+class _OccupancyState:
+    def __init__(self, signal, check_interval, enabled):
+        self.signal = signal
+        self.check_interval = check_interval
+        self.enabled = enabled
+        self.lock = threading.Lock()         # guards the data below
+        self.reload_lock = threading.Lock()  # one reload at a time
+        self.by_room = None       # room_id -> SortedIntervals; None: not loaded
+        self.all = None           # every room's intervals, for "which rooms are busy" queries
+        self.window = (None, None)  # [from, until) covered by the index
+        self.version = None       # signal version the index matches
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+        self.loads = 0
+        self.hits = 0
+        self.fallbacks = 0
+
+
+class OccupancyIndex:
+    """
+    In-process index of confirmed bookings over the next OCCUPANCY_INDEX_DAYS days, one
+    sorted array per room (see SortedIntervals), so that overlap checks and free-gap
+    enumeration are bisections in memory instead of SQL queries.
+
+    Loaded on first use in each worker and reloaded every OCCUPANCY_INDEX_MAX_AGE seconds to
+    slide the window. BookingService applies its own writes to the index right after
+    committing and bumps a VersionSignal; other workers notice the new version (at most
+    OCCUPANCY_INDEX_CHECK_INTERVAL seconds later) and reload.
+
+    Reads return None when the index can't answer (disabled, interval outside the window,
+    reload in progress in another thread): callers then query the database. The index
+    is advisory: the check made inside BookingService.booking_write stays a SQL query, so a
+    worker with a slightly stale index can never double-book.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['occupancy'] = _OccupancyState(
+            signal=VersionSignal.for_app(app, 'occupancy'),
+            check_interval=app.config.get('OCCUPANCY_INDEX_CHECK_INTERVAL', 1.0),
+            enabled=app.config.get('OCCUPANCY_INDEX_ENABLED', True)
+        )
+
+    @staticmethod
+    def _state() -> _OccupancyState:
+        return current_app.extensions['occupancy']
+
+    def _read(self, start, end, fn):
+        """fn(by_room, all) under the lock if the index covers [start, end), else None (use the database)."""
+        state = self._state()
+        if not state.enabled:
+            return None
+        now = time.monotonic()
+        max_age = current_app.config.get('OCCUPANCY_INDEX_MAX_AGE', 3600)
+        if state.by_room is None or now - state.checked_at >= state.check_interval or now - state.loaded_at >= max_age:
+            # Only one thread reloads; the others use the database meanwhile
+            if state.reload_lock.acquire(blocking=False):
+                try:
+                    version = state.signal.read()
+                    state.checked_at = now
+                    if state.by_room is None or version != state.version or now - state.loaded_at >= max_age:
+                        self._load(state, version)
+                finally:
+                    state.reload_lock.release()
+        with state.lock:
+            window_from, window_until = state.window
+            if state.by_room is None or start < window_from or end > window_until:
+                state.fallbacks += 1
+                return None
+            state.hits += 1
+            return fn(state.by_room, state.all)
+
+    @staticmethod
+    def _load(state, version):
+        from app.extensions import db
+        from app.models import Booking
+
+        window_from = datetime.combine(datetime.now().date(), datetime.min.time())
+        window_until = window_from + timedelta(days=current_app.config.get('OCCUPANCY_INDEX_DAYS', 14))
+        rows = db.session.query(Booking.start_time, Booking.end_time, Booking.id, Booking.room_id).filter(
+            Booking.status == 'confirmed',
+            Booking.start_time < window_until,
+            Booking.end_time > window_from
+        ).order_by(Booking.start_time, Booking.id).all()
+
+        by_room, everything = {}, SortedIntervals()
+        for row in rows:
+            interval = Interval(*row)
+            # Rows come sorted: append instead of bisecting
+            by_room.setdefault(interval.room_id, SortedIntervals()).add(interval, presorted=True)
+            everything.add(interval, presorted=True)
+
+        with state.lock:
+            state.by_room, state.all = by_room, everything
+            state.window = (window_from, window_until)
+            state.version = version  # read before the query: a write made meanwhile triggers another reload
+            state.loaded_at = time.monotonic()
+            state.loads += 1
+
+    # --- Reads ---
+
+    def is_busy(self, room_id, start, end, exclude_booking_id=None):
+        """Whether a confirmed booking of the room overlaps [start, end); None if unknown."""
+        def read(by_room, _):
+            intervals = by_room.get(room_id)
+            return intervals is not None and any(i.id != exclude_booking_id for i in intervals.overlapping(start, end))
+        return self._read(start, end, read)
+
+    def any_free(self, rooms, start, end, exclude_booking_id=None):
+        """Whether one of `rooms` has no confirmed booking overlapping [start, end); None if unknown."""
+        def read(by_room, _):
+            for room in rooms:
+                intervals = by_room.get(room.id)
+                if intervals is None or all(i.id == exclude_booking_id for i in intervals.overlapping(start, end)):
+                    return True
+            return False
+        return self._read(start, end, read)
+
+    def busy_room_ids(self, start, end, exclude_booking_id=None):
+        """Ids of the rooms with a confirmed booking overlapping [start, end); None if unknown."""
+        return self._read(start, end, lambda _, everything: {
+            i.room_id for i in everything.overlapping(start, end) if i.id != exclude_booking_id})
+
+    def bookings(self, room_ids, start, end):
+        """{room_id: [Interval sorted by start]} of the bookings overlapping [start, end); None if unknown."""
+        def read(by_room, _):
+            result = {}
+            for room_id in room_ids:
+                intervals = by_room.get(room_id)
+                found = list(intervals.overlapping(start, end)) if intervals is not None else None
+                if found:
+                    result[room_id] = found
+            return result
+        return self._read(start, end, read)
+
+    def free_gaps(self, room_id, start, end):
+        """[(gap_start, gap_end)] of the room inside [start, end); None if unknown."""
+        def read(by_room, _):
+            gaps, cursor = [], start
+            intervals = by_room.get(room_id)
+            for interval in (intervals.overlapping(start, end) if intervals is not None else ()):
+                if interval.start_time > cursor:
+                    gaps.append((cursor, interval.start_time))
+                cursor = max(cursor, interval.end_time)
+            if cursor < end:
+                gaps.append((cursor, end))
+            return gaps
+        return self._read(start, end, read)
+
+    def stats(self):
+        state = self._state()
+        return {
+            'enabled': state.enabled,
+            'version': state.version,
+            'loads': state.loads,
+            'bookings': len(state.all) if state.all is not None else 0,
+            'rooms': len(state.by_room or ()),
+            'hits': state.hits,
+            'fallbacks': state.fallbacks,
+        }
+
+    # --- Writes (call after committing) ---
+
+    def _apply(self, changes):
+        state = self._state()
+        if not state.enabled:
+            return
+        with state.lock:
+            expected = state.version
+            version = state.signal.bump()
+            if state.by_room is None:
+                return
+            if expected is None or version != expected + 1:
+                # Another worker wrote since our last load: reload on next read
+                state.by_room = state.all = None
+                return
+            for booking_id, interval in changes:
+                old = state.all.remove(booking_id)
+                if old is not None:
+                    state.by_room[old.room_id].remove(booking_id)
+                if interval is not None and interval.end_time > state.window[0] and interval.start_time < state.window[1]:
+                    state.all.add(interval)
+                    state.by_room.setdefault(interval.room_id, SortedIntervals()).add(interval)
+            state.version = version
+
+    def booking_saved(self, booking):
+        """A booking was created or modified (and committed)."""
+        interval = Interval(booking.start_time, booking.end_time, booking.id, booking.room_id) if booking.status == 'confirmed' else None
+        self._apply([(booking.id, interval)])
+
+    def bookings_saved(self, intervals):
+        """Confirmed bookings were created (and committed), given as Intervals."""
+        self._apply([(interval.id, interval) for interval in intervals])
+
+    def bookings_removed(self, booking_ids):
+        """Bookings were cancelled or deleted (and committed)."""
+        self._apply([(booking_id, None) for booking_id in booking_ids])
+
+    def invalidate(self):
+        """Bookings changed in bulk: every worker (this one included) reloads on next read."""
+        state = self._state()
+        with state.lock:
+            state.signal.bump()
+            state.by_room = state.all = None
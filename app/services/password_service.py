@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordServiceBusy(Exception):
+    """Too many password hashes queued: answer 503 instead of piling up requests."""
+
+
+class LoginRateLimited(Exception):
+    """Too many login attempts for this username or address (429)."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many login attempts, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per key in the last `window` seconds (timestamps kept per key)."""
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def retry_after(self, key, limit, window, now=None):
+        """Seconds until `key` may try again, 0 if it is under its limit."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                return 0
+            return max(1, int(hits[0] + window - now + 0.999))
+
+    def hit(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if key not in self._hits and len(self._hits) >= self.max_keys:
+                # Drop the keys with the oldest last hit (bounded memory under a spray of usernames)
+                for old in sorted(self._hits, key=lambda k: self._hits[k][-1] if self._hits[k] else 0)[:self.max_keys // 10]:
+                    del self._hits[old]
+            self._hits.setdefault(key, deque()).append(now)
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
+
+
+class PasswordService:
+    """
+    Password hashing and login throttling.
+
+    Password hashing is slow on purpose, so hashes run on a small per-process thread pool
+    (PASSWORD_HASH_WORKERS) instead of every request thread at once: a login storm then
+    uses a bounded share of the CPU and the other endpoints keep responding. At most
+    PASSWORD_HASH_QUEUE_LIMIT hashes may be running or waiting; beyond that callers get
+    PasswordServiceBusy right away. PASSWORD_HASH_WORKERS = 0 hashes inline.
+
+    Login attempts are limited per client address and failed attempts per username,
+    with sliding windows checked before any database or hashing work. Limits are per process.
+    """
+
+    _lock = threading.Lock()
+    _executor = None
+    _pid = None
+    _pending = 0
+    _stats = {'verifications': 0, 'hashes': 0, 'rehashes': 0, 'rejected_busy': 0, 'rejected_rate': 0,
+              'hash_seconds': 0.0, 'wait_seconds': 0.0}
+
+    by_address = SlidingWindowLimiter()
+    failures_by_username = SlidingWindowLimiter()
+
+    # --- Hashing ---
+
+    @classmethod
+    def _get_executor(cls, workers):
+        pid = os.getpid()
+        if cls._executor is None or cls._pid != pid:
+            with cls._lock:
+                if cls._executor is None or cls._pid != pid:
+                    # Threads don't survive a fork: a pool inherited from the master is unusable
+                    cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+                    cls._pid = pid
+                    cls._pending = 0
+        return cls._executor
+
+    @classmethod
+    def _run(cls, fn, *args):
+        config = current_app.config
+        workers = config.get('PASSWORD_HASH_WORKERS', 2)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with cls._lock:
+                    cls._stats['wait_seconds'] += started - submitted
+                    cls._stats['hash_seconds'] += time.perf_counter() - started
+
+        if workers <= 0:
+            return timed()
+
+        executor = cls._get_executor(workers)
+        with cls._lock:
+            if cls._pending >= config.get('PASSWORD_HASH_QUEUE_LIMIT', 16):
+                cls._stats['rejected_busy'] += 1
+                raise PasswordServiceBusy("Password service busy, retry shortly")
+            cls._pending += 1
+        try:
+            future = executor.submit(timed)
+        except BaseException:
+            with cls._lock:
+                cls._pending -= 1
+            raise
+        future.add_done_callback(lambda _: cls._release())
+        try:
+            return future.result(timeout=config.get('PASSWORD_HASH_TIMEOUT', 10))
+        except FutureTimeout:
+            raise PasswordServiceBusy("Password service busy, retry shortly")
+
+    @classmethod
+    def _release(cls):
+        with cls._lock:
+            cls._pending -= 1
+
+    @classmethod
+    def hash_password(cls, password):
+        """Hash with PASSWORD_HASH_METHOD, on the hashing pool."""
+        method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+        result = cls._run(generate_password_hash, password, method)
+        with cls._lock:
+            cls._stats['hashes'] += 1
+        return result
+
+    @classmethod
+    def verify_password(cls, password_hash, password):
+        if not password_hash or password is None:
+            return False
+        result = cls._run(check_password_hash, password_hash, password)
+        with cls._lock:
+            cls._stats['verifications'] += 1
+        return result
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """True if the stored hash was made with other parameters than PASSWORD_HASH_METHOD."""
+        method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+        return bool(password_hash) and password_hash.split('$', 1)[0] != method
+
+    # --- Login ---
+
+    @classmethod
+    def check_login_allowed(cls, username, address):
+        """Raises LoginRateLimited before any work if the address or username is over its limit."""
+        config = current_app.config
+        window = config.get('LOGIN_RATE_WINDOW', 60)
+        retry_after = max(
+            cls.by_address.retry_after(address, config.get('LOGIN_RATE_LIMIT_PER_ADDRESS', 30), window),
+            cls.failures_by_username.retry_after((username or '').lower(), config.get('LOGIN_RATE_LIMIT_PER_USERNAME', 5), window)
+        )
+        if retry_after:
+            with cls._lock:
+                cls._stats['rejected_rate'] += 1
+            raise LoginRateLimited(retry_after)
+        cls.by_address.hit(address)
+
+    @classmethod
+    def authenticate(cls, password_hash, username, password):
+        """
+        Verifies a login against the stored hash (None if the username is unknown), counting
+        failures against the username. Returns (ok, upgraded_hash): on success, a hash made with
+        outdated parameters is recomputed (skipped, not failed, if the pool is busy) and
+        returned for the caller to store.
+        """
+        if not cls.verify_password(password_hash, password):
+            cls.failures_by_username.hit((username or '').lower())
+            return False, None
+        cls.failures_by_username.clear((username or '').lower())
+
+        if cls.needs_rehash(password_hash):
+            try:
+                upgraded = cls.hash_password(password)
+                with cls._lock:
+                    cls._stats['rehashes'] += 1
+                return True, upgraded
+            except PasswordServiceBusy:
+                pass  # next login
+        return True, None
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['pending'] = cls._pending
+        runs = stats['verifications'] + stats['hashes']
+        stats['avg_hash_ms'] = round(stats.pop('hash_seconds') * 1000 / runs, 1) if runs else None
+        stats['avg_wait_ms'] = round(stats.pop('wait_seconds') * 1000 / runs, 1) if runs else None
+        return stats
+
+    @classmethod
+    def reset(cls):
+        """Clear limiters and counters (tests)."""
+        cls.by_address.clear()
+        cls.failures_by_username.clear()
+        with cls._lock:
+            for key in cls._stats:
+                cls._stats[key] = 0.0 if key.endswith('seconds') else 0
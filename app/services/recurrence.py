@@ -0,0 +1,147 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+import pytz
+from dateutil.rrule import rrulestr, rruleset
+
+# dateutil iterates from DTSTART: these would cost millions of steps for an old event,
+# and are not meetings anyway
+UNSUPPORTED_FREQUENCIES = ('SECONDLY', 'MINUTELY')
+
+_UNTIL = re.compile(r'UNTIL=(\d{8})(T\d{6})?(Z?)', re.IGNORECASE)
+
+
+def event_times(component):
+    """
+    Timezone-aware (start, end) of a VEVENT.
+    All-day and floating times are taken as UTC; without DTEND, DURATION is used, else one hour.
+    """
+    start_dt = component.get('dtstart').dt
+    end_prop = component.get('dtend')
+    end_dt = end_prop.dt if end_prop else None
+
+    # Handle all-day events (date objects) vs datetime objects
+    if not isinstance(start_dt, datetime):
+        # Convert date to datetime at midnight
+        start_dt = pytz.utc.localize(datetime.combine(start_dt, datetime.min.time()))
+    elif start_dt.tzinfo is None:
+        # Assume UTC if naive
+        start_dt = pytz.utc.localize(start_dt)
+
+    if end_dt:
+        if not isinstance(end_dt, datetime):
+            end_dt = pytz.utc.localize(datetime.combine(end_dt, datetime.min.time()))
+        elif end_dt.tzinfo is None:
+            end_dt = pytz.utc.localize(end_dt)
+    elif component.get('duration'):
+        end_dt = start_dt + component.get('duration').dt
+    else:
+        # Default 1 hour duration if no end time
+        end_dt = start_dt + timedelta(hours=1)
+    return start_dt, end_dt
+
+
+class RecurrenceExpander:
+    """
+    Expands recurring VEVENTs (RRULE / RDATE / EXDATE, RECURRENCE-ID overrides) into
+    single occurrences, only within a window, so a daily stand-up costs one occurrence
+    per day of horizon instead of its whole history.
+
+    Occurrences are keyed by their original start in UTC (the RECURRENCE-ID), which
+    gives stable per-occurrence uids even when an override moves the meeting.
+    """
+
+    @staticmethod
+    def is_recurring(component):
+        return component.get('rrule') is not None or component.get('rdate') is not None
+
+    @staticmethod
+    def is_override(component):
+        return component.get('recurrence-id') is not None
+
+    @staticmethod
+    def occurrence_uid(uid, key):
+        return f"{uid}::{key.strftime('%Y%m%dT%H%M%SZ')}"
+
+    @staticmethod
+    def master_uid(occurrence_uid):
+        """Master uid of an expanded occurrence uid, None for a plain event uid."""
+        uid, sep, _ = occurrence_uid.rpartition('::')
+        return uid if sep else None
+
+    @staticmethod
+    def fingerprint(master, overrides=()):
+        digest = hashlib.sha1(master.to_ical())
+        for override in sorted(overrides, key=lambda c: RecurrenceExpander._key(c.get('recurrence-id').dt)):
+            digest.update(override.to_ical())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(value):
+        """Occurrence key: start instant in UTC (dates and floating times taken as UTC)."""
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        if value.tzinfo is None:
+            value = pytz.utc.localize(value)
+        return value.astimezone(pytz.utc)
+
+    @staticmethod
+    def _fix_until(rule):
+        # dateutil wants UNTIL in UTC when DTSTART is aware (always, here); date-only UNTIL means "end of that day"
+        return _UNTIL.sub(lambda m: f"UNTIL={m.group(1)}{m.group(2) or 'T235959'}Z", rule)
+
+    @staticmethod
+    def _dates(component, name):
+        prop = component.get(name)
+        if prop is None:
+            return []
+        dates = []
+        for item in prop if isinstance(prop, list) else [prop]:
+            for value in item.dts:
+                dt = value.dt[0] if isinstance(value.dt, tuple) else value.dt  # PERIOD: its start
+                dates.append(RecurrenceExpander._key(dt))
+        return dates
+
+    @staticmethod
+    def _ruleset(master, start):
+        rset = rruleset()
+        rset.rdate(start)  # DTSTART is always the first occurrence (RFC 5545)
+        rules = master.get('rrule')
+        for rule in rules if isinstance(rules, list) else ([rules] if rules is not None else []):
+            text = RecurrenceExpander._fix_until(rule.to_ical().decode())
+            if any(f'FREQ={freq}' in text.upper() for freq in UNSUPPORTED_FREQUENCIES):
+                continue
+            rset.rrule(rrulestr(text, dtstart=start))
+        for dt in RecurrenceExpander._dates(master, 'rdate'):
+            rset.rdate(dt.astimezone(start.tzinfo))
+        for dt in RecurrenceExpander._dates(master, 'exdate'):
+            rset.exdate(dt.astimezone(start.tzinfo))
+        return rset
+
+    @staticmethod
+    def occurrences(master, overrides, window_start, window_end, max_count=500):
+        """
+        Yields (key, component, start, end) for every occurrence of `master` starting
+        in [window_start, window_end] (or still running at window_start).
+        `component` is the override for that occurrence if there is one, else the master;
+        cancelled overrides are dropped.
+        """
+        start, end = event_times(master)
+        duration = end - start
+        by_key = {RecurrenceExpander._key(o.get('recurrence-id').dt): o for o in overrides}
+
+        # Expand in the master's own timezone, so DST keeps the wall-clock time
+        rset = RecurrenceExpander._ruleset(master, start)
+        cursor = (window_start - duration).astimezone(start.tzinfo)
+        produced = 0
+        for occurrence in rset.xafter(cursor, inc=True):
+            if occurrence > window_end or produced >= max_count:
+                break
+            produced += 1
+            key = RecurrenceExpander._key(occurrence)
+            override = by_key.get(key)
+            if override is None:
+                yield key, master, occurrence, occurrence + duration
+            elif str(override.get('status', '')).upper() != 'CANCELLED':
+                o_start, o_end = event_times(override)
+                yield key, override, o_start, o_end
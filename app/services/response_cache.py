@@ -0,0 +1,98 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of generated assistant responses for templated situations.
+
+    A situation string is matched against known templates; the key is the template type plus
+    the extracted parameters, so two situations only share a response when they say the same
+    thing. Situations that embed live data (room lists, availabilities...) match no template
+    and are never cached.
+    """
+
+    TEMPLATES = [
+        ('GREETING', r"User says hello\. Greeting checking capabilities \(booking, availability\)\."),
+        ('UNCLEAR', r"User said something unclear\. Ask to rephrase\."),
+        ('DATE_FORMAT_ERROR', r"Date format error\. Ask user to repeat date\."),
+        ('MISSING_FIELD', r"User wants to book but didn't specify (.+)\. Ask for it\."),
+        ('MISSING_FIELDS', r"User wants to book but is missing details: (.+)\. Ask for all of them\."),
+        ('MISSING_TIME', r"User specified date but likely not time\. Ask for time between (\d+)h and (\d+)h\."),
+        ('OUTSIDE_WORKING_HOURS', r"Requested time (\d\d:\d\d) is outside working hours \((.+)\)\. Ask user to pick a valid time\."),
+        ('NO_BOOKINGS_TO_CANCEL', r"User wants to cancel, but has no upcoming bookings\."),
+        ('NO_LAST_BOOKING', r"User wants to cancel last booking, but none found\."),
+        ('NO_BOOKING_ON_DATE', r"User asked to cancel a booking on this date, but no bookings were found\."),
+        ('NO_BOOKING_TO_MODIFY', r"User wants to modify a booking but I can't find any recent booking to modify\."),
+        ('MODIFY_NOTHING', r"User wants to modify, but didn't specify what to change\."),
+        ('ROOM_NOT_FOUND', r"Je ne trouve pas la salle '(.*)'\."),
+    ]
+    _compiled = [(name, re.compile(pattern)) for name, pattern in TEMPLATES]
+
+    REPLAY_WORDS_PER_CHUNK = 4
+
+    def __init__(self, max_entries=500, ttl_seconds=6 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (text, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {}  # situation type -> {'hits': n, 'misses': n}
+
+    @classmethod
+    def key_for(cls, situation: str):
+        """(situation type, params) for a templated situation, None otherwise."""
+        normalized = re.sub(r'\s+', ' ', situation or '').strip()
+        for name, pattern in cls._compiled:
+            match = pattern.fullmatch(normalized)
+            if match:
+                return name, match.groups()
+        return None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            counters = self._stats.setdefault(key[0], {'hits': 0, 'misses': 0})
+            if entry is None:
+                counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            counters['hits'] += 1
+            return entry[0]
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def replay(self, text):
+        """Yield a cached response as NDJSON `delta` chunks, like a live stream."""
+        words = re.findall(r'\S+\s*|\s+', text)
+        for i in range(0, len(words), self.REPLAY_WORDS_PER_CHUNK):
+            yield json.dumps({"type": "delta", "content": ''.join(words[i:i + self.REPLAY_WORDS_PER_CHUNK])}) + "\n"
+
+    def stats(self):
+        with self._lock:
+            by_type = {
+                name: dict(c, hit_ratio=round(c['hits'] / (c['hits'] + c['misses']), 3))
+                for name, c in self._stats.items()
+            }
+            entries = len(self._entries)
+        hits = sum(c['hits'] for c in by_type.values())
+        lookups = hits + sum(c['misses'] for c in by_type.values())
+        return {
+            'entries': entries,
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+            'by_situation': by_type
+        }
@@ -0,0 +1,202 @@
+import numpy as np
+from app.config import Config
+from app.extensions import room_catalog
+from app.services.booking_service import BookingService
+
+
+def min_cost_assignment(cost):
+    """
+    Rectangular assignment problem (Hungarian algorithm with potentials, O(n^2 m)): the
+    column given to each row of `cost` (n x m, n <= m, finite), every row getting a distinct
+    column, minimizing the total cost. Inner loops run over all columns at once with numpy.
+    """
+    n, m = cost.shape
+    if n > m:
+        raise ValueError("More rows than columns: transpose the cost matrix.")
+    # 1-based as in the textbook formulation: column 0 is the virtual start of each augmenting path
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # row assigned to each column (0: none)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = owner[column]
+            free = ~used[1:]
+            slack = cost[current - 1] - u[current] - v[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            visited = np.flatnonzero(used)
+            u[owner[visited]] += delta
+            v[visited] -= delta
+            min_slack[1:][free] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = np.full(n, -1, dtype=np.int64)
+    columns = np.flatnonzero(owner[1:])
+    assignment[owner[1:][columns] - 1] = columns
+    return assignment
+
+
+class RoomAssignmentService:
+    """
+    Rooms for a set of meeting requests at once (e.g. simultaneous breakout sessions), instead
+    of one find_potential_rooms call per request, where an early best fit can take the only room
+    a later request could use.
+
+    Requests are grouped into waves of pairwise overlapping requests (sorted by start, the
+    intervals of a wave share a common instant); each wave is one min-cost assignment over the
+    rooms free for its requests, maximizing the number of requests served, then minimizing the
+    total capacity used. Waves are solved in time order, each one seeing the rooms the previous
+    ones took: optimal for simultaneous sessions, a good heuristic for staggered ones.
+    """
+
+    @staticmethod
+    def assign(requests):
+        """
+        `requests`: dicts with start_time, end_time, attendees and optionally equipment.
+        Returns one result per request, in order: {"index", "room_id", "room_name", "capacity"},
+        room_id None with an "error" when the request gets no room.
+
+        A room is a candidate for a request when it is active, free over its interval, holds
+        the attendees, has the equipment and is_capacity_coherent; the single-user rule of
+        validate_booking_rules is enforced by solving a wave again without the large rooms of a
+        single user who left a small room free. Nothing is booked.
+        """
+        results = [None] * len(requests)
+        rooms = room_catalog.active()
+        valid = []
+        for index, request in enumerate(requests):
+            if request['end_time'] <= request['start_time'] or not BookingService.is_within_working_hours(request['start_time'], request['end_time']):
+                results[index] = {'index': index, 'room_id': None, 'error': "Booking outside of working hours."}
+            else:
+                valid.append(index)
+        if not valid or not rooms:
+            for index in valid:
+                results[index] = {'index': index, 'room_id': None, 'error': "No room fits this request."}
+            return results
+
+        starts = np.array([requests[i]['start_time'] for i in valid], dtype='datetime64[s]')
+        ends = np.array([requests[i]['end_time'] for i in valid], dtype='datetime64[s]')
+        attendees = np.array([requests[i].get('attendees') or 1 for i in valid])
+        capacities = np.array([room.capacity for room in rooms])
+
+        # Static fit: capacity and coherence (evaluated once per distinct headcount), equipment
+        # (one mask per distinct equipment set)
+        headcounts, headcount_rows = np.unique(attendees, return_inverse=True)
+        coherent = np.array([[BookingService.is_capacity_coherent(int(c), int(a)) for c in capacities] for a in headcounts])
+        fits = (capacities[None, :] >= attendees[:, None]) & coherent[headcount_rows]
+        equipment_masks = {}
+        for k, index in enumerate(valid):
+            required = frozenset(e.lower() for e in requests[index].get('equipment') or ())
+            if required:
+                if required not in equipment_masks:
+                    equipment_masks[required] = np.array([required.issubset(room.equipment_set) for room in rooms])
+                fits[k] &= equipment_masks[required]
+
+        # Occupancy: the confirmed bookings of every room over the whole span, one lookup
+        busy = np.zeros(fits.shape, dtype=bool)
+        by_room = BookingService.bookings_by_room([room.id for room in rooms], min(requests[i]['start_time'] for i in valid),
+                                                  max(requests[i]['end_time'] for i in valid))
+        for j, room in enumerate(rooms):
+            bookings = by_room.get(room.id)
+            if bookings:
+                # Sorted by start: the bookings starting before a request's end overlap it iff the
+                # latest end among them is after its start
+                booking_starts = np.array([b.start_time for b in bookings], dtype='datetime64[s]')
+                latest_ends = np.maximum.accumulate(np.array([b.end_time for b in bookings], dtype='datetime64[s]'))
+                last = np.searchsorted(booking_starts, ends, side='left') - 1
+                busy[:, j] = (last >= 0) & (latest_ends[np.maximum(last, 0)] > starts)
+
+        # Single-user rule (validate_booking_rules): no huge room while a smaller one stays free
+        threshold = Config.SINGLE_USER_CAPACITY_THRESHOLD
+        small = np.flatnonzero(capacities <= threshold)
+
+        def breaks_single_user_rule(k):
+            if attendees[k] > 1 or chosen[k] < 0 or capacities[chosen[k]] <= threshold or not len(small):
+                return False
+            overlapping = (starts < ends[k]) & (ends > starts[k]) & (chosen >= 0)
+            return bool((~busy[k, small] & (capacities[small] >= attendees[k]) & ~np.isin(small, chosen[overlapping])).any())
+
+        chosen = np.full(len(valid), -1, dtype=np.int64)
+        blocked = np.zeros(len(valid), dtype=bool)  # unassigned because of the single-user rule
+        order = np.argsort(starts, kind='stable')
+        position = 0
+        while position < len(order):
+            # Wave: next requests (by start) starting before every earlier member of the wave ends
+            wave, common_end = [order[position]], ends[order[position]]
+            position += 1
+            while position < len(order) and starts[order[position]] < common_end:
+                wave.append(order[position])
+                common_end = min(common_end, ends[order[position]])
+                position += 1
+            wave = np.array(wave)
+
+            # Rooms taken by earlier waves' assignments overlapping these requests
+            taken = np.zeros((len(wave), len(rooms)), dtype=bool)
+            for k in np.flatnonzero(chosen >= 0):
+                overlap = (starts[wave] < ends[k]) & (ends[wave] > starts[k])
+                taken[overlap, chosen[k]] = True
+            allowed = fits[wave] & ~busy[wave] & ~taken
+            while True:
+                RoomAssignmentService._solve_wave(allowed, capacities, wave, chosen)
+                # A single user given a large room while a small one is left free: forbid the pair, solve again
+                violations = [row for row, k in enumerate(wave) if breaks_single_user_rule(k)]
+                if not violations:
+                    break
+                chosen[wave] = -1
+                for row in violations:
+                    allowed[row, capacities > threshold] = False
+                    blocked[wave[row]] = True
+
+        # Later waves may still leave a small room free next to a single user's large one
+        for k in np.flatnonzero((attendees <= 1) & (chosen >= 0)):
+            if breaks_single_user_rule(k):
+                chosen[k] = -1
+                blocked[k] = True
+
+        for k, index in enumerate(valid):
+            if results[index] is not None:
+                continue
+            if chosen[k] >= 0:
+                room = rooms[chosen[k]]
+                results[index] = {'index': index, 'room_id': room.id, 'room_name': room.name, 'capacity': room.capacity}
+            elif blocked[k]:
+                results[index] = {'index': index, 'room_id': None,
+                                  'error': "Optimization Violation: Smaller rooms are available for this request."}
+            elif not fits[k].any():
+                results[index] = {'index': index, 'room_id': None, 'error': "No room fits this request."}
+            else:
+                results[index] = {'index': index, 'room_id': None, 'error': "Every fitting room is taken at this time."}
+        return results
+
+    @staticmethod
+    def _solve_wave(allowed, capacities, wave, chosen):
+        """One min-cost assignment of the wave's requests (rows of `allowed`) to rooms, into `chosen`."""
+        columns = np.flatnonzero(allowed.any(axis=0))
+        if not len(columns):
+            return
+        # Assigning a request is worth more than any capacity saving: serve as many as possible
+        bonus = capacities[columns].sum() + 1
+        cost = np.where(allowed[:, columns], capacities[columns][None, :] - bonus, 0).astype(float)
+        if len(wave) <= len(columns):
+            pairs = zip(range(len(wave)), min_cost_assignment(cost))
+        else:
+            pairs = zip(min_cost_assignment(cost.T), range(len(columns)))
+        for row, column in pairs:
+            if allowed[row, columns[column]]:  # a zero-cost pair only means "unassigned"
+                chosen[wave[row]] = columns[column]
@@ -0,0 +1,122 @@
+import time
+import threading
+import unicodedata
+from collections import namedtuple
+from flask import current_app
+from app.utils.version_signal import VersionSignal
+
+# Immutable snapshot of a room row, with the derived fields hot paths need precomputed.
+CatalogRoom = namedtuple('CatalogRoom', [
+    'id', 'name', 'capacity', 'equipment', 'is_active',
+    'normalized_name',  # accents stripped + lowercase, for fuzzy name lookups
+    'equipment_set',    # lowercase equipment names
+])
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase and strip accents ('Salle Été' -> 'salle ete')."""
+    return ''.join(c for c in unicodedata.normalize('NFD', text or '') if unicodedata.category(c) != 'Mn').lower().strip()
+
+
+class _CatalogState:
+    def __init__(self, signal, check_interval):
+        self.signal = signal
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        # (rooms, by_id): rooms a tuple of CatalogRoom ordered by capacity then id. One tuple,
+        # swapped with a single assignment: lock-free readers never pair rooms with another by_id
+        self.snapshot = None
+        self.version = None     # signal version the snapshot was loaded at
+        self.checked_at = 0.0
+        self.loads = 0
+
+
+class RoomCatalog:
+    """
+    Read-mostly, versioned cache of the room inventory.
+
+    Rooms only change through the admin endpoints, which call `invalidate()` after committing.
+    Invalidation bumps a shared VersionSignal so the other gunicorn workers notice the change
+    (at most `ROOM_CATALOG_CHECK_INTERVAL` seconds later) and reload the table once.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['room_catalog'] = _CatalogState(
+            signal=VersionSignal.for_app(app, 'room_catalog'),
+            check_interval=app.config.get('ROOM_CATALOG_CHECK_INTERVAL', 1.0)
+        )
+
+    @staticmethod
+    def _state() -> _CatalogState:
+        return current_app.extensions['room_catalog']
+
+    def _snapshot(self):
+        """Return (rooms, by_id), reloading them if another worker bumped the version."""
+        state = self._state()
+        snapshot = state.snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - state.checked_at < state.check_interval:
+            return snapshot
+
+        with state.lock:
+            version = state.signal.read()
+            state.checked_at = now
+            if state.snapshot is None or version != state.version:
+                self._load(state, version)
+            return state.snapshot
+
+    @staticmethod
+    def _load(state, version):
+        from app.models import Room
+
+        rooms = tuple(
+            CatalogRoom(
+                id=r.id,
+                name=r.name,
+                capacity=r.capacity,
+                equipment=tuple(r.equipment or ()),
+                is_active=bool(r.is_active),
+                normalized_name=normalize_name(r.name),
+                equipment_set=frozenset(e.lower() for e in (r.equipment or ())),
+            )
+            for r in Room.query.order_by(Room.capacity, Room.id).all()
+        )
+        state.snapshot = (rooms, {r.id: r for r in rooms})
+        state.version = version
+        state.loads += 1
+
+    # --- Reads ---
+
+    def all(self):
+        """Every room (active or not), smallest capacity first."""
+        return self._snapshot()[0]
+
+    def active(self, min_capacity: int = 1):
+        """Active rooms holding at least `min_capacity` people, smallest capacity first."""
+        return [r for r in self._snapshot()[0] if r.is_active and r.capacity >= min_capacity]
+
+    def get(self, room_id):
+        return self._snapshot()[1].get(room_id)
+
+    def find_by_name(self, name: str):
+        """First room whose normalized name contains the normalized `name`."""
+        needle = normalize_name(name)
+        return next((r for r in self._snapshot()[0] if needle in r.normalized_name), None)
+
+    def stats(self):
+        state = self._state()
+        snapshot = state.snapshot
+        return {'version': state.version, 'loads': state.loads, 'rooms': len(snapshot[0]) if snapshot else 0}
+
+    # --- Writes ---
+
+    def invalidate(self):
+        """Drop the local snapshot and signal the other workers. Call after committing a Room change."""
+        state = self._state()
+        with state.lock:
+            state.signal.bump()
+            state.snapshot = None
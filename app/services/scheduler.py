@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process runs the jobs
+    fcntl = None
+
+
+class _Job:
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0.0
+        self.runs = 0
+        self.last_result = None
+        self.last_error = None
+
+
+class _SchedulerState:
+    def __init__(self, lock_path, tick):
+        self.lock_path = lock_path
+        self.tick = tick
+        self.jobs = {}
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.lock_file = None
+
+
+class BackgroundScheduler:
+    """
+    Runs periodic jobs in a daemon thread of the web process.
+
+    Every gunicorn worker starts one, but only the worker holding an exclusive lock on
+    `<CACHE_SIGNAL_DIR>/scheduler.lock` (the leader) executes jobs; the others keep trying
+    to take the lock, so a new leader takes over if the current one dies.
+    Jobs run inside an app context.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        directory = app.config.get('CACHE_SIGNAL_DIR')
+        app.extensions['scheduler'] = _SchedulerState(
+            lock_path=os.path.join(directory, 'scheduler.lock') if directory else None,
+            tick=app.config.get('SCHEDULER_TICK', 5.0)
+        )
+
+    @staticmethod
+    def _state(app=None) -> _SchedulerState:
+        return (app or current_app).extensions['scheduler']
+
+    def add_job(self, app, name, interval, func):
+        """Register `func()` to run every `interval` seconds."""
+        self._state(app).jobs[name] = _Job(name, interval, func)
+
+    def start(self, app):
+        state = self._state(app)
+        if state.thread and state.thread.is_alive():
+            return
+        state.stopping.clear()
+        state.thread = threading.Thread(target=self._loop, args=(app, state), name='gbook-scheduler', daemon=True)
+        state.thread.start()
+
+    def stop(self, app):
+        state = self._state(app)
+        state.stopping.set()
+        state.wakeup.set()
+        if state.thread:
+            state.thread.join(timeout=5)
+        if state.lock_file:
+            state.lock_file.close()
+            state.lock_file = None
+
+    def is_running(self, app=None) -> bool:
+        state = self._state(app)
+        return bool(state.thread and state.thread.is_alive())
+
+    def wake(self, name, app=None):
+        """Run job `name` as soon as possible (on this process, if it is the leader)."""
+        state = self._state(app)
+        job = state.jobs.get(name)
+        if job:
+            job.next_run = 0.0
+            state.wakeup.set()
+
+    def run_job(self, name, app=None):
+        """Run a job synchronously in the current thread (tests, CLI)."""
+        app = app or current_app._get_current_object()
+        return self._run(app, self._state(app).jobs[name])
+
+    def stats(self, app=None):
+        state = self._state(app)
+        return {
+            'running': self.is_running(app),
+            'leader': self.is_running(app) and (state.lock_path is None or fcntl is None or state.lock_file is not None),
+            'jobs': {
+                name: {'interval': job.interval, 'runs': job.runs, 'last_result': job.last_result, 'last_error': job.last_error}
+                for name, job in state.jobs.items()
+            }
+        }
+
+    @staticmethod
+    def _is_leader(state) -> bool:
+        if state.lock_path is None or fcntl is None:
+            return True
+        if state.lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(state.lock_path), exist_ok=True)
+        lock_file = open(state.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        state.lock_file = lock_file  # held for the life of the process
+        return True
+
+    @staticmethod
+    def _run(app, job):
+        with app.app_context():
+            try:
+                job.last_result = job.func()
+                job.last_error = None
+            except Exception as e:
+                app.logger.error(f"Scheduled job {job.name} failed: {e}")
+                job.last_error = str(e)
+            finally:
+                job.runs += 1
+        return job.last_result
+
+    def _loop(self, app, state):
+        while not state.stopping.is_set():
+            if self._is_leader(state):
+                now = time.monotonic()
+                for job in list(state.jobs.values()):
+                    if job.next_run <= now:
+                        job.next_run = now + job.interval
+                        self._run(app, job)
+            state.wakeup.wait(state.tick)
+            state.wakeup.clear()
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app.config import Config
+from app.extensions import room_catalog
+from app.services.booking_service import BookingService
+
+
+def _runs(mask):
+    """
+    Runs of True along the last axis of `mask`: (leading indices..., starts, ends) arrays,
+    one entry per run, ends exclusive. Found from the +1/-1 edges of the padded mask.
+    """
+    padded = np.zeros(mask.shape[:-1] + (mask.shape[-1] + 2,), dtype=np.int8)
+    padded[..., 1:-1] = mask
+    edges = np.diff(padded, axis=-1)
+    *leading, starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)[-1]  # same row-major order: the n-th end closes the n-th start
+    return (*leading, starts, ends)
+
+
+class SlotGrid:
+    """
+    Free/busy bitmap of rooms over consecutive days: `free[room, day, slot]` is True when the
+    room is free during that slot of the day's working hours (WORKING_HOURS_START to
+    WORKING_HOURS_END, SLOT_SEARCH_GRANULARITY minutes per slot). Rows follow `rooms`
+    (room catalog order: smallest capacity first). Built by SlotSearchService.grid.
+    """
+
+    def __init__(self, rooms, dates, free, step):
+        self.rooms = rooms
+        self.dates = dates
+        self.free = free
+        self.step = step
+
+    def time_of(self, day, slot):
+        """Start of slot `slot` of day `day` (indexes)."""
+        return datetime.combine(self.dates[day], datetime.min.time()) + timedelta(hours=Config.WORKING_HOURS_START) + int(slot) * self.step
+
+    def slots_for(self, duration):
+        """Number of slots covering `duration` (a timedelta)."""
+        return max(1, -(-duration // self.step))
+
+    def fits(self, slots):
+        """
+        Bool array (rooms, days, starts): True where `slots` consecutive free slots start at
+        that slot. Sliding-window sums over the cumulated bitmap.
+        """
+        per_day = self.free.shape[2]
+        if slots > per_day:
+            return np.zeros(self.free.shape[:2] + (0,), dtype=bool)
+        counts = np.zeros(self.free.shape[:2] + (per_day + 1,), dtype=np.int32)
+        np.cumsum(self.free, axis=2, out=counts[:, :, 1:])
+        return counts[:, :, slots:] - counts[:, :, :-slots] == slots
+
+
+class SlotSearchService:
+    """
+    Free-slot search across many rooms at once, on a SlotGrid: one vectorized pass over the
+    bitmap instead of a Python loop over rooms and their bookings.
+    """
+
+    @staticmethod
+    def grid(date, days=1, attendees=1, equipment=None, room_ids=None, now=None) -> SlotGrid:
+        """
+        SlotGrid of the active rooms holding `attendees` people (and having `equipment`,
+        restricted to `room_ids` if given) over `days` days from `date`. Slots already started
+        at `now` (default: the current time) count as busy.
+        """
+        step = timedelta(minutes=Config.SLOT_SEARCH_GRANULARITY)
+        per_day = int(timedelta(hours=Config.WORKING_HOURS_END - Config.WORKING_HOURS_START) // step)
+        dates = [date + timedelta(days=i) for i in range(days)]
+
+        rooms = room_catalog.active(attendees)
+        if equipment:
+            required = {e.lower() for e in equipment}
+            rooms = [r for r in rooms if required.issubset(r.equipment_set)]
+        if room_ids is not None:
+            wanted = set(room_ids)
+            rooms = [r for r in rooms if r.id in wanted]
+
+        range_start = datetime.combine(dates[0], datetime.min.time())
+        range_end = datetime.combine(dates[-1] + timedelta(days=1), datetime.min.time())
+        bookings_by_room = BookingService.bookings_by_room([r.id for r in rooms], range_start, range_end) if rooms else {}
+
+        rows, starts, ends = [], [], []
+        for row, room in enumerate(rooms):
+            for booking in bookings_by_room.get(room.id, ()):
+                rows.append(row)
+                starts.append(booking.start_time)
+                ends.append(booking.end_time)
+
+        free = np.ones((len(rooms), days, per_day), dtype=bool)
+        if rows:
+            # Bookings as [first, last) positions on the flattened (days x slots) timeline of
+            # their row; times outside working hours are clipped to the day's bounds, so a
+            # booking spanning nights still covers one contiguous range of positions
+            first = SlotSearchService._positions(np.array(starts, dtype='datetime64[s]'), range_start, step, per_day, days, np.floor)
+            last = SlotSearchService._positions(np.array(ends, dtype='datetime64[s]'), range_start, step, per_day, days, np.ceil)
+            rows = np.array(rows)
+            delta = np.zeros((len(rooms), days * per_day + 1), dtype=np.int16)
+            np.add.at(delta, (rows, first), 1)
+            np.add.at(delta, (rows, last), -1)
+            free = (np.cumsum(delta[:, :-1], axis=1) == 0).reshape(len(rooms), days, per_day)
+
+        now = now or datetime.now()
+        if now > range_start:
+            past = SlotSearchService._positions(np.array([now], dtype='datetime64[s]'), range_start, step, per_day, days, np.ceil)[0]
+            free.reshape(len(rooms), days * per_day)[:, :past] = False
+        return SlotGrid(rooms, dates, free, step)
+
+    @staticmethod
+    def _positions(times, range_start, step, per_day, days, rounding):
+        """Positions of `times` (datetime64 array) on the flattened (days x slots) timeline from `range_start`."""
+        offsets = (times - np.datetime64(range_start, 's')).astype(np.int64)
+        day, seconds = np.divmod(offsets, 86400)
+        slot = np.clip(rounding((seconds - Config.WORKING_HOURS_START * 3600) / step.total_seconds()), 0, per_day)
+        return np.clip(day * per_day + slot.astype(np.int64), 0, days * per_day)
+
+    @staticmethod
+    def _room(room):
+        return {'room_id': room.id, 'room_name': room.name, 'capacity': room.capacity}
+
+    @staticmethod
+    def earliest_fits(grid: SlotGrid, duration: timedelta, limit=1, not_before=None, spacing=None):
+        """
+        The `limit` earliest start times at which at least one room of the grid is free for
+        `duration`, each with every room free then (smallest first):
+        [{'start', 'end', 'rooms': [{'room_id', 'room_name', 'capacity'}]}].
+        Successive start times are at least `spacing` apart (default: one slot).
+        """
+        slots = grid.slots_for(duration)
+        fits = grid.fits(slots)
+        if not_before is not None:
+            # Starts before `not_before`: day by day, the slots starting earlier are dropped
+            for day in range(fits.shape[1]):
+                skip = -(-(not_before - grid.time_of(day, 0)) // grid.step)
+                fits[:, day, :max(0, min(skip, fits.shape[2]))] = False
+        any_room = fits.any(axis=0)  # (days, starts)
+        results = []
+        for day, start in zip(*np.nonzero(any_room)):  # row-major: chronological
+            if len(results) >= limit:
+                break
+            begin = grid.time_of(day, start)
+            if spacing and results and begin < results[-1]['start'] + spacing:
+                continue
+            results.append({
+                'start': begin,
+                'end': begin + duration,
+                'rooms': [SlotSearchService._room(grid.rooms[i]) for i in np.flatnonzero(fits[:, day, start])]
+            })
+        return results
+
+    @staticmethod
+    def all_fits(grid: SlotGrid, duration: timedelta):
+        """
+        Every placement of `duration`, as the free windows at least that long, per room:
+        [{'room_id', 'room_name', 'capacity', 'windows': [{'start', 'end'}]}], rooms without
+        one left out. A meeting fits at any start from a window's start to its end - duration.
+        """
+        slots = grid.slots_for(duration)
+        rows, days, starts, ends = _runs(grid.free)
+        keep = ends - starts >= slots
+        results, current = [], None
+        for row, day, start, end in zip(rows[keep], days[keep], starts[keep], ends[keep]):
+            if current is None or current['room_id'] != grid.rooms[row].id:
+                current = dict(SlotSearchService._room(grid.rooms[row]), windows=[])
+                results.append(current)
+            current['windows'].append({'start': grid.time_of(day, start), 'end': grid.time_of(day, end)})
+        return results
+
+    @staticmethod
+    def common_free_windows(grid: SlotGrid, duration: timedelta, min_rooms=None):
+        """
+        Windows at least `duration` long during which `min_rooms` rooms of the grid (default:
+        all of them) are free at once: [{'start', 'end', 'free_rooms'}], free_rooms being the
+        least number of rooms free over the window.
+        """
+        if not grid.rooms:
+            return []
+        slots = grid.slots_for(duration)
+        free_count = grid.free.sum(axis=0)  # (days, slots)
+        days, starts, ends = _runs(free_count >= (min_rooms or len(grid.rooms)))
+        return [
+            {'start': grid.time_of(day, start), 'end': grid.time_of(day, end), 'free_rooms': int(free_count[day, start:end].min())}
+            for day, start, end in zip(days, starts, ends) if end - start >= slots
+        ]
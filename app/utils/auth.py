@@ -0,0 +1,157 @@
+import time
+import threading
+from collections import OrderedDict, namedtuple
+import jwt
+from flask import current_app, request
+from app.utils.version_signal import VersionSignal
+
+# What authenticated views need to know about the caller, detached from the ORM session.
+Principal = namedtuple('Principal', ['id', 'username', 'role', 'ics_url'])
+
+
+class AuthError(Exception):
+    """Missing, invalid or expired token, or unknown user (answered with a 401)."""
+
+
+def bearer_token():
+    """Token from the `Authorization: Bearer <token>` header, or None."""
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1] or None
+    return None
+
+
+class _PrincipalState:
+    def __init__(self, signal, check_interval, ttl, max_entries):
+        self.signal = signal
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # token -> (Principal, expires_at), LRU order
+        self.by_user = {}             # user id -> set of cached tokens
+        self.version = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.invalidations = 0
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated principals, keyed by JWT.
+
+    A hit skips both the JWT decode and the user lookup. Entries live at most
+    `AUTH_PRINCIPAL_TTL` seconds (never past the token's own `exp`). Admin changes to a
+    user call `invalidate_user()`, which drops that user's tokens locally and bumps a shared
+    VersionSignal so the other gunicorn workers clear their cache within
+    `AUTH_CACHE_CHECK_INTERVAL` seconds.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['principals'] = _PrincipalState(
+            signal=VersionSignal.for_app(app, 'principals'),
+            check_interval=app.config.get('AUTH_CACHE_CHECK_INTERVAL', 1.0),
+            ttl=app.config.get('AUTH_PRINCIPAL_TTL', 60),
+            max_entries=app.config.get('AUTH_CACHE_MAX_ENTRIES', 10000)
+        )
+
+    @staticmethod
+    def _state() -> _PrincipalState:
+        return current_app.extensions['principals']
+
+    @staticmethod
+    def _clear(state):
+        state.entries.clear()
+        state.by_user.clear()
+
+    def _check_signal(self, state):
+        now = time.monotonic()
+        if now - state.checked_at < state.check_interval:
+            return
+        with state.lock:
+            version = state.signal.read()
+            state.checked_at = now
+            if version != state.version:
+                self._clear(state)
+                state.version = version
+
+    def authenticate(self, token) -> Principal:
+        """Principal for a bearer token; raises AuthError."""
+        if not token:
+            raise AuthError('Token is missing!')
+
+        state = self._state()
+        self._check_signal(state)
+        now = time.time()
+        entry = state.entries.get(token)
+        if entry is not None and entry[1] > now:
+            with state.lock:
+                state.hits += 1
+                if token in state.entries:
+                    state.entries.move_to_end(token)
+            return entry[0]
+
+        from app.extensions import db
+        from app.models.user import User
+
+        started = time.perf_counter()
+        try:
+            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        except jwt.PyJWTError as e:
+            raise AuthError(str(e))
+        finally:
+            decode_seconds = time.perf_counter() - started
+
+        user = db.session.get(User, data.get('user_id'))
+        if not user:
+            raise AuthError("User not found")
+        principal = Principal(user.id, user.username, user.role, user.ics_url)
+
+        expires_at = now + state.ttl
+        if 'exp' in data:
+            expires_at = min(expires_at, data['exp'])
+        with state.lock:
+            state.misses += 1
+            state.decodes += 1
+            state.decode_seconds += decode_seconds
+            stale = state.entries.pop(token, None)
+            if stale is not None:
+                state.by_user.get(stale[0].id, set()).discard(token)
+            state.entries[token] = (principal, expires_at)
+            state.by_user.setdefault(principal.id, set()).add(token)
+            while len(state.entries) > state.max_entries:
+                old_token, (old_principal, _) = state.entries.popitem(last=False)
+                state.by_user.get(old_principal.id, set()).discard(old_token)
+        return principal
+
+    def invalidate_user(self, user_id):
+        """Forget the cached principals of a user, here and in the other workers. Call after committing."""
+        state = self._state()
+        with state.lock:
+            for token in state.by_user.pop(user_id, ()):
+                state.entries.pop(token, None)
+            state.invalidations += 1
+            # Our own cache is already up to date: don't clear it on the next signal check
+            expected = state.version
+            version = state.signal.bump()
+            if expected is not None and version == expected + 1:
+                state.version = version
+
+    def stats(self):
+        state = self._state()
+        lookups = state.hits + state.misses
+        return {
+            'entries': len(state.entries),
+            'hits': state.hits,
+            'misses': state.misses,
+            'hit_rate': round(state.hits / lookups, 3) if lookups else None,
+            'avg_decode_ms': round(state.decode_seconds * 1000 / state.decodes, 3) if state.decodes else None,
+            'invalidations': state.invalidations
+        }
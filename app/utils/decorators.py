@@ -1,27 +1,19 @@
 from functools import wraps
-from flask import request, jsonify, current_app
-import jwt
-from app.models.user import User
+from flask import jsonify
+from app.extensions import principals
+from app.utils.auth import AuthError, bearer_token
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            # Bearer <token>
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split(" ")[1]
-        
+        token = bearer_token()
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
         
         try:
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
-            if not current_user:
-                 raise Exception("User not found")
-        except Exception as e:
+            # Principal (id, username, role, ics_url), cached per token: no DB round trip on a hit
+            current_user = principals.authenticate(token)
+        except AuthError as e:
             return jsonify({'message': 'Token is invalid!', 'error': str(e)}), 401
             
         return f(current_user, *args, **kwargs)
@@ -0,0 +1,90 @@
+"""
+Serialization of listings straight from row tuples.
+
+Listing endpoints select the columns they need (BOOKING_COLUMNS, EVENT_LISTING_COLUMNS)
+instead of loading ORM objects and walking their lazy relationships; room details come
+from the room catalog. Responses are encoded with orjson when it is installed.
+"""
+from flask.json.provider import DefaultJSONProvider
+from app.extensions import room_catalog
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard json module
+    orjson = None
+
+
+def booking_columns():
+    from app.models import Booking
+    return (Booking.id, Booking.user_id, Booking.room_id, Booking.start_time, Booking.end_time,
+            Booking.title, Booking.attendees_count, Booking.status)
+
+
+def event_listing_columns():
+    from app.models import Booking, Event
+    # Booking.room_id through an outer join: the room of a linked booking, None otherwise
+    return (Event.summary, Event.start_time, Event.end_time, Event.location, Event.attendee_count,
+            Event.booking_id, Booking.room_id.label('booking_room_id'))
+
+
+def booking_to_dict(row):
+    """A Booking, or a row of booking_columns(), as the API returns it."""
+    room = room_catalog.get(row.room_id)
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'room_id': row.room_id,
+        'room_name': room.name if room else f"Room {row.room_id}",
+        'room_capacity': room.capacity if room else 0,
+        'start_time': row.start_time.isoformat(),
+        'end_time': row.end_time.isoformat(),
+        'title': row.title,
+        'attendees_count': row.attendees_count,
+        'status': row.status
+    }
+
+
+def event_to_dict(row):
+    """A row of event_listing_columns() as the calendar listing returns it."""
+    location = row.location
+    if row.booking_id is not None and row.booking_room_id is not None:
+        room = room_catalog.get(row.booking_room_id)
+        location = room.name if room else f"Room {row.booking_room_id}"
+        needs_room = False
+    else:
+        needs_room = not location or location.strip() == ""
+    return {
+        'summary': row.summary,
+        'start': row.start_time.isoformat(),
+        'end': row.end_time.isoformat(),
+        'location': location,
+        'needs_room': needs_room,
+        'attendee_count': row.attendee_count
+    }
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding with orjson. Types orjson doesn't know, and datetimes
+    (kept in Flask's HTTP date format), go through Flask's default conversion.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # indent, sort_keys...: not supported by orjson
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)  # pretty-printed
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options), mimetype=self.mimetype
+        )
+
+
+def init_json(app):
+    """Use orjson for responses when available (JSON_FAST_ENCODER)."""
+    if orjson is not None and app.config.get('JSON_FAST_ENCODER', True):
+        app.json = OrjsonProvider(app)
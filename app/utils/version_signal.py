@@ -0,0 +1,56 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, in-process counter still works
+    fcntl = None
+
+
+class VersionSignal:
+    """
+    Monotonic version counter shared by every worker process through a small file.
+    Readers compare the version against the one they loaded to know their cache is stale;
+    writers bump it after committing. Without a path, the counter is local to the process.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._local = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_app(cls, app, name):
+        directory = app.config.get('CACHE_SIGNAL_DIR')
+        return cls(os.path.join(directory, f"{name}.version") if directory else None)
+
+    def read(self) -> int:
+        if not self.path:
+            return self._local
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self) -> int:
+        """Increment the shared version and return the new value."""
+        with self._lock:
+            if not self.path:
+                self._local += 1
+                return self._local
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    version = self.read() + 1
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'w') as f:
+                        f.write(str(version))
+                    os.replace(tmp_path, self.path)
+                    return version
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
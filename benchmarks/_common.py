@@ -0,0 +1,52 @@
+"""Shared helpers for the benchmark scripts (run them from the repo root: python -m benchmarks.<name>)."""
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+
+
+class BenchConfig(TestingConfig):
+    DEBUG = False
+
+
+@contextmanager
+def bench_app(config_class=BenchConfig):
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+class QueryCounter:
+    """Counts SQL statements sent through the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def timed(fn, repeat=20):
+    """Return the median wall time of `fn()` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
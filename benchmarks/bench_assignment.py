@@ -0,0 +1,86 @@
+"""
+Bulk room assignment: an event with many simultaneous or staggered sessions (500 by default,
+on 300 rooms), through RoomAssignmentService against one greedy best fit per session
+(the smallest free fitting room, as find_potential_rooms proposes): sessions served,
+total capacity used and solve time.
+
+    python -m benchmarks.bench_assignment [requests] [rooms]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.extensions import db, room_catalog
+from app.models import User, Room
+from app.services.booking_service import BookingService
+from app.services.room_assignment import RoomAssignmentService
+from benchmarks._common import bench_app, timed
+
+EQUIPMENT = ["projector", "whiteboard", "tv", "desk"]
+
+
+def populate(n_rooms):
+    rng = random.Random(n_rooms)
+    db.session.add(User(username='bench', email='bench@gbook.com'))
+    db.session.execute(insert(Room), [
+        {'name': f"Room {i}", 'capacity': rng.choice([2, 4, 6, 8, 12, 20, 50]),
+         'equipment': rng.sample(EQUIPMENT, rng.randint(0, 3)), 'is_active': True}
+        for i in range(n_rooms)
+    ])
+    db.session.commit()
+    room_catalog.invalidate()
+
+
+def sessions(n_requests, day):
+    # Four time blocks, sessions starting on the hour or the half hour of their block
+    rng = random.Random(n_requests)
+    requests = []
+    for _ in range(n_requests):
+        start = day + timedelta(hours=rng.choice([9, 11, 14, 16]), minutes=rng.choice([0, 0, 30]))
+        requests.append({'start_time': start, 'end_time': start + timedelta(minutes=rng.choice([60, 90])),
+                         'attendees': rng.choice([2, 3, 4, 5, 6, 8, 10, 15]),
+                         'equipment': rng.sample(EQUIPMENT, rng.choice([0, 0, 1, 1, 2]))})
+    return requests
+
+
+def greedy(requests):
+    """One best fit per request, in order, against the rooms given to the previous ones."""
+    rooms = room_catalog.active()
+    given = []
+    results = []
+    for request in requests:
+        best = None
+        for room in rooms:
+            if (room.capacity >= request['attendees'] and BookingService.is_capacity_coherent(room.capacity, request['attendees'])
+                    and set(request['equipment']).issubset(room.equipment_set)
+                    and not any(r is room and s < request['end_time'] and e > request['start_time'] for r, s, e in given)
+                    and (best is None or room.capacity < best.capacity)):
+                best = room
+        if best is not None:
+            given.append((best, request['start_time'], request['end_time']))
+        results.append(best.capacity if best else None)
+    return results
+
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_rooms = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    day = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+    requests = sessions(n_requests, day)
+    with bench_app():
+        populate(n_rooms)
+        room_catalog.active()
+        greedy_capacities = greedy(requests)
+        solver_capacities = [r.get('capacity') for r in RoomAssignmentService.assign(requests)]
+        greedy_ms = timed(lambda: greedy(requests), repeat=3)
+        solver_ms = timed(lambda: RoomAssignmentService.assign(requests), repeat=3)
+
+    print(f"{n_requests} sessions, {n_rooms} rooms")
+    print(f"{'':>8} {'served':>7} {'capacity':>9} {'ms':>9}")
+    for label, capacities, ms in (('greedy', greedy_capacities, greedy_ms), ('solver', solver_capacities, solver_ms)):
+        served = [c for c in capacities if c is not None]
+        print(f"{label:>8} {len(served):>7} {sum(served):>9} {ms:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
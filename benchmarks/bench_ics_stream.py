@@ -0,0 +1,103 @@
+"""
+Peak memory and time of an ICS sync parse: whole-calendar `Calendar.from_ical` (previous path)
+against the streaming VEVENT parser, on a synthetic feed served over local HTTP.
+Most events are in the past, as in a long-lived shared calendar.
+
+    python -m benchmarks.bench_ics_stream [events]   # default 100000
+"""
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytz
+import requests
+from icalendar import Calendar
+from app.services.ics_stream import ICSStreamParser
+from app.services.calendar_service import ICS_CHUNK_SIZE
+
+
+def synthetic_feed(n, future_ratio=0.05):
+    fmt = '%Y%m%dT%H%M%SZ'
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    future = int(n * future_ratio)
+    parts = ["BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//GBook bench//EN\r\n"]
+    for i in range(n):
+        # past events spread over the last years, then a few upcoming ones
+        start = now + timedelta(hours=i - (n - future)) if i >= n - future else now - timedelta(hours=(n - i) * 3)
+        parts.append(
+            "BEGIN:VEVENT\r\n"
+            f"UID:bench-{i}@gbook\r\nDTSTAMP:{now.strftime(fmt)}\r\n"
+            f"DTSTART:{start.strftime(fmt)}\r\nDTEND:{(start + timedelta(hours=1)).strftime(fmt)}\r\n"
+            f"SUMMARY:Réunion d'équipe numéro {i}\r\nLOCATION:\r\n"
+            f"DESCRIPTION:Point hebdomadaire sur l'avancement du projet {i % 50}\\, ordre du jour joint.\r\n"
+            "ATTENDEE;CN=Alice:mailto:alice@example.com\r\nATTENDEE;CN=Bob:mailto:bob@example.com\r\n"
+            "END:VEVENT\r\n"
+        )
+    parts.append("END:VCALENDAR\r\n")
+    return ''.join(parts).encode('utf-8')
+
+
+def serve(body):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/calendar')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/feed.ics'
+
+
+def whole_calendar(url, now):
+    cal = Calendar.from_ical(requests.get(url, timeout=60).content)
+    kept = 0
+    for component in cal.walk('VEVENT'):
+        kept += component.get('dtend').dt >= now
+    return kept
+
+
+def streaming(url, now):
+    response = requests.get(url, timeout=60, stream=True)
+    parser = ICSStreamParser(response.iter_lines(chunk_size=ICS_CHUNK_SIZE), skip_ended_before=now - timedelta(days=1))
+    kept = 0
+    for component in parser.events():
+        kept += component.get('dtend').dt >= now
+    response.close()
+    return kept
+
+
+def measure(label, fn, url, now):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    kept = fn(url, now)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {elapsed:7.2f} s   peak {peak / 2**20:8.1f} MiB   upcoming events {kept}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    body = synthetic_feed(n)
+    print(f"feed: {n} events, {len(body) / 2**20:.1f} MiB")
+    server, url = serve(body)
+    now = datetime.now(pytz.utc)
+    try:
+        measure('streaming', streaming, url, now)
+        measure('whole calendar', whole_calendar, url, now)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Fast-path intent classifier on the labelled French corpus (tests/fixtures/intent_corpus_fr.jsonl):
+coverage, precision and latency; with OPENAI_API_KEY set, the same corpus through the LLM path.
+
+    python -m benchmarks.bench_intent_fast_path
+"""
+import json
+import os
+import time
+from app.config import Config
+from app.services.intent_classifier import FastIntentClassifier
+from app.services.nlp_service import NLPService
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests', 'fixtures', 'intent_corpus_fr.jsonl')
+
+
+def main():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    answered = correct = 0
+    t0 = time.perf_counter()
+    for example in corpus:
+        result = FastIntentClassifier.classify(example['text'], example['state'])
+        if result:
+            answered += 1
+            correct += result[0] == example['intent'] and example['slots'].items() <= result[1].items()
+    fast_ms = (time.perf_counter() - t0) * 1000 / len(corpus)
+    print(f"fast path: coverage {answered}/{len(corpus)}, precision {correct}/{answered}, {fast_ms:.3f} ms/message")
+
+    if not Config.OPENAI_API_KEY:
+        print("llm path: skipped (OPENAI_API_KEY not set)")
+        return
+
+    llm_correct = 0
+    t0 = time.perf_counter()
+    for example in corpus:
+        state = example['state'] or {}
+        history = [{"role": "assistant", "content": json.dumps(state)}] if state else None
+        intent, _ = NLPService.parse_intent(example['text'], history=history, state=state, fast_path=False)
+        llm_correct += intent == example['intent']
+    llm_ms = (time.perf_counter() - t0) * 1000 / len(corpus)
+    print(f"llm path: accuracy {llm_correct}/{len(corpus)}, {llm_ms:.0f} ms/message")
+    print(f"estimated latency saved per fast-path hit: {llm_ms - fast_ms:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
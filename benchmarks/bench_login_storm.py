@@ -0,0 +1,104 @@
+"""
+Latency of an authenticated API call (stand-in for chat traffic, no LLM involved) while a storm
+of logins hits the same threaded server: hashing inline in each request thread against the
+bounded hashing pool (PASSWORD_HASH_WORKERS / PASSWORD_HASH_QUEUE_LIMIT).
+
+    python -m benchmarks.bench_login_storm [storm_threads] [seconds]   # default 32 threads, 5 s
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import logging
+import jwt
+import requests
+from werkzeug.serving import make_server
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import User
+from app.services.password_service import PasswordService
+
+
+def run_scenario(label, workers, storm_threads, seconds, db_path):
+    class StormConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        CACHE_SIGNAL_DIR = None
+        BACKGROUND_JOBS_ENABLED = False
+        CHAT_CONTEXT_BACKEND = 'memory'
+        PASSWORD_HASH_WORKERS = workers
+        LOGIN_RATE_LIMIT_PER_ADDRESS = 10 ** 9
+
+    app = create_app(StormConfig)
+    with app.app_context():
+        user = User.query.filter_by(username='storm').first()
+        token = jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm="HS256")
+    PasswordService.reset()
+    PasswordService._executor = None  # pool sized for this scenario
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    stop = threading.Event()
+    logins = {'ok': 0, 'rejected': 0}
+
+    def storm():
+        session = requests.Session()
+        while not stop.is_set():
+            r = session.post(f'{base}/api/auth/login', json={'username': 'storm', 'password': 'password'})
+            logins['ok' if r.status_code == 200 else 'rejected'] += 1
+            if r.status_code in (429, 503):
+                stop.wait(float(r.headers.get('Retry-After', 1)))  # well-behaved client
+
+    storm_pool = [threading.Thread(target=storm, daemon=True) for _ in range(storm_threads)]
+    for t in storm_pool:
+        t.start()
+
+    probe = requests.Session()
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        probe.get(f'{base}/api/bookings/my_bookings', headers={'Authorization': f'Bearer {token}'})
+        latencies.append((time.perf_counter() - t0) * 1000)
+    stop.set()
+    for t in storm_pool:
+        t.join()
+    server.shutdown()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<22} api p50 {statistics.median(latencies):7.1f} ms   p99 {p99:8.1f} ms   "
+          f"logins ok {logins['ok']:5d}  rejected {logins['rejected']:5d}")
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    storm_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'storm.db')
+
+        class SetupConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+            CACHE_SIGNAL_DIR = None
+
+        app = create_app(SetupConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(username='storm', email='storm@test.com',
+                                password_hash=generate_password_hash('password', method=Config.PASSWORD_HASH_METHOD)))
+            db.session.commit()
+
+        print(f"{storm_threads} login threads, {Config.PASSWORD_HASH_METHOD}, {os.cpu_count()} CPUs")
+        run_scenario('no storm', Config.PASSWORD_HASH_WORKERS, 0, seconds, db_path)
+        run_scenario('storm, inline hashing', 0, storm_threads, seconds, db_path)
+        run_scenario('storm, hashing pool', Config.PASSWORD_HASH_WORKERS, storm_threads, seconds, db_path)
+
+
+if __name__ == '__main__':
+    main()
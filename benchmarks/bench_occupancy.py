@@ -0,0 +1,84 @@
+"""
+Availability reads through the in-memory occupancy index against the SQL path, at
+10k rooms x 100k confirmed bookings over the indexed window (defaults).
+
+    python -m benchmarks.bench_occupancy [rooms] [bookings]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.extensions import db, occupancy, room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from benchmarks._common import BenchConfig, bench_app, QueryCounter, timed
+
+
+class IndexConfig(BenchConfig):
+    OCCUPANCY_INDEX_ENABLED = True
+    OCCUPANCY_INDEX_CHECK_INTERVAL = 3600  # single process: no other writer to watch
+
+
+def populate(n_rooms, n_bookings, today, days):
+    rng = random.Random(42)
+    db.session.add(User(username='bench', email='bench@gbook.com'))
+    db.session.execute(insert(Room), [
+        {'name': f"Room {i}", 'capacity': rng.choice([2, 4, 6, 8, 12, 20, 50]), 'equipment': [], 'is_active': True}
+        for i in range(n_rooms)
+    ])
+    # Non-overlapping slots: each room gets its share of the bookings on a 30-minute grid
+    per_room = n_bookings // n_rooms
+    rows = []
+    for room_id in range(1, n_rooms + 1):
+        slots = rng.sample([(d, h) for d in range(days) for h in range(16, 38)], per_room)
+        for day, half_hour in slots:
+            start = today + timedelta(days=day, minutes=30 * half_hour)
+            rows.append({'user_id': 1, 'room_id': room_id, 'start_time': start, 'end_time': start + timedelta(minutes=30),
+                         'status': 'confirmed', 'attendees_count': 1})
+    for i in range(0, len(rows), 20000):
+        db.session.execute(insert(Booking), rows[i:i + 20000])
+    db.session.commit()
+    return len(rows)
+
+
+def main():
+    n_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_bookings = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    rng = random.Random(1)
+
+    with bench_app(IndexConfig) as app:
+        count = populate(n_rooms, n_bookings, today, IndexConfig.OCCUPANCY_INDEX_DAYS)
+        room_catalog.all()
+        t0 = time.perf_counter()
+        BookingService.check_availability(1, today, today + timedelta(hours=1))  # loads the index
+        print(f"{n_rooms} rooms, {count} bookings; index loaded in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        def slot():
+            start = today + timedelta(days=rng.randint(1, 6), hours=rng.randint(8, 17))
+            return start, start + timedelta(hours=1)
+
+        state = app.extensions['occupancy']
+        scenarios = [
+            ('check_availability', lambda: BookingService.check_availability(rng.randint(1, n_rooms), *slot()), 200),
+            ('find_potential_rooms', lambda: BookingService.find_potential_rooms(*slot(), 4), 20),
+            ('smaller_room_available', lambda: BookingService.smaller_room_available(*slot(), 1, 6), 50),
+            ('get_availabilities (1 day)', lambda: BookingService.get_availabilities((today + timedelta(days=2)).strftime('%Y-%m-%d')), 3),
+        ]
+        print(f"{'':<28} {'index ms':>9} {'queries':>8} {'sql ms':>9} {'queries':>8}")
+        for name, fn, repeat in scenarios:
+            with QueryCounter(db.engine) as index_queries:
+                fn()
+            index_ms = timed(fn, repeat=repeat)
+            state.enabled = False
+            with QueryCounter(db.engine) as sql_queries:
+                fn()
+            sql_ms = timed(fn, repeat=repeat)
+            state.enabled = True
+            print(f"{name:<28} {index_ms:>9.3f} {index_queries.count:>8} {sql_ms:>9.3f} {sql_queries.count:>8}")
+        print(f"index stats: {occupancy.stats()}")
+
+
+if __name__ == '__main__':
+    main()
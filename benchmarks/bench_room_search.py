@@ -0,0 +1,65 @@
+"""
+Room search scaling: query count and latency of BookingService.find_potential_rooms
+as the room inventory grows.
+
+    python -m benchmarks.bench_room_search
+"""
+import random
+from datetime import datetime, timedelta
+from app.extensions import db, room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from benchmarks._common import bench_app, QueryCounter, timed
+
+ROOM_COUNTS = [10, 100, 500, 2000]
+EQUIPMENT = ["projector", "whiteboard", "tv", "desk"]
+
+
+def populate(n_rooms, day):
+    rng = random.Random(n_rooms)
+    user = User(username='bench', email='bench@gbook.com')
+    db.session.add(user)
+    rooms = [
+        Room(name=f"Room {i}", capacity=rng.choice([2, 4, 6, 8, 12, 20, 50]),
+             equipment=rng.sample(EQUIPMENT, rng.randint(0, 3)))
+        for i in range(n_rooms)
+    ]
+    db.session.add_all(rooms)
+    db.session.flush()
+    bookings = []
+    for room in rooms:
+        for hour in rng.sample(range(8, 18), 3):
+            start = day.replace(hour=hour)
+            bookings.append(Booking(user_id=user.id, room_id=room.id, start_time=start,
+                                    end_time=start + timedelta(hours=1), attendees_count=1))
+    db.session.add_all(bookings)
+    db.session.commit()
+
+
+def legacy_search(start, end, attendees, required_equipment):
+    """Previous implementation: Python filtering + one availability query per capable room."""
+    rooms = Room.query.filter(Room.capacity >= attendees, Room.is_active == True).all()
+    rooms = [r for r in rooms if r.equipment and all(req in r.equipment for req in required_equipment)]
+    return [r for r in rooms if BookingService.check_availability(r.id, start, end)]
+
+
+def main():
+    day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    start, end = day.replace(hour=10), day.replace(hour=11)
+    print(f"{'rooms':>6} {'queries':>8} {'median ms':>10} {'legacy queries':>15} {'legacy ms':>10}")
+    for n_rooms in ROOM_COUNTS:
+        with bench_app() as app:
+            populate(n_rooms, day)
+            search = lambda: BookingService.find_potential_rooms(start, end, 4, required_equipment=["projector"])
+            legacy = lambda: legacy_search(start, end, 4, ["projector"])
+            room_catalog.all()  # warm the room catalog, as in a long-running worker
+            with QueryCounter(db.engine) as counter:
+                search()
+            with QueryCounter(db.engine) as legacy_counter:
+                legacy()
+            print(f"{n_rooms:>6} {counter.count:>8} {timed(search):>10.2f} "
+                  f"{legacy_counter.count:>15} {timed(legacy, repeat=3):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Multi-room free-slot search: "the earliest 45-minute slot tomorrow in a room with a
+projector for 8 people", through the NumPy slot grid against the Python scan of
+get_availabilities, as the room inventory grows (about 8 bookings per room and day).
+
+    python -m benchmarks.bench_slot_search
+"""
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.extensions import db, room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.services.slot_search import SlotSearchService
+from benchmarks._common import bench_app, timed
+
+ROOM_COUNTS = [100, 1000, 5000]
+EQUIPMENT = ["projector", "whiteboard", "tv", "desk"]
+DURATION = timedelta(minutes=45)
+
+
+def populate(n_rooms, day):
+    rng = random.Random(n_rooms)
+    db.session.add(User(username='bench', email='bench@gbook.com'))
+    db.session.execute(insert(Room), [
+        {'name': f"Room {i}", 'capacity': rng.choice([2, 4, 6, 8, 12, 20, 50]),
+         'equipment': rng.sample(EQUIPMENT, rng.randint(0, 3)), 'is_active': True}
+        for i in range(n_rooms)
+    ])
+    rows = []
+    for room_id in range(1, n_rooms + 1):
+        for half_hour in sorted(rng.sample(range(16, 38), 8)):
+            start = day + timedelta(minutes=30 * half_hour)
+            rows.append({'user_id': 1, 'room_id': room_id, 'start_time': start, 'end_time': start + timedelta(minutes=30),
+                         'status': 'confirmed', 'attendees_count': 1})
+    db.session.execute(insert(Booking), rows)
+    db.session.commit()
+    room_catalog.invalidate()
+
+
+def scan_availabilities(day):
+    """Earliest fit from get_availabilities: every room's free slots, scanned in Python."""
+    by_name = {r.name: r for r in room_catalog.active(8)}
+    best = None
+    for item in BookingService.get_availabilities(day.strftime('%Y-%m-%d'), min_capacity=8):
+        if 'projector' not in by_name[item['room_name']].equipment_set:
+            continue
+        for slot in item['slots']:
+            start = datetime.combine(day.date(), datetime.strptime(slot['start'], '%H:%M').time())
+            end = datetime.combine(day.date(), datetime.strptime(slot['end'], '%H:%M').time())
+            if end - start >= DURATION and (best is None or start < best):
+                best = start
+    return best
+
+
+def grid_search(day):
+    grid = SlotSearchService.grid(day.date(), attendees=8, equipment=['projector'])
+    return SlotSearchService.earliest_fits(grid, DURATION)[0]['start']
+
+
+def main():
+    day = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+    print(f"{'rooms':>6} {'scan ms':>9} {'grid ms':>9} {'all ms':>9} {'common ms':>10}")
+    for n_rooms in ROOM_COUNTS:
+        with bench_app():
+            populate(n_rooms, day)
+            assert scan_availabilities(day) == grid_search(day)
+            scan_ms = timed(lambda: scan_availabilities(day), repeat=5)
+            grid_ms = timed(lambda: grid_search(day), repeat=5)
+            grid = SlotSearchService.grid(day.date(), attendees=8, equipment=['projector'])
+            all_ms = timed(lambda: SlotSearchService.all_fits(grid, DURATION), repeat=5)
+            common_ms = timed(lambda: SlotSearchService.common_free_windows(grid, DURATION, min_rooms=10), repeat=5)
+            print(f"{n_rooms:>6} {scan_ms:>9.1f} {grid_ms:>9.1f} {all_ms:>9.1f} {common_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
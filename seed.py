@@ -1,18 +1,21 @@
 from app import create_app, db
+from app.extensions import room_catalog
 from app.models import User, Room, Event
-from werkzeug.security import generate_password_hash
+from app.migrations import upgrade
+from app.services.password_service import PasswordService
 
 app = create_app()
 
 with app.app_context():
     db.create_all()
+    upgrade()  # indexes added since an existing database was created
     
     # Create Admin
     if not User.query.filter_by(username='admin').first():
         admin = User(
             username='admin',
             email='admin@gbook.com',
-            password_hash=generate_password_hash('password', method='pbkdf2:sha256'),
+            password_hash=PasswordService.hash_password('password'),
             role='admin'
         )
         db.session.add(admin)
@@ -33,4 +36,5 @@ with app.app_context():
             print(f"Room {room.name} created.")
             
     db.session.commit()
+    room_catalog.invalidate()  # running workers reload the room list
     print("Database seeded successfully.")
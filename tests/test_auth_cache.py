@@ -0,0 +1,97 @@
+import time
+import jwt
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import principals
+from app.models import User
+from app.config import TestingConfig
+
+def make_app(tmp_path):
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        CACHE_SIGNAL_DIR = str(tmp_path / 'signals')
+        AUTH_CACHE_CHECK_INTERVAL = 0
+    return create_app(SharedConfig)
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two apps sharing one database and one signal directory, like two gunicorn workers."""
+    worker_a, worker_b = make_app(tmp_path), make_app(tmp_path)
+    with worker_a.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@test.com', role='admin')
+        alice = User(username='alice', email='alice@test.com')
+        db.session.add_all([admin, alice])
+        db.session.commit()
+        tokens = {u.username: jwt.encode({'user_id': u.id}, worker_a.config['SECRET_KEY'], algorithm="HS256")
+                  for u in (admin, alice)}
+        ids = {'admin': admin.id, 'alice': alice.id}
+    yield worker_a, worker_b, tokens, ids
+    with worker_a.app_context():
+        db.drop_all()
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def user_queries(app, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        fn()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return sum(1 for s in statements if 'FROM users' in s)
+
+def test_principal_is_cached_per_token(workers):
+    worker_a, _, tokens, _ = workers
+    client = worker_a.test_client()
+
+    first = user_queries(worker_a, lambda: client.get('/api/bookings/my_bookings', headers=bearer(tokens['alice'])))
+    again = user_queries(worker_a, lambda: [client.get('/api/bookings/my_bookings', headers=bearer(tokens['alice'])) for _ in range(5)])
+    assert (first, again) == (1, 0)
+
+    with worker_a.app_context():
+        stats = principals.stats()
+    assert stats['hits'] == 5 and stats['misses'] == 1
+    assert stats['avg_decode_ms'] is not None
+
+def test_invalid_tokens_are_rejected(workers):
+    worker_a, _, _, ids = workers
+    client = worker_a.test_client()
+    assert client.get('/api/bookings/my_bookings').status_code == 401
+    assert client.get('/api/bookings/my_bookings', headers=bearer('not-a-jwt')).status_code == 401
+    expired = jwt.encode({'user_id': ids['alice'], 'exp': int(time.time()) - 10}, worker_a.config['SECRET_KEY'], algorithm="HS256")
+    assert client.get('/api/bookings/my_bookings', headers=bearer(expired)).status_code == 401
+
+def test_cache_entry_never_outlives_the_token(workers):
+    worker_a, _, _, ids = workers
+    exp = int(time.time()) + 5
+    token = jwt.encode({'user_id': ids['alice'], 'exp': exp}, worker_a.config['SECRET_KEY'], algorithm="HS256")
+    with worker_a.app_context():
+        principals.authenticate(token)
+        assert worker_a.extensions['principals'].entries[token][1] == exp
+
+def test_admin_changes_invalidate_every_worker(workers):
+    worker_a, worker_b, tokens, ids = workers
+    # Alice is cached as a plain user on worker B
+    assert worker_b.test_client().get('/api/admin/metrics', headers=bearer(tokens['alice'])).status_code == 403
+
+    response = worker_a.test_client().put(f"/api/admin/users/{ids['alice']}", json={'role': 'admin'}, headers=bearer(tokens['admin']))
+    assert response.status_code == 200
+    metrics = worker_b.test_client().get('/api/admin/metrics', headers=bearer(tokens['alice']))
+    assert metrics.status_code == 200
+    assert metrics.get_json()['auth']['invalidations'] == 0  # counted on worker A
+
+    worker_a.test_client().delete(f"/api/admin/users/{ids['alice']}", headers=bearer(tokens['admin']))
+    assert worker_b.test_client().get('/api/bookings/my_bookings', headers=bearer(tokens['alice'])).status_code == 401
+
+def test_calendar_settings_refresh_cached_ics_url(workers):
+    worker_a, _, tokens, _ = workers
+    client = worker_a.test_client()
+    assert client.get('/api/calendar/settings', headers=bearer(tokens['alice'])).get_json() == {'ics_url': None}
+    client.post('/api/calendar/settings', json={'ics_url': 'http://calendar.test/alice.ics'}, headers=bearer(tokens['alice']))
+    assert client.get('/api/calendar/settings', headers=bearer(tokens['alice'])).get_json() == {'ics_url': 'http://calendar.test/alice.ics'}
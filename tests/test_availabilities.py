@@ -0,0 +1,119 @@
+import json
+import jwt
+import pytest
+from datetime import datetime, date, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.config import Config, TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def init_data(app):
+    user = User(username='test', email='test@test.com', role='user')
+    rooms = [Room(name=f'Room {i}', capacity=4 + i) for i in range(5)]
+    db.session.add(user)
+    db.session.add_all(rooms)
+    db.session.commit()
+    return user, rooms
+
+def tomorrow(hour, minute=0):
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+def book(user, room, start, end, status='confirmed'):
+    db.session.add(Booking(user_id=user.id, room_id=room.id, start_time=start, end_time=end, status=status))
+
+def test_free_slots_are_the_gaps_between_bookings(app, init_data):
+    user, rooms = init_data
+    book(user, rooms[0], tomorrow(9), tomorrow(10))
+    book(user, rooms[0], tomorrow(9, 30), tomorrow(11))
+    book(user, rooms[0], tomorrow(14), tomorrow(15), status='cancelled')
+    book(user, rooms[1], tomorrow(7), tomorrow(12))
+    db.session.commit()
+
+    result = BookingService.get_availabilities(tomorrow(0).strftime("%Y-%m-%d"))
+    by_room = {item['room_name']: item['slots'] for item in result}
+
+    assert by_room['Room 0'] == [{"start": "08:00", "end": "09:00"}, {"start": "11:00", "end": "19:00"}]
+    assert by_room['Room 1'] == [{"start": "12:00", "end": "19:00"}]
+    assert by_room['Room 2'] == [{"start": "08:00", "end": "19:00"}]
+    assert all(item['date'] == tomorrow(0).date().isoformat() for item in result)
+
+def test_min_capacity_filters_rooms(app, init_data):
+    result = BookingService.get_availabilities(tomorrow(0).isoformat(), min_capacity=7)
+    assert [item['room_name'] for item in result] == ['Room 3', 'Room 4']
+
+def test_range_costs_constant_queries(app, init_data):
+    user, rooms = init_data
+    for day in range(7):
+        for room in rooms:
+            start = tomorrow(10) + timedelta(days=day)
+            book(user, room, start, start + timedelta(hours=1))
+    db.session.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = BookingService.get_availabilities(tomorrow(0).strftime("%Y-%m-%d"), days=7)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 2
+    assert len(result) == 7 * len(rooms)
+    assert {item['date'] for item in result} == {(tomorrow(0) + timedelta(days=d)).date().isoformat() for d in range(7)}
+    assert all(item['slots'] == [{"start": "08:00", "end": "10:00"}, {"start": "11:00", "end": "19:00"}] for item in result)
+
+def test_iteration_streams_room_chunks(app, init_data):
+    user, rooms = init_data
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    items = BookingService.iter_availabilities(tomorrow(0).date(), tomorrow(0).date() + timedelta(days=2), chunk_size=2)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        first = next(items)
+        first_queries = len(statements)
+        rest = list(items)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert (first['room_id'], first['room_name']) == (rooms[0].id, 'Room 0')
+    assert first_queries <= 2  # catalog load + the first chunk's bookings
+    assert len(statements) == first_queries + 2  # one more lookup per further chunk of rooms
+    assert len(rest) + 1 == 3 * len(rooms)
+
+def test_availability_endpoint_streams_ndjson(app, init_data, monkeypatch):
+    user, rooms = init_data
+    # A Monday whose weekend is entirely in the future
+    soon = date.today() + timedelta(days=3)
+    monday = soon + timedelta(days=(7 - soon.weekday()) % 7)
+    rooms[4].equipment = ['Projector']
+    book(user, rooms[4], datetime.combine(monday, datetime.min.time()).replace(hour=8), datetime.combine(monday, datetime.min.time()).replace(hour=12))
+    db.session.commit()
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    client = app.test_client()
+
+    query = f"from={monday - timedelta(days=2)}&to={monday}&min_capacity=5&equipment=projector"
+    response = client.get(f'/api/bookings/availability?{query}', headers=headers)
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(item['room_name'], item['date']) for item in lines] == [
+        ('Room 4', (monday - timedelta(days=2)).isoformat()), ('Room 4', (monday - timedelta(days=1)).isoformat()),
+        ('Room 4', monday.isoformat())]
+    assert lines[-1]['slots'] == [{"start": "12:00", "end": "19:00"}]
+
+    monkeypatch.setattr(Config, 'AVAILABILITY_SKIP_WEEKENDS', True)
+    lines = client.get(f'/api/bookings/availability?{query}', headers=headers).get_data(as_text=True).splitlines()
+    assert [json.loads(line)['date'] for line in lines] == [monday.isoformat()]
+
+    for bad in ('from=2030-01-10&to=2030-01-01', 'from=2030-01-01&to=2030-06-01', 'from=someday', 'min_capacity=x'):
+        assert client.get(f'/api/bookings/availability?{bad}', headers=headers).status_code == 400
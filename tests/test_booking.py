@@ -1,6 +1,8 @@
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import event
 from app import create_app, db
+from app.extensions import room_catalog
 from app.models import User, Room, Booking
 from app.services.booking_service import BookingService
 from app.config import TestingConfig
@@ -71,3 +73,34 @@ def test_optimization_rule_allowed_if_no_choice(app, init_data):
     # Small is taken, so Large is the only choice. Should be allowed.
     booking = BookingService.create_booking(user, room_large.id, start, end, "Solo Work", 1)
     assert booking.id is not None
+
+def test_optimization_rule_costs_one_query(app, init_data):
+    """The rule is one EXISTS query, or none when the caller passes the rooms it found free."""
+    user, room_small, room_large = init_data
+    start = datetime.now().replace(hour=15, minute=0)
+    end = start + timedelta(hours=1)
+    room_large = room_catalog.get(room_large.id)  # snapshot, as create_booking passes it
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert BookingService.validate_booking_rules(room_large, 1, start, end)[0] is False
+        assert len(statements) == 1 and 'EXISTS' in statements[0]
+
+        statements.clear()
+        candidates = [room_large]  # small room not free according to the caller
+        assert BookingService.validate_booking_rules(room_large, 1, start, end, candidates=candidates) == (True, "OK")
+        assert statements == []
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+def test_optimization_rule_ignores_the_modified_booking(app, init_data):
+    """Moving a solo booking from the small room to the large one: the small room it frees counts."""
+    user, room_small, room_large = init_data
+    start = datetime.now().replace(hour=16, minute=0)
+    end = start + timedelta(hours=1)
+    booking = BookingService.create_booking(user, room_small.id, start, end, "Solo", 1)
+
+    with pytest.raises(ValueError, match="Optimization Violation"):
+        BookingService.update_booking(booking.id, user.id, room_id=room_large.id)
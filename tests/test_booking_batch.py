@@ -0,0 +1,124 @@
+import jwt
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def data(app):
+    alice = User(username='alice', email='alice@test.com')
+    rooms = [Room(name='Focus', capacity=2), Room(name='Alpha', capacity=8), Room(name='Auditorium', capacity=50)]
+    db.session.add_all([alice] + rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    # Next Tuesday, 10:00
+    today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    tuesday = today + timedelta(days=(1 - today.weekday()) % 7 or 7)
+    return alice, [r.id for r in rooms], tuesday
+
+def headers(app, user):
+    return {'Authorization': f"Bearer {jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+
+def weekly(room_id, tuesday, weeks, **extra):
+    return dict({'room_id': room_id, 'start_time': tuesday.isoformat(), 'end_time': (tuesday + timedelta(hours=2)).isoformat(),
+                 'frequency': 'weekly', 'count': weeks, 'attendees': 6, 'title': 'Training'}, **extra)
+
+def test_weekly_recurrence_reports_conflicts_per_item(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    db.session.add(Booking(user_id=alice.id, room_id=alpha, start_time=tuesday + timedelta(weeks=4, hours=1),
+                           end_time=tuesday + timedelta(weeks=4, hours=3)))
+    db.session.commit()
+
+    response = app.test_client().post('/api/bookings/batch', json={'recurrence': weekly(alpha, tuesday, 12)}, headers=headers(app, alice))
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['created'] == 11
+    assert [r['status'] for r in body['results']] == ['created'] * 4 + ['conflict'] + ['created'] * 7
+    created = [r['booking'] for r in body['results'] if r['status'] == 'created']
+    assert all(datetime.fromisoformat(b['start_time']).weekday() == 1 and b['title'] == 'Training' for b in created)
+    assert Booking.query.filter_by(room_id=alpha, title='Training').count() == 11
+
+def test_atomic_batch_creates_nothing_on_failure(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    db.session.add(Booking(user_id=alice.id, room_id=alpha, start_time=tuesday + timedelta(weeks=2), end_time=tuesday + timedelta(weeks=2, hours=1)))
+    db.session.commit()
+    client = app.test_client()
+
+    response = client.post('/api/bookings/batch', json={'recurrence': weekly(alpha, tuesday, 4), 'atomic': True}, headers=headers(app, alice))
+    assert response.status_code == 409
+    assert [r['status'] for r in response.get_json()['results']] == ['aborted', 'aborted', 'conflict', 'aborted']
+    assert Booking.query.count() == 1
+
+    # The write lock was released: a later batch goes through
+    response = client.post('/api/bookings/batch', json={'recurrence': weekly(auditorium, tuesday, 4), 'atomic': True}, headers=headers(app, alice))
+    assert response.status_code == 201 and response.get_json()['created'] == 4
+
+def test_items_are_checked_against_each_other(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    at = lambda hours: (tuesday + timedelta(hours=hours)).isoformat()
+    items = [
+        {'room_id': alpha, 'start_time': at(0), 'end_time': at(1), 'attendees': 4},
+        {'room_id': alpha, 'start_time': at(0.5), 'end_time': at(1.5), 'attendees': 4},   # overlaps the first one
+        {'room_id': 999, 'start_time': at(0), 'end_time': at(1)},
+        {'room_id': focus, 'start_time': at(0), 'end_time': at(1), 'attendees': 5},       # too small
+        {'room_id': alpha, 'start_time': at(12), 'end_time': at(13)},                     # 22:00: outside working hours
+        {'room_id': auditorium, 'start_time': at(2), 'end_time': at(3), 'attendees': 1},  # Focus is free: too big
+        {'room_id': focus, 'start_time': at(4), 'end_time': at(5), 'attendees': 1},
+        {'room_id': auditorium, 'start_time': at(4), 'end_time': at(5), 'attendees': 1},  # Focus taken by the item above
+    ]
+    results = BookingService.create_bookings(alice, [
+        dict(item, start_time=datetime.fromisoformat(item['start_time']), end_time=datetime.fromisoformat(item['end_time']))
+        for item in items])
+    assert [r['status'] for r in results] == ['created', 'conflict', 'invalid', 'invalid', 'invalid', 'invalid', 'created', 'created']
+    assert 'Smaller rooms' in results[5]['error'] and 'capacity' in results[3]['error']
+
+    response = app.test_client().post('/api/bookings/batch', json={'bookings': items[:2]}, headers=headers(app, alice))
+    assert response.status_code == 409 and response.get_json()['created'] == 0
+
+def test_offsets_are_converted_to_local_time(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    aware = tuesday.astimezone()  # same instant, with the local offset
+    item = {'room_id': alpha, 'start_time': aware.isoformat(), 'end_time': (aware + timedelta(hours=1)).isoformat(), 'attendees': 4}
+
+    response = app.test_client().post('/api/bookings/batch', json={'bookings': [item]}, headers=headers(app, alice))
+    assert response.status_code == 201
+    assert datetime.fromisoformat(response.get_json()['results'][0]['booking']['start_time']) == tuesday
+
+def test_batch_cost_does_not_grow_with_its_size(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    counts = []
+    for room_id, weeks in ((alpha, 3), (auditorium, 12)):
+        items = BookingService.recurring_items([room_id], tuesday, tuesday + timedelta(hours=1), count=weeks, attendees=6)
+        alice.id, room_catalog.all()  # loaded before counting (user expired by the previous commit)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            results = BookingService.create_bookings(alice, items)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert all(r['status'] == 'created' for r in results)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+def test_batch_payload_errors(app, data):
+    alice, (focus, alpha, auditorium), tuesday = data
+    client = app.test_client()
+    for payload in ({}, {'bookings': []}, {'recurrence': weekly(alpha, tuesday, 12, frequency='monthly')},
+                    {'recurrence': weekly(alpha, tuesday, 201)}, {'recurrence': weekly(alpha, tuesday, 10 ** 9)},
+                    {'recurrence': weekly(None, tuesday, 101, room_ids=[alpha, focus])}, {'bookings': [{'room_id': alpha}]},
+                    {'recurrence': weekly(alpha, tuesday, 2, start_time='soon')}):
+        assert client.post('/api/bookings/batch', json=payload, headers=headers(app, alice)).status_code == 400
@@ -0,0 +1,105 @@
+import jwt
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Room, Booking, Event
+from app.services.booking_service import BookingService
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def data(app):
+    alice = User(username='alice', email='alice@test.com')
+    bob = User(username='bob', email='bob@test.com')
+    room = Room(name='Alpha', capacity=4)
+    db.session.add_all([alice, bob, room])
+    db.session.commit()
+
+    base = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    bookings = []
+    for day in range(30):  # a recurring reservation, each with its calendar event
+        start = base + timedelta(days=day)
+        booking = Booking(user_id=alice.id, room_id=room.id, start_time=start, end_time=start + timedelta(hours=1), title='Daily')
+        db.session.add(booking)
+        db.session.flush()
+        db.session.add(Event(uid=f'daily-{day}', user_id=alice.id, summary='Daily', location='Alpha', booking_id=booking.id,
+                             start_time=start, end_time=start + timedelta(hours=1)))
+        bookings.append(booking)
+    other = Booking(user_id=bob.id, room_id=room.id, start_time=base - timedelta(hours=2), end_time=base - timedelta(hours=1))
+    db.session.add(other)
+    db.session.commit()
+    return alice, bob, [b.id for b in bookings], base, other.id
+
+def statements_during(fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return result, statements
+
+def test_cancel_all_uses_two_statements(app, data):
+    alice, _, booking_ids, _, other_id = data
+    user_id = alice.id
+    (success, message, count), statements = statements_during(lambda: BookingService.cancel_all_bookings(user_id))
+
+    assert success and count == 30 and message == "30 réservations annulées."
+    assert len(statements) == 2  # whatever the number of bookings
+    assert Booking.query.filter(Booking.id.in_(booking_ids), Booking.status == 'cancelled').count() == 30
+    assert db.session.get(Booking, other_id).status == 'confirmed'
+    assert Event.query.filter(Event.booking_id != None).count() == 0
+    assert {e.location for e in Event.query.all()} == {""}
+
+    assert BookingService.cancel_all_bookings(alice.id) == (False, "Aucune réservation à annuler.", 0)
+
+def test_cancel_selected_ids_and_range(app, data):
+    alice, bob, booking_ids, base, other_id = data
+    # Other users' ids are ignored
+    assert BookingService.cancel_bookings(alice.id, booking_ids=booking_ids[:3] + [other_id]) == 3
+    assert db.session.get(Booking, other_id).status == 'confirmed'
+
+    # First week only
+    assert BookingService.cancel_bookings(alice.id, start=base, end=base + timedelta(days=7)) == 4
+    assert Booking.query.filter_by(user_id=alice.id, status='confirmed').count() == 23
+
+def test_batch_endpoint(app, data):
+    alice, _, booking_ids, base, _ = data
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': alice.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+
+    response = client.delete('/api/bookings/batch', headers=headers, json={'booking_ids': booking_ids[:2]})
+    assert response.status_code == 200 and response.get_json()['count'] == 2
+
+    response = client.delete('/api/bookings/batch', headers=headers, json={
+        'start': (base + timedelta(days=10)).isoformat(), 'end': (base + timedelta(days=20)).isoformat()})
+    assert response.get_json()['count'] == 10
+
+    assert client.delete('/api/bookings/batch', headers=headers, json={'booking_ids': 'all'}).status_code == 400
+    assert client.delete('/api/bookings/batch', headers=headers, json={'start': 'tomorrow'}).status_code == 400
+
+    # No body: every remaining future booking
+    response = client.delete('/api/bookings/batch', headers=headers)
+    assert response.status_code == 200 and response.get_json()['count'] == 18
+    response = client.delete('/api/bookings/batch', headers=headers)
+    assert response.status_code == 400 and response.get_json()['count'] == 0
+
+def test_cancel_single_booking_unlinks_its_event(app, data):
+    alice, bob, booking_ids, _, _ = data
+    assert BookingService.cancel_booking(booking_ids[0], bob.id) == (False, "Unauthorized.")
+    assert BookingService.cancel_booking(booking_ids[0], alice.id) == (True, "Booking cancelled successfully.")
+    assert db.session.get(Booking, booking_ids[0]).status == 'cancelled'
+    assert Event.query.filter_by(uid='daily-0').one().booking_id is None
@@ -0,0 +1,109 @@
+import random
+import sqlite3
+import time
+import jwt
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService, BookingConflictError
+from app.config import Config, TestingConfig
+
+@pytest.fixture
+def app(tmp_path):
+    # File database: every request thread gets its own connection, as in production
+    class StressConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 16, 'max_overflow': 16}
+    app = create_app(StressConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def setup(app):
+    users = [User(username=f'user{i}', email=f'user{i}@test.com') for i in range(8)]
+    room = Room(name='Focus', capacity=4)
+    db.session.add_all(users + [room])
+    db.session.commit()
+    room_catalog.invalidate()
+    tokens = [jwt.encode({'user_id': u.id}, app.config['SECRET_KEY'], algorithm="HS256") for u in users]
+    return room.id, tokens
+
+def overlapping_pairs(room_id):
+    bookings = Booking.query.filter_by(room_id=room_id, status='confirmed').order_by(Booking.start_time).all()
+    return [(a.id, b.id) for a, b in zip(bookings, bookings[1:]) if b.start_time < a.end_time]
+
+def test_parallel_posts_never_double_book(app, setup, monkeypatch):
+    room_id, tokens = setup
+    # Widen the window between the availability check and the insert, as a loaded server would
+    rules = BookingService.validate_booking_rules
+    def slow_rules(*args, **kwargs):
+        time.sleep(0.002)
+        return rules(*args, **kwargs)
+    monkeypatch.setattr(BookingService, 'validate_booking_rules', staticmethod(slow_rules))
+    day = (datetime.now() + timedelta(days=7)).replace(hour=9, minute=0, second=0, microsecond=0)
+    rng = random.Random(42)
+    # 200 requests over a handful of overlapping slots (15-minute grid, 30 to 90 minutes long)
+    requests_ = []
+    for i in range(200):
+        start = day + timedelta(minutes=15 * rng.randrange(0, 12))
+        end = start + timedelta(minutes=rng.choice([30, 60, 90]))
+        requests_.append((tokens[i % len(tokens)], start, end))
+
+    def post(item):
+        token, start, end = item
+        response = app.test_client().post('/api/bookings/', headers={'Authorization': f'Bearer {token}'}, json={
+            'room_id': room_id, 'start_time': start.isoformat(), 'end_time': end.isoformat(), 'attendees': 2
+        })
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        statuses = list(pool.map(post, requests_))
+
+    assert set(statuses) <= {201, 409}
+    assert statuses.count(201) >= 1
+    assert overlapping_pairs(room_id) == []
+    assert Booking.query.count() == statuses.count(201)
+
+def test_conflicts_are_reported_as_409(app, setup):
+    room_id, tokens = setup
+    start = (datetime.now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+    payload = {'room_id': room_id, 'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat(), 'attendees': 2}
+    client = app.test_client()
+    assert client.post('/api/bookings/', headers={'Authorization': f'Bearer {tokens[0]}'}, json=payload).status_code == 201
+    response = client.post('/api/bookings/', headers={'Authorization': f'Bearer {tokens[1]}'}, json=payload)
+    assert response.status_code == 409
+    assert 'already booked' in response.get_json()['error']
+
+    # Still a ValueError for callers that only know about those
+    user = db.session.get(User, 1)
+    with pytest.raises(ValueError):
+        BookingService.create_booking(user, room_id, start, start + timedelta(hours=1), "Again", 2)
+    with pytest.raises(BookingConflictError):
+        BookingService.create_booking(user, room_id, start, start + timedelta(hours=1), "Again", 2)
+
+def test_busy_write_lock_is_a_conflict(app, setup, tmp_path, monkeypatch):
+    room_id, _ = setup
+    monkeypatch.setattr(Config, 'BOOKING_LOCK_RETRIES', 1)
+    monkeypatch.setattr(Config, 'BOOKING_LOCK_BACKOFF', 0.01)
+    start = (datetime.now() + timedelta(days=7)).replace(hour=11, minute=0, second=0, microsecond=0)
+    user = db.session.get(User, 1)
+    db.session.commit()
+    db.session.connection().exec_driver_sql('PRAGMA busy_timeout = 50')
+
+    # Another process holds the write lock past the busy timeout and the retries
+    other = sqlite3.connect(str(tmp_path / 'gbook.db'), isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(BookingConflictError, match="concurrente"):
+            BookingService.create_booking(user, room_id, start, start + timedelta(hours=1), "Locked", 2)
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+    assert Booking.query.count() == 0
+    assert BookingService.create_booking(user, room_id, start, start + timedelta(hours=1), "Free", 2).id
@@ -0,0 +1,118 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import scheduler
+from app.models import User, Room, Booking, BookingArchive, Event
+from app.services.booking_service import BookingService
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def bookings(app):
+    user = User(username='alice', email='alice@test.com')
+    room = Room(name='Alpha', capacity=4)
+    db.session.add_all([user, room])
+    db.session.commit()
+    now = datetime.now()
+
+    def booking(offset_hours, status='confirmed'):
+        start = now + timedelta(hours=offset_hours)
+        b = Booking(user_id=user.id, room_id=room.id, start_time=start, end_time=start + timedelta(hours=1),
+                    title=f'{status} {offset_hours}', status=status)
+        db.session.add(b)
+        return b
+
+    expired = [booking(-h) for h in (48, 24, 3)]
+    cancelled = booking(5, status='cancelled')
+    upcoming = [booking(2), booking(26)]
+    db.session.commit()
+    db.session.add(Event(uid='past-meeting', user_id=user.id, summary='Past', booking_id=expired[0].id,
+                         start_time=expired[0].start_time, end_time=expired[0].end_time))
+    db.session.commit()
+    return user, expired, cancelled, upcoming
+
+def test_get_user_bookings_is_read_only(app, bookings):
+    user, expired, _, upcoming = bookings
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = BookingService.get_user_bookings(user.id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert [b.id for b in result] == [b.id for b in upcoming]
+    assert writes == []
+    assert Booking.query.count() == 6  # expired ones are left to the retention job
+
+def test_archive_moves_expired_and_cancelled_bookings(app, bookings):
+    user, expired, cancelled, upcoming = bookings
+    moved_ids = sorted([b.id for b in expired] + [cancelled.id])
+
+    result = BookingService.archive_bookings()
+    assert result['archived'] == 4 and result['complete']
+
+    assert sorted(b.id for b in Booking.query.all()) == sorted(b.id for b in upcoming)
+    archived = {a.booking_id: a for a in BookingArchive.query.all()}
+    assert sorted(archived) == moved_ids
+    assert archived[cancelled.id].status == 'cancelled'
+    assert archived[expired[0].id].title == 'confirmed -48' and archived[expired[0].id].archived_at
+    # Calendar events no longer point to a deleted booking
+    assert Event.query.filter_by(uid='past-meeting').one().booking_id is None
+
+    assert BookingService.archive_bookings()['archived'] == 0
+
+def test_reused_booking_ids_are_archived_again(app, bookings):
+    user, expired, cancelled, upcoming = bookings
+    room_id = expired[0].room_id
+    for booking in upcoming:
+        db.session.delete(booking)
+    db.session.commit()
+    BookingService.archive_bookings()
+    assert Booking.query.count() == 0
+
+    # Empty table: SQLite gives the next booking an id already in the archive
+    start = datetime.now() - timedelta(hours=5)
+    reused = Booking(user_id=user.id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=1))
+    db.session.add(reused)
+    db.session.commit()
+    assert BookingArchive.query.filter_by(booking_id=reused.id).count() == 1
+
+    assert BookingService.archive_bookings()['archived'] == 1
+    assert BookingArchive.query.filter_by(booking_id=reused.id).count() == 2
+
+def test_archive_runs_in_bounded_batches(app, bookings):
+    result = BookingService.archive_bookings(batch_size=1, max_batches=3)
+    assert (result['archived'], result['batches'], result['complete']) == (3, 3, False)
+
+    result = BookingService.archive_bookings(batch_size=1, max_batches=3)
+    assert (result['archived'], result['complete']) == (1, True)
+    assert BookingArchive.query.count() == 4
+
+def test_old_archives_are_purged(app, bookings):
+    oldest_id = bookings[1][0].id
+    BookingService.archive_bookings()
+    BookingArchive.query.filter_by(booking_id=oldest_id).one().archived_at = datetime.utcnow() - timedelta(days=400)
+    db.session.commit()
+
+    app.config['BOOKING_ARCHIVE_MAX_AGE_DAYS'] = 365
+    assert BookingService.archive_bookings()['purged'] == 1
+    assert BookingArchive.query.count() == 3
+
+def test_retention_is_a_scheduled_job(app, bookings):
+    result = scheduler.run_job('booking_retention')
+    assert result['archived'] == 4
+    assert scheduler.stats()['jobs']['booking_retention']['last_result']['archived'] == 4
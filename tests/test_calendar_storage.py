@@ -4,9 +4,12 @@ from app import create_app, db
 from app.models.user import User
 from app.models.event import Event
 from app.services.calendar_service import CalendarService
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
+# Synced events must end in the future, so the fixture date is relative to today
+EVENT_DAY = (datetime.utcnow() + timedelta(days=30)).strftime('%Y%m%d')
+
 class TestCalendarStorage(unittest.TestCase):
     def setUp(self):
         self.app = create_app()
@@ -24,22 +27,25 @@ class TestCalendarStorage(unittest.TestCase):
     @patch('app.services.calendar_service.requests.get')
     def test_fetch_and_store_events(self, mock_get):
         # Mock ICS content
-        ics_content = b"""BEGIN:VCALENDAR
+        ics_content = f"""BEGIN:VCALENDAR
 VERSION:2.0
 PRODID:-//Google Inc//Google Calendar 70.9054//EN
 BEGIN:VEVENT
-DTSTART:20251225T100000Z
-DTEND:20251225T110000Z
+DTSTART:{EVENT_DAY}T100000Z
+DTEND:{EVENT_DAY}T110000Z
 DTSTAMP:20251211T120000Z
 UID:test-uid-123
 SUMMARY:Test Meeting
 LOCATION:Room A
 DESCRIPTION:This is a test meeting
 END:VEVENT
-END:VCALENDAR"""
+END:VCALENDAR""".encode()
 
         mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.content = ics_content
+        mock_response.iter_lines.side_effect = lambda **kwargs: iter(mock_response.content.splitlines())
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
 
@@ -64,12 +70,12 @@ END:VCALENDAR"""
         
         # Test Update
         # Change summary in ICS
-        ics_content_updated = b"""BEGIN:VCALENDAR
+        ics_content_updated = f"""BEGIN:VCALENDAR
 VERSION:2.0
 PRODID:-//Google Inc//Google Calendar 70.9054//EN
 BEGIN:VEVENT
-DTSTART:20251225T100000Z
-DTEND:20251225T110000Z
+DTSTART:{EVENT_DAY}T100000Z
+DTEND:{EVENT_DAY}T110000Z
 DTSTAMP:20251211T120000Z
 UID:test-uid-123
 SUMMARY:Updated Meeting
@@ -77,7 +83,7 @@ LOCATION:Room A
 DESCRIPTION:This is a test meeting
 ATTENDEE;CUTYPE=INDIVIDUAL;ROLE=REQ-PARTICIPANT;PARTSTAT=NEEDS-ACTION;RSVP=TRUE;CN=Test User;X-NUM-GUESTS=0:mailto:test@example.com
 END:VEVENT
-END:VCALENDAR"""
+END:VCALENDAR""".encode()
         mock_response.content = ics_content_updated
         
         CalendarService.sync_user_events(user)
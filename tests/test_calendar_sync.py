@@ -0,0 +1,193 @@
+import threading
+import time
+import jwt
+import pytest
+from sqlalchemy import event
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app import create_app, db
+from app.extensions import scheduler
+from app.models import User, Event
+from app.models.calendar_sync_state import CalendarSyncState
+from app.services.calendar_service import CalendarService
+from app.config import TestingConfig
+
+def ics_feed(events):
+    """VCALENDAR with one VEVENT per (uid, summary), all in three days."""
+    start = (datetime.utcnow() + timedelta(days=3)).replace(hour=10, minute=0, second=0, microsecond=0)
+    fmt = '%Y%m%dT%H%M%SZ'
+    body = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//GBook tests//EN\r\n"
+    for uid, summary in events:
+        body += (
+            "BEGIN:VEVENT\r\n"
+            f"UID:{uid}\r\nDTSTART:{start.strftime(fmt)}\r\nDTEND:{(start + timedelta(hours=1)).strftime(fmt)}\r\n"
+            f"SUMMARY:{summary}\r\n"
+            "END:VEVENT\r\n"
+        )
+    return (body + "END:VCALENDAR\r\n").encode()
+
+def ics_fixture(summary, uid='sync-uid-0'):
+    return ics_feed([(uid, summary)])
+
+class ICSFeeds(BaseHTTPRequestHandler):
+    """Serves `server.feeds[path]` with an ETag and honours If-None-Match."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.log.append((self.path, self.headers.get('If-None-Match')))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            body = server.feeds[self.path]
+            etag = f'"{hash(body) & 0xffffffff:x}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/calendar')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Mon, 12 Oct 2026 08:00:00 GMT')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+@pytest.fixture
+def ics_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ICSFeeds)
+    server.lock = threading.Lock()
+    server.log, server.active, server.max_active, server.delay = [], 0, 0, 0
+    server.feeds = {f'/user{i}.ics': ics_fixture(f'Réunion {i}', uid=f'sync-uid-{i}') for i in range(4)}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def app(tmp_path):
+    # File database: sync runs in worker threads with their own connections
+    class SyncConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        CALENDAR_SYNC_PER_HOST = 1
+        CALENDAR_SYNC_CHECK_INTERVAL = 3600
+    app = create_app(SyncConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        if scheduler.is_running(app):
+            scheduler.stop(app)
+        db.session.remove()
+        db.drop_all()
+
+def add_user(name, ics_url):
+    user = User(username=name, email=f'{name}@test.com', ics_url=ics_url)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def test_unchanged_feed_is_not_downloaded_again(app, ics_server):
+    user = add_user('alice', f'{ics_server.base_url}/user0.ics')
+
+    assert CalendarService.sync_user_events(user)['inserted'] == 1
+    state = db.session.get(CalendarSyncState, user.id)
+    assert state.last_status == 'updated'
+    assert state.etag and state.last_modified
+    assert [e['summary'] for e in CalendarService.get_stored_events(user)] == ['Réunion 0']
+
+    assert CalendarService.sync_user_events(user)['status'] == 'not_modified'
+    assert ics_server.log[-1] == ('/user0.ics', state.etag)
+    assert state.last_status == 'not_modified'
+    assert Event.query.count() == 1
+
+    # Changed feed: full download and update
+    ics_server.feeds['/user0.ics'] = ics_fixture('Réunion déplacée')
+    assert CalendarService.sync_user_events(user)['updated'] == 1
+    assert state.last_status == 'updated'
+    assert [e['summary'] for e in CalendarService.get_stored_events(user)] == ['Réunion déplacée']
+
+def test_new_url_drops_previous_validators(app, ics_server):
+    user = add_user('alice', f'{ics_server.base_url}/user0.ics')
+    CalendarService.sync_user_events(user)
+
+    user.ics_url = f'{ics_server.base_url}/user1.ics'
+    db.session.commit()
+    CalendarService.sync_user_events(user)
+    assert ics_server.log[-1] == ('/user1.ics', None)
+
+def test_due_feeds_respect_per_host_limit(app, ics_server):
+    ics_server.delay = 0.05
+    for i in range(4):
+        add_user(f'user{i}', f'{ics_server.base_url}/user{i}.ics')
+    add_user('nofeed', None)
+
+    summary = scheduler.run_job('calendar_sync')
+    assert (summary['due'], summary['ok'], summary['failed'], summary['inserted']) == (4, 4, 0, 4)
+    assert ics_server.max_active == 1
+    assert Event.query.count() == 4
+
+    # Nothing is due until CALENDAR_SYNC_INTERVAL has elapsed
+    assert scheduler.run_job('calendar_sync')['due'] == 0
+    later = datetime.utcnow() + timedelta(seconds=app.config['CALENDAR_SYNC_INTERVAL'] + 1)
+    assert CalendarService.sync_due_users(now=later)['due'] == 4
+
+def test_bulk_upsert_counts_and_query_count(app, ics_server):
+    events = [(f'bulk-{i}', f'Réunion {i}') for i in range(200)]
+    ics_server.feeds['/bulk.ics'] = ics_feed(events)
+    user = add_user('alice', f'{ics_server.base_url}/bulk.ics')
+    assert CalendarService.sync_user_events(user)['inserted'] == 200
+
+    # One changed, one removed, one added, the rest untouched
+    events[0] = ('bulk-0', 'Réunion renommée')
+    del events[1]
+    events.append(('bulk-new', 'Nouvelle réunion'))
+    ics_server.feeds['/bulk.ics'] = ics_feed(events)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        counts = CalendarService.sync_user_events(user)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert {k: counts[k] for k in ('inserted', 'updated', 'unchanged', 'deleted')} == \
+        {'inserted': 1, 'updated': 1, 'unchanged': 198, 'deleted': 1}
+    assert counts['duration_ms'] >= 0
+    assert sum(1 for st in statements if st.lstrip().upper().startswith('SELECT') and 'FROM events' in st) == 1
+    assert Event.query.count() == 200
+    assert db.session.query(Event.summary).filter_by(uid='bulk-0').scalar() == 'Réunion renommée'
+
+    # Same content again: answered by the ETag, nothing parsed
+    assert CalendarService.sync_user_events(user)['status'] == 'not_modified'
+
+def test_unreachable_feed_is_recorded_and_rescheduled(app):
+    user = add_user('alice', 'http://127.0.0.1:9/closed.ics')
+    assert CalendarService.sync_user_events(user) is False
+    state = db.session.get(CalendarSyncState, user.id)
+    assert state.last_status == 'error'
+    assert state.next_sync_at > datetime.utcnow()
+
+def test_events_endpoint_serves_stored_events(app, ics_server):
+    user = add_user('alice', f'{ics_server.base_url}/user0.ics')
+    CalendarService.sync_user_events(user)
+    token = jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm="HS256")
+    fetches = len(ics_server.log)
+
+    scheduler.start(app)
+    response = app.test_client().get('/api/calendar/events', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert [e['summary'] for e in response.get_json()] == ['Réunion 0']
+    assert response.headers['X-Calendar-Last-Synced'].endswith('Z')
+    assert response.headers['X-Calendar-Sync-Status'] == 'updated'
+    assert len(ics_server.log) == fetches  # no fetch in the request thread
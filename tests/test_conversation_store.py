@@ -0,0 +1,135 @@
+import json
+import time
+import jwt
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import conversations
+from app.models import User
+from app.config import TestingConfig
+from app.services.conversation_store import ConversationStore, MemoryConversationStore, SQLConversationStore
+
+def test_memory_store_lru_eviction():
+    store = MemoryConversationStore(max_entries=2, ttl_seconds=60)
+    for user_id in (1, 2, 3):
+        store.save(user_id, {'messages': [], 'slots': {'attendees': user_id}, 'intent': None})
+
+    assert store.load(1) == {'messages': [], 'slots': {}, 'intent': None}
+    assert store.load(3)['slots'] == {'attendees': 3}
+    metrics = store.metrics()
+    assert metrics['entries'] == 2
+    assert metrics['evictions_lru'] == 1
+    assert metrics['bytes'] > 0
+
+def test_memory_store_ttl_expiry():
+    store = MemoryConversationStore(max_entries=10, ttl_seconds=0)
+    store.save(1, {'messages': [{'role': 'user', 'content': 'bonjour'}], 'slots': {}, 'intent': None})
+    time.sleep(0.01)
+
+    assert store.load(1)['messages'] == []
+    assert store.metrics()['evictions_ttl'] == 1
+
+def test_memory_store_returns_copies():
+    store = MemoryConversationStore()
+    store.save(1, {'messages': [], 'slots': {}, 'intent': None})
+    store.load(1)['messages'].append('unsaved')
+    assert store.load(1)['messages'] == []
+
+def test_incomplete_store_fails_when_created():
+    class NoMetrics(ConversationStore):
+        load = save = delete = lambda self, *args: None
+
+    with pytest.raises(TypeError):
+        NoMetrics()
+
+def make_app(tmp_path):
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        CHAT_CONTEXT_BACKEND = 'sql'
+    return create_app(SharedConfig)
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two apps sharing one database, like two gunicorn workers."""
+    worker_a, worker_b = make_app(tmp_path), make_app(tmp_path)
+    with worker_a.app_context():
+        db.create_all()
+        user = User(username='test', email='test@test.com')
+        db.session.add(user)
+        db.session.commit()
+        token = jwt.encode({'user_id': user.id}, worker_a.config['SECRET_KEY'], algorithm="HS256")
+    yield worker_a, worker_b, {'Authorization': f'Bearer {token}'}
+    with worker_a.app_context():
+        db.drop_all()
+
+def fake_stream(context_text, action_data=None, on_complete=None):
+    yield json.dumps({"type": "delta", "content": "Pour combien de personnes ?"}) + "\n"
+    on_complete("Pour combien de personnes ?")
+
+def test_follow_up_message_keeps_slots_across_workers(workers):
+    worker_a, worker_b, headers = workers
+    slots = {'start_time': '2030-01-07T10:00:00', 'duration_minutes': 60, 'attendees': None}
+
+    with patch('app.api.routes.chat.NLPService.parse_intent', return_value=('BOOK_INTENT', slots)), \
+         patch('app.api.routes.chat.NLPService.generate_response_stream', side_effect=fake_stream):
+        res = worker_a.test_client().post('/api/chat/message', json={'message': 'Une salle lundi 10h pour 1h'}, headers=headers)
+        res.get_data()
+
+    seen_history = []
+    def parse_intent(text, history=None, state=None):
+        seen_history.extend(history)
+        return 'UNKNOWN', {}
+
+    with patch('app.api.routes.chat.NLPService.parse_intent', side_effect=parse_intent), \
+         patch('app.api.routes.chat.NLPService.generate_response_stream', side_effect=fake_stream):
+        worker_b.test_client().post('/api/chat/message', json={'message': '4'}, headers=headers).get_data()
+        history = seen_history
+
+    assert [m['role'] for m in history] == ['user', 'assistant', 'assistant']
+    assert history[-1]['content'] == 'Pour combien de personnes ?'
+    with worker_b.app_context():
+        context = conversations.load(1)
+        assert context['slots'] == slots
+        assert len(context['messages']) == 6
+
+    worker_b.test_client().delete('/api/chat/context', headers=headers)
+    with worker_a.app_context():
+        assert conversations.load(1)['messages'] == []
+
+def test_sql_store_expires_and_reports_metrics(workers):
+    worker_a, _, _ = workers
+    with worker_a.app_context():
+        store = SQLConversationStore(ttl_seconds=3600)
+        store.save(1, {'messages': ['a'], 'slots': {}, 'intent': None})
+        assert store.metrics()['entries'] == 1
+
+        expired = SQLConversationStore(ttl_seconds=0)
+        time.sleep(0.01)
+        assert expired.load(1)['messages'] == []
+        assert expired.metrics()['evictions_ttl'] == 1
+        assert expired.metrics()['entries'] == 0
+
+def test_sql_store_save_is_a_single_upsert(workers):
+    worker_a, worker_b, _ = workers
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    engines = []
+    for worker in workers[:2]:
+        with worker.app_context():
+            engines.append(db.engine)
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        # First save of each worker for the same user: the second one updates the row
+        for worker, messages in ((worker_a, ['a']), (worker_b, ['b'])):
+            with worker.app_context():
+                conversations.save(1, {'messages': messages, 'slots': {}, 'intent': None})
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+    writes = [s for s in statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE'))]
+    assert len(writes) == 2 and all('ON CONFLICT' in s for s in writes)
+    with worker_a.app_context():
+        assert conversations.load(1)['messages'] == ['b']
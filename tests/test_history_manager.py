@@ -0,0 +1,63 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from app.services.history_manager import HistoryManager
+from app.services.nlp_service import NLPService
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"message {i} " + "x" * 200})
+        messages.append({"role": "assistant", "content": json.dumps({"intent": "BOOK_INTENT", "slots": {"attendees": i}})})
+        messages.append({"role": "assistant", "content": f"réponse {i}"})
+    return messages
+
+STATE = {'intent': 'BOOK_INTENT', 'slots': {'attendees': 9, 'room_name': 'Salle Alpha'}}
+
+def test_short_history_is_sent_verbatim():
+    messages = conversation(2)
+    assert HistoryManager.window(messages, STATE, budget_tokens=10000, keep_turns=3) == messages
+
+def test_older_turns_are_replaced_by_state_summary():
+    messages = conversation(10)
+    windowed = HistoryManager.window(messages, STATE, budget_tokens=10000, keep_turns=3)
+
+    assert windowed[0]['role'] == 'system'
+    assert '"room_name": "Salle Alpha"' in windowed[0]['content']
+    assert windowed[1:] == messages[-9:]
+
+def test_budget_drops_recent_turns_until_it_fits():
+    messages = conversation(10)
+    windowed = HistoryManager.window(messages, STATE, budget_tokens=120, keep_turns=3)
+
+    assert HistoryManager.estimate_tokens(windowed) <= 120
+    assert windowed[0]['role'] == 'system'
+    assert windowed[-1] == messages[-1]
+
+def test_prompt_size_stays_flat_as_conversation_grows():
+    sizes = [HistoryManager.estimate_tokens(HistoryManager.window(conversation(n), STATE, 10000, 3)) for n in (5, 20, 80)]
+    assert sizes[0] == sizes[1] == sizes[2]
+
+def test_trim_keeps_last_turns():
+    messages = conversation(30)
+    assert HistoryManager.trim(messages, 20) == messages[-60:]
+
+def test_parse_intent_records_prompt_tokens():
+    response = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"intent": "BOOK_INTENT", "slots": {"attendees": 9}}'))],
+        usage=SimpleNamespace(prompt_tokens=1234)
+    )
+    client = MagicMock()
+    client.chat.completions.create.return_value = response
+    before = HistoryManager.stats()
+
+    with patch.object(NLPService, 'get_client', return_value=client):
+        intent, slots = NLPService.parse_intent("plutôt la salle Beta, avec un projecteur", history=conversation(40), state=STATE)
+
+    after = HistoryManager.stats()
+    sent = client.chat.completions.create.call_args.kwargs['messages']
+    assert intent == 'BOOK_INTENT'
+    assert len(sent) == 1 + 1 + 9 + 1  # system prompt, summary, 3 turns, current message
+    assert after['calls'] == before['calls'] + 1
+    assert after['api_prompt_tokens'] == before['api_prompt_tokens'] + 1234
+    assert after['saved_tokens'] > before['saved_tokens']
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from app.services.ics_stream import ICSStreamParser
+
+FEED = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VTIMEZONE\r
+TZID:GBook Custom\r
+BEGIN:STANDARD\r
+DTSTART:19700101T000000\r
+TZOFFSETFROM:+0300\r
+TZOFFSETTO:+0300\r
+END:STANDARD\r
+END:VTIMEZONE\r
+BEGIN:VEVENT\r
+UID:past\r
+DTSTART:20200101T100000Z\r
+DTEND:20200101T110000Z\r
+SUMMARY:Old meeting\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:weekly\r
+DTSTART:20200106T090000Z\r
+DTEND:20200106T093000Z\r
+RRULE:FREQ=WEEKLY\r
+SUMMARY:Standup\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:future\r
+DTSTART;TZID=GBook Custom:20300101T100000\r
+DTEND;TZID=GBook Custom:20300101T110000\r
+SUMMARY:A long summary that the server folded over\r
+  two lines\r
+BEGIN:VALARM\r
+ACTION:DISPLAY\r
+TRIGGER:-PT10M\r
+END:VALARM\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+def parse(cutoff=None):
+    parser = ICSStreamParser(iter(FEED.splitlines(keepends=True)), skip_ended_before=cutoff)
+    return parser, {str(e.get('uid')): e for e in parser.events()}
+
+def test_yields_every_event_without_cutoff():
+    parser, events = parse()
+    assert list(events) == ['past', 'weekly', 'future']
+    assert parser.stats() == {'parsed': 3, 'skipped': 0}
+
+def test_skips_ended_events_but_keeps_recurring_ones():
+    parser, events = parse(cutoff=datetime(2026, 1, 1))
+    assert list(events) == ['weekly', 'future']
+    assert parser.stats() == {'parsed': 2, 'skipped': 1}
+
+def test_unfolds_lines_and_resolves_custom_timezones():
+    _, events = parse(cutoff=datetime(2026, 1, 1))
+    future = events['future']
+    assert str(future.get('summary')) == 'A long summary that the server folded over two lines'
+    assert future.get('dtstart').dt.utcoffset() == timedelta(hours=3)
+    assert [c.name for c in future.subcomponents] == ['VALARM']
@@ -0,0 +1,43 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from app.services.intent_classifier import FastIntentClassifier
+from app.services.nlp_service import NLPService
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'intent_corpus_fr.jsonl')
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_fast_path_never_disagrees_with_labels():
+    """Precision must be perfect: anything uncertain has to be left to the LLM."""
+    answered = 0
+    for example in load_corpus():
+        result = FastIntentClassifier.classify(example['text'], example['state'])
+        if result is None:
+            continue
+        answered += 1
+        intent, slots = result
+        assert intent == example['intent'], example['text']
+        assert example['slots'].items() <= slots.items(), example['text']
+    assert answered >= 30
+
+@pytest.mark.parametrize('text', ["Bonjour, je voudrais réserver une salle demain", "10h", "Annule ma réservation de demain"])
+def test_uncertain_messages_fall_back_to_llm(text):
+    state = {"intent": "BOOK_INTENT", "slots": {"start_time": None, "attendees": None, "duration_minutes": None}}
+    assert FastIntentClassifier.classify(text, state) is None
+
+def test_numeric_answer_returns_full_state():
+    state = {"intent": "BOOK_INTENT", "slots": {"start_time": "2030-01-07T10:00:00", "attendees": None, "duration_minutes": 60, "equipment": ["tv"]}}
+    intent, slots = FastIntentClassifier.classify("6", state)
+    assert intent == 'BOOK_INTENT'
+    assert slots == dict(state['slots'], attendees=6)
+
+def test_parse_intent_skips_llm_on_fast_path_hit():
+    before = FastIntentClassifier.stats()
+    with patch.object(NLPService, 'get_client') as get_client:
+        assert NLPService.parse_intent("Bonjour !") == ('GREETING', {})
+    get_client.assert_not_called()
+    assert FastIntentClassifier.stats()['hits'] == before['hits'] + 1
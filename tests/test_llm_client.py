@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from app.config import Config
+from app.services.llm_client import LLMClientManager
+from app.services.nlp_service import NLPService
+
+class StubChatCompletions(BaseHTTPRequestHandler):
+    """Minimal stand-in for POST /v1/chat/completions (JSON and SSE streaming)."""
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests += 1
+            server.client_ports.add(self.client_address[1])
+            fail = server.failures_left > 0
+            server.failures_left -= fail
+
+        if fail:
+            self._send(503, 'application/json', b'{"error": {"message": "overloaded"}}')
+        elif body.get('stream'):
+            events = [{"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": body['model'],
+                       "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}]}
+                      for part in ("Bonjour ", "!")]
+            payload = ''.join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+            self._send(200, 'text/event-stream', payload.encode())
+        else:
+            content = json.dumps({"intent": "QUERY_AVAILABILITY", "slots": {"attendees": 3}})
+            completion = {"id": "c1", "object": "chat.completion", "created": 0, "model": body['model'],
+                          "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                          "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}}
+            self._send(200, 'application/json', json.dumps(completion).encode())
+
+    def _send(self, status, content_type, payload):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubChatCompletions)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.client_ports = set()
+    server.failures_left = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(Config, 'OPENAI_BASE_URL', f"http://127.0.0.1:{server.server_port}/v1"), \
+         patch.object(Config, 'OPENAI_API_KEY', 'test-key'), \
+         patch.object(Config, 'OPENAI_RETRY_BACKOFF', 0.01):
+        LLMClientManager.reset()
+        yield server
+        LLMClientManager.reset()
+    server.shutdown()
+    server.server_close()
+
+def test_client_and_connections_are_reused(stub_server):
+    for i in range(5):
+        intent, slots = NLPService.parse_intent(f"dispo demain pour {i} personnes ?", fast_path=False)
+        assert (intent, slots) == ("QUERY_AVAILABILITY", {"attendees": 3})
+    chunks = [json.loads(line) for line in NLPService.generate_response_stream("Free-form situation")]
+
+    assert ''.join(c['content'] for c in chunks if c['type'] == 'delta') == "Bonjour !"
+    assert NLPService.get_client() is NLPService.get_client()
+    assert stub_server.requests == 6
+    assert len(stub_server.client_ports) == 1  # one keep-alive connection served every call
+
+def test_transient_errors_are_retried(stub_server):
+    stub_server.failures_left = 2
+    assert NLPService.parse_intent("dispo demain ?", fast_path=False)[0] == "QUERY_AVAILABILITY"
+    assert stub_server.requests == 3
+
+def test_retries_are_bounded(stub_server):
+    stub_server.failures_left = 10
+    with patch.object(Config, 'OPENAI_MAX_RETRIES', 1):
+        assert NLPService.parse_intent("dispo demain ?", fast_path=False)[0] == "API_ERROR"
+    assert stub_server.requests == 2
+
+def test_backoff_has_jitter_and_cap():
+    delays = [LLMClientManager.backoff_delay(10) for _ in range(50)]
+    assert max(delays) <= Config.OPENAI_RETRY_MAX_BACKOFF
+    assert len(set(delays)) > 1
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+def test_forked_child_builds_its_own_client(stub_server):
+    parent_client = NLPService.get_client()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child
+        os.close(read_fd)
+        fresh = LLMClientManager._client is None and NLPService.get_client() is not parent_client
+        os.write(write_fd, b'1' if fresh else b'0')
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b'1'
+    os.close(read_fd)
+    assert NLPService.get_client() is parent_client
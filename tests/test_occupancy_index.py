@@ -0,0 +1,196 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import occupancy, room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.services.occupancy_index import Interval, SortedIntervals
+from app.config import TestingConfig
+
+def make_app(tmp_path):
+    class IndexConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        CACHE_SIGNAL_DIR = str(tmp_path / 'signals')
+        OCCUPANCY_INDEX_ENABLED = True
+        OCCUPANCY_INDEX_DAYS = 7
+        OCCUPANCY_INDEX_CHECK_INTERVAL = 0
+    return create_app(IndexConfig)
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def data(app):
+    rng = random.Random(7)
+    user = User(username='alice', email='alice@test.com')
+    rooms = [Room(name=f'Room {i}', capacity=rng.choice([1, 4, 6, 10, 20])) for i in range(12)]
+    db.session.add_all([user] + rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    for room in rooms:
+        for day in range(7):
+            cursor = today + timedelta(days=day, hours=8)
+            while cursor.hour < 18:
+                cursor += timedelta(minutes=15 * rng.randint(0, 8))
+                end = cursor + timedelta(minutes=15 * rng.randint(1, 12))
+                db.session.add(Booking(user_id=user.id, room_id=room.id, start_time=cursor, end_time=end,
+                                       status=rng.choice(['confirmed'] * 4 + ['cancelled'])))
+                cursor = end
+    db.session.commit()
+    return user, rooms, today
+
+def sql_only(app, fn):
+    app.extensions['occupancy'].enabled = False
+    try:
+        return fn()
+    finally:
+        app.extensions['occupancy'].enabled = True
+
+def count_queries(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+def test_index_answers_like_sql(app, data):
+    user, rooms, today = data
+    rng = random.Random(11)
+    for _ in range(200):
+        start = today + timedelta(days=rng.randint(0, 6), hours=rng.randint(8, 18), minutes=15 * rng.randint(0, 3))
+        end = start + timedelta(minutes=15 * rng.randint(1, 16))
+        room = rng.choice(rooms)
+        assert BookingService.check_availability(room.id, start, end) == \
+            sql_only(app, lambda: BookingService.check_availability(room.id, start, end))
+        assert [r.id for r in BookingService.find_potential_rooms(start, end, 2)] == \
+            [r.id for r in sql_only(app, lambda: BookingService.find_potential_rooms(start, end, 2))]
+        assert BookingService.smaller_room_available(start, end, 1, 6) == \
+            sql_only(app, lambda: BookingService.smaller_room_available(start, end, 1, 6))
+
+    day = (today + timedelta(days=1)).strftime('%Y-%m-%d')
+    assert BookingService.get_availabilities(day, days=3) == sql_only(app, lambda: BookingService.get_availabilities(day, days=3))
+
+    stats = occupancy.stats()
+    assert stats['loads'] == 1 and stats['fallbacks'] == 0
+    assert stats['bookings'] == Booking.query.filter_by(status='confirmed').count()
+
+def test_reads_need_no_query(app, data):
+    user, rooms, today = data
+    start = today + timedelta(days=2, hours=10)
+    BookingService.check_availability(rooms[0].id, start, start + timedelta(hours=1))  # loads the index
+    room_catalog.all()
+
+    _, queries = count_queries(lambda: (
+        BookingService.check_availability(rooms[0].id, start, start + timedelta(hours=1)),
+        BookingService.find_potential_rooms(start, start + timedelta(hours=1), 3),
+        BookingService.get_availabilities((today + timedelta(days=2)).strftime('%Y-%m-%d')),
+        occupancy.free_gaps(rooms[0].id, start, start + timedelta(hours=8)),
+    ))
+    assert queries == 0
+
+def test_writes_update_the_index_in_place(app, data):
+    user, rooms, today = data
+    room = Room(name='Fresh', capacity=4)
+    db.session.add(room)
+    db.session.commit()
+    room_catalog.invalidate()
+    start = today + timedelta(days=3, hours=9)
+    assert BookingService.check_availability(room.id, start, start + timedelta(hours=1))
+    loads = occupancy.stats()['loads']
+
+    booking = BookingService.create_booking(user, room.id, start, start + timedelta(hours=1), "New", 2)
+    assert BookingService.check_availability(room.id, start, start + timedelta(hours=1)) is False
+    assert occupancy.free_gaps(room.id, start - timedelta(hours=1), start + timedelta(hours=2)) == [
+        (start - timedelta(hours=1), start), (start + timedelta(hours=1), start + timedelta(hours=2))]
+
+    BookingService.update_booking(booking.id, user.id, start_time=start + timedelta(hours=2), end_time=start + timedelta(hours=3))
+    assert BookingService.check_availability(room.id, start, start + timedelta(hours=1))
+    assert BookingService.check_availability(room.id, start + timedelta(hours=2), start + timedelta(hours=3)) is False
+    assert BookingService.check_availability(room.id, start + timedelta(hours=2), start + timedelta(hours=3), exclude_booking_id=booking.id)
+
+    BookingService.cancel_booking(booking.id, user.id)
+    assert BookingService.check_availability(room.id, start + timedelta(hours=2), start + timedelta(hours=3))
+
+    items = BookingService.recurring_items([room.id], start, start + timedelta(hours=1), frequency='daily', count=3, attendees=2)
+    assert [r['status'] for r in BookingService.create_bookings(user, items)] == ['created'] * 3
+    assert not any(BookingService.check_availability(room.id, i['start_time'], i['end_time']) for i in items)
+    assert occupancy.stats()['loads'] == loads  # no reload needed
+
+    # Bulk cancellation: reloaded
+    BookingService.cancel_all_bookings(user.id)
+    assert BookingService.find_potential_rooms(start, start + timedelta(hours=1), 1)
+    assert occupancy.stats()['loads'] == loads + 1
+    assert occupancy.stats()['bookings'] == Booking.query.filter_by(status='confirmed').count()
+
+def test_other_workers_writes_are_picked_up(tmp_path):
+    worker_a, worker_b = make_app(tmp_path), make_app(tmp_path)
+    with worker_a.app_context():
+        db.create_all()
+        user = User(username='alice', email='alice@test.com')
+        room = Room(name='Alpha', capacity=4)
+        db.session.add_all([user, room])
+        db.session.commit()
+        user_id, room_id = user.id, room.id
+    start = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1, hours=10)
+    end = start + timedelta(hours=1)
+
+    with worker_a.app_context():
+        assert BookingService.check_availability(room_id, start, end)
+    with worker_b.app_context():
+        BookingService.create_booking(db.session.get(User, user_id), room_id, start, end, "From B", 2)
+    with worker_a.app_context():
+        assert BookingService.check_availability(room_id, start, end) is False
+        assert occupancy.stats()['loads'] == 2
+        db.drop_all()
+
+def test_outside_window_falls_back_to_sql(app, data):
+    user, rooms, today = data
+    later = today + timedelta(days=30, hours=10)
+    db.session.add(Booking(user_id=user.id, room_id=rooms[0].id, start_time=later, end_time=later + timedelta(hours=1)))
+    db.session.commit()
+
+    assert BookingService.check_availability(rooms[0].id, later, later + timedelta(hours=1)) is False
+    assert occupancy.stats()['fallbacks'] == 1
+
+def test_sorted_intervals_find_long_overlaps():
+    intervals = SortedIntervals()
+    base = datetime(2030, 1, 1, 8)
+    intervals.add(Interval(base, base + timedelta(hours=10), 1, 1))  # long one, starts first
+    for i in range(2, 10):
+        intervals.add(Interval(base + timedelta(hours=i), base + timedelta(hours=i, minutes=30), i, 1))
+
+    found = [i.id for i in intervals.overlapping(base + timedelta(hours=9, minutes=15), base + timedelta(hours=11))]
+    assert found == [1, 9]
+    intervals.remove(1)
+    assert [i.id for i in intervals.overlapping(base + timedelta(hours=9, minutes=15), base + timedelta(hours=11))] == [9]
+    assert len(intervals) == 8
+
+def test_multi_day_bookings_do_not_widen_lookups():
+    intervals = SortedIntervals()
+    base = datetime(2030, 1, 1, 8)
+    for day in range(5):
+        for hour in range(9, 17):
+            start = base + timedelta(days=day, hours=hour - 8)
+            intervals.add(Interval(start, start + timedelta(minutes=30), day * 100 + hour, 1))
+    # 9:00 on day 1 to 17:00 on day 3
+    intervals.add(Interval(base + timedelta(hours=1), base + timedelta(days=2, hours=9), 1, 2))
+    assert intervals.longest == timedelta(minutes=30)
+
+    found = [i.id for i in intervals.overlapping(base + timedelta(days=2, hours=4), base + timedelta(days=2, hours=6))]
+    assert found == [1, 212, 213]
+    assert [i.id for i in intervals.overlapping(base + timedelta(days=4), base + timedelta(days=4, hours=1, minutes=30))] == [409]
+    assert intervals.remove(1).room_id == 2 and len(intervals) == 40
+    assert [i.id for i in intervals.overlapping(base + timedelta(days=2, hours=4), base + timedelta(days=2, hours=6))] == [212, 213]
+
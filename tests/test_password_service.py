@@ -0,0 +1,101 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User
+from app.services.password_service import PasswordService, PasswordServiceBusy, SlidingWindowLimiter
+from app.config import Config, TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='alice', email='alice@test.com',
+                            password_hash=generate_password_hash('secret', method='pbkdf2:sha256:500')))
+        db.session.commit()
+        PasswordService.reset()
+        yield app
+        PasswordService.reset()
+        db.session.remove()
+        db.drop_all()
+
+def login(client, password='secret', username='alice', address='10.0.0.1'):
+    return client.post('/api/auth/login', json={'username': username, 'password': password},
+                       environ_base={'REMOTE_ADDR': address})
+
+def test_login_upgrades_outdated_hash(app):
+    response = login(app.test_client())
+    assert response.status_code == 200 and response.get_json()['token']
+    stored = User.query.filter_by(username='alice').first().password_hash
+    assert stored.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+    assert PasswordService.stats()['rehashes'] == 1
+
+    # Already current: verified, not rehashed again
+    assert login(app.test_client()).status_code == 200
+    assert PasswordService.stats()['rehashes'] == 1
+
+def test_default_method_keeps_existing_admin_hashes(app):
+    # Accounts created before PasswordService were hashed with werkzeug's default: no login rehash
+    app.config['PASSWORD_HASH_METHOD'] = Config.PASSWORD_HASH_METHOD
+    assert not PasswordService.needs_rehash(generate_password_hash('secret'))
+
+def test_failed_attempts_per_username_are_throttled_before_hashing(app):
+    app.config['LOGIN_RATE_LIMIT_PER_USERNAME'] = 3
+    client = app.test_client()
+    for i in range(3):
+        assert login(client, password='wrong', address=f'10.0.1.{i}').status_code == 401
+    verifications = PasswordService.stats()['verifications']
+
+    response = login(client, address='10.0.2.1')  # right password, other address
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert PasswordService.stats()['verifications'] == verifications
+
+    # Other usernames are not affected
+    assert login(client, username='bob', password='x', address='10.0.2.2').status_code == 401
+
+def test_attempts_per_address_are_throttled(app):
+    app.config['LOGIN_RATE_LIMIT_PER_ADDRESS'] = 2
+    client = app.test_client()
+    assert login(client).status_code == 200
+    assert login(client).status_code == 200
+    assert login(client).status_code == 429
+    assert login(client, address='10.0.0.2').status_code == 200
+
+def test_full_queue_rejects_immediately(app):
+    app.config['PASSWORD_HASH_WORKERS'] = 1
+    app.config['PASSWORD_HASH_QUEUE_LIMIT'] = 1
+    release, started = threading.Event(), threading.Event()
+
+    def slow_check(*args):
+        started.set()
+        release.wait(5)
+        return False
+
+    with app.app_context():
+        results = []
+        def occupy():
+            with app.app_context():
+                results.append(PasswordService._run(slow_check))
+        blocker = threading.Thread(target=occupy)
+        blocker.start()
+        assert started.wait(5)
+
+        with pytest.raises(PasswordServiceBusy):
+            PasswordService.verify_password(User.query.first().password_hash, 'secret')
+        response = login(app.test_client())
+        assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+
+        release.set()
+        blocker.join()
+    assert PasswordService.stats()['rejected_busy'] == 2
+    assert login(app.test_client()).status_code == 200
+
+def test_sliding_window_limiter():
+    limiter = SlidingWindowLimiter()
+    for t in (0, 10, 20):
+        limiter.hit('k', now=t)
+    assert limiter.retry_after('k', limit=3, window=60, now=30) == 30
+    assert limiter.retry_after('k', limit=3, window=60, now=61) == 0
+    assert limiter.retry_after('other', limit=1, window=60, now=61) == 0
@@ -0,0 +1,118 @@
+import pytest
+import pytz
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from icalendar import Event as ICalEvent
+from app import create_app, db
+from app.models import User, Event
+from app.services.calendar_service import CalendarService
+from app.services.recurrence import RecurrenceExpander
+from app.config import TestingConfig
+
+FMT = '%Y%m%dT%H%M%SZ'
+NOW = datetime(2026, 3, 2, 8, 0, tzinfo=pytz.utc)  # a Monday, before the European DST switch
+
+def vevent(*lines):
+    return ICalEvent.from_ical("BEGIN:VEVENT\r\n" + "\r\n".join(lines) + "\r\nEND:VEVENT\r\n")
+
+def expand(master, overrides=(), days=60):
+    return list(RecurrenceExpander.occurrences(master, overrides, NOW, NOW + timedelta(days=days)))
+
+def test_weekly_rule_with_exdate_and_overrides():
+    master = vevent("UID:weekly", "DTSTART:20260105T100000Z", "DTEND:20260105T110000Z",
+                    "RRULE:FREQ=WEEKLY;BYDAY=MO", "EXDATE:20260309T100000Z", "SUMMARY:Point équipe")
+    moved = vevent("UID:weekly", "RECURRENCE-ID:20260316T100000Z",
+                   "DTSTART:20260317T140000Z", "DTEND:20260317T150000Z", "SUMMARY:Point équipe (décalé)")
+    cancelled = vevent("UID:weekly", "RECURRENCE-ID:20260323T100000Z",
+                       "DTSTART:20260323T100000Z", "DTEND:20260323T110000Z", "STATUS:CANCELLED")
+
+    occurrences = expand(master, [moved, cancelled], days=28)
+    assert [k.strftime(FMT) for k, *_ in occurrences] == ['20260302T100000Z', '20260316T100000Z']
+    key, component, start, end = occurrences[1]
+    assert str(component.get('summary')) == 'Point équipe (décalé)'
+    assert start == datetime(2026, 3, 17, 14, 0, tzinfo=pytz.utc)
+    assert RecurrenceExpander.occurrence_uid('weekly', key) == 'weekly::20260316T100000Z'
+    assert RecurrenceExpander.master_uid('weekly::20260316T100000Z') == 'weekly'
+
+def test_expansion_keeps_wall_clock_time_across_dst():
+    master = vevent("UID:paris", "DTSTART;TZID=Europe/Paris:20260302T090000",
+                    "DTEND;TZID=Europe/Paris:20260302T093000", "RRULE:FREQ=WEEKLY;UNTIL=20260406")
+    starts = [start.astimezone(pytz.utc).hour for _, _, start, _ in expand(master)]
+    assert starts == [8, 8, 8, 8, 7, 7]  # DST starts on March 29th; UNTIL (April 6th) is inclusive
+
+def test_rdate_only_event_and_occurrence_cap():
+    master = vevent("UID:rdate", "DTSTART:20260303T100000Z", "DTEND:20260303T110000Z",
+                    "RDATE:20260310T100000Z,20260317T100000Z")
+    assert len(expand(master)) == 3
+
+    hourly = vevent("UID:hourly", "DTSTART:20200101T090000Z", "DTEND:20200101T091500Z", "RRULE:FREQ=HOURLY")
+    assert len(list(RecurrenceExpander.occurrences(hourly, [], NOW, NOW + timedelta(days=60), max_count=50))) == 50
+
+    minutely = vevent("UID:minutely", "DTSTART:20200101T090000Z", "RRULE:FREQ=MINUTELY")
+    assert expand(minutely) == []  # rule ignored; the DTSTART itself is long past
+
+
+class FeedResponse:
+    """Streamed response double for requests.get (ETag revalidation included)."""
+    def __init__(self, feed, request_headers):
+        self.not_modified = request_headers.get('If-None-Match') == feed['etag']
+        self.status_code = 304 if self.not_modified else 200
+        self.headers = {'ETag': feed['etag']}
+        self.body = feed['body']
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, **kwargs):
+        return iter(self.body.splitlines())
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def standup_feed(etag='"v1"', with_standup=True):
+    """A daily stand-up started 400 days ago, and a one-off meeting in five days."""
+    start = (datetime.utcnow() - timedelta(days=400)).replace(hour=9, minute=0, second=0, microsecond=0)
+    body = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+    if with_standup:
+        body += ("BEGIN:VEVENT\r\nUID:standup\r\n"
+                 f"DTSTART:{start.strftime(FMT)}\r\nDTEND:{(start + timedelta(minutes=15)).strftime(FMT)}\r\n"
+                 "RRULE:FREQ=DAILY\r\nSUMMARY:Daily\r\nEND:VEVENT\r\n")
+    body += ("BEGIN:VEVENT\r\nUID:single\r\n"
+             f"DTSTART:{(start + timedelta(days=405)).strftime(FMT)}\r\nDTEND:{(start + timedelta(days=405, hours=1)).strftime(FMT)}\r\n"
+             "SUMMARY:One-off\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+    return {'etag': etag, 'body': body.encode()}
+
+def test_sync_expands_within_horizon_and_slides_incrementally(app):
+    feed = standup_feed()
+    user = User(username='alice', email='alice@test.com', ics_url='http://calendar.test/alice.ics')
+    db.session.add(user)
+    db.session.commit()
+
+    app.config['CALENDAR_RECURRENCE_HORIZON_DAYS'] = 10
+    with patch('app.services.calendar_service.requests.get', side_effect=lambda url, headers, **kw: FeedResponse(feed, headers)):
+        first = CalendarService.sync_user_events(user)
+        daily = Event.query.filter(Event.uid.like('standup::%')).count()
+        assert first['inserted'] == daily + 1
+        assert daily in (10, 11)  # today's occurrence, if not over yet, plus the next ten days
+
+        # The horizon slides: unchanged feed (304), only the new days are expanded
+        app.config['CALENDAR_RECURRENCE_HORIZON_DAYS'] = 20
+        second = CalendarService.sync_user_events(user)
+        assert second['status'] == 'not_modified'
+        assert second['inserted'] == 10 and second['deleted'] == 0
+        assert second['unchanged'] <= 1  # the occurrence at the previous horizon boundary
+
+        # A changed feed without the recurring event removes its upcoming occurrences
+        feed.update(standup_feed(etag='"v2"', with_standup=False))
+        third = CalendarService.sync_user_events(user)
+        assert third['deleted'] == daily + 10
+        assert [e.uid for e in Event.query.all()] == ['single']
@@ -0,0 +1,62 @@
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from app.services.nlp_service import NLPService
+from app.services.response_cache import ResponseCache
+
+def fake_client(text):
+    chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))]) for part in text.split('|')]
+    client = MagicMock()
+    client.chat.completions.create.side_effect = lambda **kwargs: iter(chunks)
+    return client
+
+def run(situation, action=None):
+    completed = []
+    lines = list(NLPService.generate_response_stream(situation, action, on_complete=completed.append))
+    return [json.loads(line) for line in lines], completed
+
+def test_key_extracts_template_and_params():
+    assert ResponseCache.key_for("User said something unclear.  Ask to rephrase.") == ('UNCLEAR', ())
+    assert ResponseCache.key_for("User wants to book but didn't specify la durée. Ask for it.") == ('MISSING_FIELD', ('la durée',))
+    assert ResponseCache.key_for("Found room Salle Alpha (cap 4) for 07/01 at 10:00. Ask user to confirm.") is None
+
+def test_templated_situation_is_generated_once_and_replayed_identically():
+    NLPService.response_cache.clear()
+    client = fake_client("Pouvez-vous |reformuler votre |demande ?")
+    with patch.object(NLPService, 'get_client', return_value=client):
+        live, live_completed = run("User said something unclear. Ask to rephrase.")
+        cached, cached_completed = run("User said something unclear. Ask to rephrase.", {"action_required": "noop"})
+
+    assert client.chat.completions.create.call_count == 1
+    text = lambda chunks: ''.join(c['content'] for c in chunks if c['type'] == 'delta')
+    assert text(cached) == text(live) == "Pouvez-vous reformuler votre demande ?"
+    assert cached_completed == live_completed
+    assert cached[-1] == {"type": "action", "data": {"action_required": "noop"}}
+    assert {c['type'] for c in cached[:-1]} == {'delta'}
+
+    stats = NLPService.response_cache.stats()['by_situation']['UNCLEAR']
+    assert stats['hits'] >= 1 and stats['misses'] >= 1
+
+def test_different_params_and_live_data_are_not_shared():
+    NLPService.response_cache.clear()
+    client = fake_client("Réponse")
+    with patch.object(NLPService, 'get_client', return_value=client):
+        run("User wants to book but didn't specify la durée. Ask for it.")
+        run("User wants to book but didn't specify la date/heure. Ask for it.")
+        run("Found room Salle Alpha (cap 4) for 07/01 at 10:00. Ask user to confirm.")
+        run("Found room Salle Alpha (cap 4) for 07/01 at 10:00. Ask user to confirm.")
+    assert client.chat.completions.create.call_count == 4
+
+def test_entries_expire():
+    cache = ResponseCache(max_entries=1, ttl_seconds=0)
+    cache.put(('UNCLEAR', ()), "text")
+    time.sleep(0.01)
+    assert cache.get(('UNCLEAR', ())) is None
+
+def test_lru_bound():
+    cache = ResponseCache(max_entries=1, ttl_seconds=60)
+    cache.put(('UNCLEAR', ()), "a")
+    cache.put(('GREETING', ()), "b")
+    assert cache.get(('UNCLEAR', ())) is None
+    assert cache.get(('GREETING', ())) == "b"
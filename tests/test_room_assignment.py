@@ -0,0 +1,141 @@
+import itertools
+import random
+import jwt
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.services.room_assignment import RoomAssignmentService, min_cost_assignment
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def user(app):
+    user = User(username='alice', email='alice@test.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def add_rooms(*specs):
+    rooms = [Room(name=name, capacity=capacity, equipment=equipment) for name, capacity, equipment in specs]
+    db.session.add_all(rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    return {room.name: room.id for room in rooms}
+
+def tomorrow(hour):
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+def session(hour, attendees, equipment=(), hours=1):
+    return {'start_time': tomorrow(hour), 'end_time': tomorrow(hour + hours), 'attendees': attendees, 'equipment': list(equipment)}
+
+def test_min_cost_assignment_is_optimal():
+    rng = np.random.default_rng(5)
+    for _ in range(200):
+        n = int(rng.integers(1, 6))
+        m = int(rng.integers(n, 8))
+        cost = rng.integers(-30, 30, size=(n, m)).astype(float)
+        assignment = min_cost_assignment(cost)
+        assert len(set(assignment.tolist())) == n
+        best = min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+        assert cost[np.arange(n), assignment].sum() == best
+
+def test_joint_assignment_beats_greedy_best_fit(app, user):
+    ids = add_rooms(('Small projector', 4, ['Projector']), ('Plain', 6, []))
+    sessions = [session(10, 4), session(10, 4, ['projector'])]
+
+    # One find_potential_rooms call per session: the first takes the only projector room
+    greedy = BookingService.find_potential_rooms(tomorrow(10), tomorrow(11), 4)[0]
+    assert greedy.id == ids['Small projector']
+
+    results = RoomAssignmentService.assign(sessions)
+    assert [r['room_id'] for r in results] == [ids['Plain'], ids['Small projector']]
+
+def test_assignment_is_optimal_for_simultaneous_sessions(app, user):
+    rng = random.Random(9)
+    specs = [(f'Room {i}', rng.choice([4, 6, 8, 12, 20]), rng.sample(['projector', 'tv'], rng.randint(0, 2))) for i in range(6)]
+    ids = add_rooms(*specs)
+    db.session.add(Booking(user_id=user.id, room_id=ids['Room 0'], start_time=tomorrow(10), end_time=tomorrow(11)))
+    db.session.commit()
+
+    for _ in range(5):
+        sessions = [session(10, rng.randint(2, 10), rng.sample(['projector', 'tv'], rng.randint(0, 1))) for _ in range(5)]
+        results = RoomAssignmentService.assign(sessions)
+
+        rooms = room_catalog.active()
+        def fits(s, room):
+            return (room.capacity >= s['attendees'] and BookingService.is_capacity_coherent(room.capacity, s['attendees'])
+                    and set(s['equipment']).issubset(room.equipment_set)
+                    and BookingService.check_availability(room.id, s['start_time'], s['end_time']))
+        options = [[None] + [room for room in rooms if fits(s, room)] for s in sessions]
+        best = max(((sum(r is not None for r in combo), -sum(r.capacity for r in combo if r)) for combo in itertools.product(*options)
+                    if len({r.id for r in combo if r}) == sum(r is not None for r in combo)))
+        chosen = [r for r in results if r['room_id'] is not None]
+        assert (len(chosen), -sum(r['capacity'] for r in chosen)) == best
+        assert all(fits(s, room_catalog.get(r['room_id'])) for s, r in zip(sessions, results) if r['room_id'])
+
+def test_rooms_are_reused_across_waves(app, user):
+    add_rooms(('A', 6, []), ('B', 6, []))
+    results = RoomAssignmentService.assign([session(9, 4), session(9, 4), session(10, 4), session(10, 4), session(9, 4, hours=2)])
+    assert [r['room_id'] is not None for r in results] == [True, True, True, True, False]
+    assert results[4]['error'] == "Every fitting room is taken at this time."
+    assert {r['room_id'] for r in results[:2]} == {r['room_id'] for r in results[2:4]}
+
+def test_booking_rules_are_honored(app, user):
+    ids = add_rooms(('Focus', 2, []), ('Board', 12, ['Projector']), ('Auditorium', 50, ['Projector']))
+    results = RoomAssignmentService.assign([
+        session(10, 1, ['projector']),  # Board would do, but Focus is free: single-user rule
+        session(10, 4, ['projector']),  # Auditorium is not coherent for 4 people
+        session(22, 2),                 # outside working hours
+    ])
+    assert 'Smaller rooms' in results[0]['error']
+    assert results[1]['room_id'] == ids['Board']
+    assert 'working hours' in results[2]['error']
+
+    # Focus taken by another session: the single user may now have Board
+    results = RoomAssignmentService.assign([session(10, 1, ['projector']), session(10, 2)])
+    assert [r['room_id'] for r in results] == [ids['Board'], ids['Focus']]
+
+def test_assign_endpoint_can_book(app, user):
+    ids = add_rooms(('A', 4, []), ('B', 8, []))
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    client = app.test_client()
+    payload = lambda *sessions: [dict(s, start_time=s['start_time'].isoformat(), end_time=s['end_time'].isoformat()) for s in sessions]
+
+    response = client.post('/api/bookings/assign', json={'requests': payload(session(10, 3), session(10, 6))}, headers=headers)
+    assert response.status_code == 200 and response.get_json()['assigned'] == 2
+    assert Booking.query.count() == 0
+
+    response = client.post('/api/bookings/assign', json={'requests': payload(session(10, 3), session(10, 6), session(10, 3)),
+                                                         'book': True, 'atomic': True}, headers=headers)
+    assert response.status_code == 409 and Booking.query.count() == 0
+
+    response = client.post('/api/bookings/assign', json={'requests': payload(session(10, 3), session(10, 6)), 'book': True}, headers=headers)
+    body = response.get_json()
+    assert response.status_code == 201 and body['created'] == 2
+    assert [r['booking']['room_id'] for r in body['results']] == [ids['A'], ids['B']]
+    assert client.post('/api/bookings/assign', json={'requests': []}, headers=headers).status_code == 400
+
+def test_assignment_relying_on_a_small_room_taken_in_the_batch_is_booked(app, user):
+    ids = add_rooms(('A', 6, ['Projector']), ('B', 12, []))
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    sessions = [dict(s, start_time=s['start_time'].isoformat(), end_time=s['end_time'].isoformat())
+                for s in (session(10, 1), session(10, 5, ['projector']))]
+
+    # The single user gets B because the other request needs A: booking both must not trip the rule
+    response = app.test_client().post('/api/bookings/assign', json={'requests': sessions, 'book': True, 'atomic': True}, headers=headers)
+    body = response.get_json()
+    assert response.status_code == 201 and body['created'] == 2
+    assert [r['booking']['room_id'] for r in body['results']] == [ids['B'], ids['A']]
+
@@ -0,0 +1,78 @@
+import jwt
+import pytest
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room
+from app.config import TestingConfig
+
+def make_app(tmp_path):
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'gbook.db'}"
+        CACHE_SIGNAL_DIR = str(tmp_path / 'signals')
+        ROOM_CATALOG_CHECK_INTERVAL = 0
+    return create_app(SharedConfig)
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two apps sharing one database and one signal directory, like two gunicorn workers."""
+    worker_a, worker_b = make_app(tmp_path), make_app(tmp_path)
+    with worker_a.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@test.com', role='admin')
+        db.session.add_all([admin, Room(name='Salle Été', capacity=4, equipment=['TV'])])
+        db.session.commit()
+        token = jwt.encode({'user_id': admin.id}, worker_a.config['SECRET_KEY'], algorithm="HS256")
+    yield worker_a, worker_b, {'Authorization': f'Bearer {token}'}
+    with worker_a.app_context():
+        db.drop_all()
+
+def test_catalog_precomputes_lookup_fields(workers):
+    worker_a, _, _ = workers
+    with worker_a.app_context():
+        room = room_catalog.find_by_name('salle ete')
+        assert room.name == 'Salle Été'
+        assert room.equipment_set == {'tv'}
+        assert room_catalog.get(room.id) is room
+
+def test_admin_writes_invalidate_every_worker(workers):
+    worker_a, worker_b, headers = workers
+    with worker_b.app_context():
+        assert [r.name for r in room_catalog.active()] == ['Salle Été']
+        loads = room_catalog.stats()['loads']
+        room_catalog.active()
+        assert room_catalog.stats()['loads'] == loads  # served from memory
+
+    res = worker_a.test_client().post('/api/admin/rooms', json={'name': 'Auditorium', 'capacity': 50}, headers=headers)
+    assert res.status_code == 201
+    room_id = res.get_json()['room']['id']
+
+    with worker_b.app_context():
+        assert [r.name for r in room_catalog.active()] == ['Salle Été', 'Auditorium']
+
+    worker_a.test_client().put(f'/api/admin/rooms/{room_id}', json={'is_active': False}, headers=headers)
+    with worker_b.app_context():
+        assert [r.name for r in room_catalog.active()] == ['Salle Été']
+
+    worker_a.test_client().delete(f'/api/admin/rooms/{room_id}', headers=headers)
+    with worker_b.app_context():
+        assert room_catalog.get(room_id) is None
+
+def test_lock_free_reads_see_a_consistent_snapshot(workers):
+    worker_a, _, _ = workers
+    state = worker_a.extensions['room_catalog']
+    seen = []
+
+    class Probe(type(state)):
+        def __setattr__(self, name, value):
+            super().__setattr__(name, value)
+            # What a lock-free reader would get right after this write
+            if self.snapshot is not None:
+                rooms, by_id = self.snapshot
+                seen.append(all(by_id.get(r.id) is r for r in rooms))
+
+    state.__class__ = Probe
+    with worker_a.app_context():
+        for _ in range(3):
+            room_catalog.all()
+            room_catalog.invalidate()
+    assert seen and all(seen)
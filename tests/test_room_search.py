@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking
+from app.services.booking_service import BookingService
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def user(app):
+    user = User(username='test', email='test@test.com', role='user')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def count_queries(fn):
+    statements = []
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return result, len(statements)
+
+def slot():
+    start = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(hours=1)
+
+def add_rooms(n, capacity=8, equipment=None):
+    rooms = [Room(name=f"Room {Room.query.count() + i}", capacity=capacity, equipment=equipment or []) for i in range(n)]
+    db.session.add_all(rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    return rooms
+
+def test_query_count_is_constant(app, user):
+    start, end = slot()
+    add_rooms(3, equipment=["projector"])
+    room_catalog.all()  # warm the catalog: rooms are served from memory afterwards
+    _, small_count = count_queries(lambda: BookingService.find_potential_rooms(start, end, 4, required_equipment=["projector"]))
+
+    rooms = add_rooms(50, equipment=["projector"])
+    for room in rooms[:25]:
+        db.session.add(Booking(user_id=user.id, room_id=room.id, start_time=start, end_time=end))
+    db.session.commit()
+    room_catalog.all()
+    result, large_count = count_queries(lambda: BookingService.find_potential_rooms(start, end, 4, required_equipment=["projector"]))
+
+    assert small_count == large_count == 1
+    assert len(result) == 28
+
+def test_busy_and_inactive_rooms_are_excluded(app, user):
+    start, end = slot()
+    free, busy, inactive = add_rooms(3)
+    inactive.is_active = False
+    db.session.add(Booking(user_id=user.id, room_id=busy.id, start_time=start + timedelta(minutes=30), end_time=end + timedelta(minutes=30)))
+    db.session.add(Booking(user_id=user.id, room_id=free.id, start_time=end, end_time=end + timedelta(hours=1)))
+    db.session.add(Booking(user_id=user.id, room_id=free.id, start_time=start, end_time=end, status='cancelled'))
+    db.session.commit()
+
+    assert [r.id for r in BookingService.find_potential_rooms(start, end, 2)] == [free.id]
+
+def test_exclude_booking_id_frees_its_room(app, user):
+    start, end = slot()
+    room, = add_rooms(1)
+    booking = Booking(user_id=user.id, room_id=room.id, start_time=start, end_time=end)
+    db.session.add(booking)
+    db.session.commit()
+
+    assert BookingService.find_potential_rooms(start, end, 2) == []
+    assert [r.id for r in BookingService.find_potential_rooms(start, end, 2, exclude_booking_id=booking.id)] == [room.id]
+
+def test_equipment_name_filters_and_best_fit_order(app, user):
+    start, end = slot()
+    db.session.add_all([
+        Room(name="Salle Beta", capacity=10, equipment=["Projector", "whiteboard"]),
+        Room(name="Salle Alpha", capacity=4, equipment=["tv"]),
+        Room(name="Projector Lab", capacity=6, equipment=["projectors"]),
+        Room(name="Auditorium", capacity=50, equipment=["projector"]),
+    ])
+    db.session.commit()
+
+    names = lambda rooms: [r.name for r in rooms]
+    assert names(BookingService.find_potential_rooms(start, end, 3, required_equipment=["projector"])) == ["Salle Beta"]
+    assert names(BookingService.find_potential_rooms(start, end, 3, excluded_room_names=["alpha"])) == ["Projector Lab", "Salle Beta"]
+    assert names(BookingService.find_potential_rooms(start, end, 3, preferred_room_name="auditorium")) == ["Auditorium"]
+    assert BookingService.find_potential_rooms(start, end, 3, preferred_room_name="Gamma") == []
+
+def test_good_fit_pruning_hides_oversized_rooms(app, user):
+    start, end = slot()
+    db.session.add_all([Room(name="Auditorium", capacity=50), Room(name="Salle Beta", capacity=10)])
+    db.session.commit()
+
+    assert [r.name for r in BookingService.find_potential_rooms(start, end, 3)] == ["Salle Beta"]
+    assert [r.name for r in BookingService.find_potential_rooms(start, end, 1)] == ["Salle Beta", "Auditorium"]
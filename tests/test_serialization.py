@@ -0,0 +1,92 @@
+import json
+import jwt
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking, Event
+from app.utils import serialization
+from app.config import TestingConfig
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def user(app):
+    user = User(username='alice', email='alice@test.com')
+    rooms = [Room(name='Alpha', capacity=4), Room(name='Beta', capacity=10)]
+    db.session.add_all([user] + rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    return user, rooms
+
+def add_bookings(user, rooms, count, offset=0):
+    base = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    for i in range(offset, offset + count):
+        start = base + timedelta(days=i)
+        booking = Booking(user_id=user.id, room_id=rooms[i % 2].id, start_time=start, end_time=start + timedelta(hours=1), title=f'B{i}')
+        db.session.add(booking)
+        db.session.flush()
+        # Every other event is linked to its booking
+        db.session.add(Event(uid=f'e{i}', user_id=user.id, summary=f'E{i}', booking_id=booking.id if i % 2 else None,
+                             start_time=start, end_time=start + timedelta(hours=1), location='' if i % 2 else 'Outside'))
+    db.session.commit()
+
+def count_queries(app, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return response, len(statements)
+
+@pytest.mark.parametrize('path', ['/api/bookings/my_bookings', '/api/calendar/events'])
+def test_listing_query_count_is_constant(app, user, path):
+    alice, rooms = user
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': alice.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    client = app.test_client()
+    add_bookings(alice, rooms, 2)
+    client.get(path, headers=headers)  # principal and room catalog cached
+
+    few, few_queries = count_queries(app, lambda: client.get(path, headers=headers))
+    add_bookings(alice, rooms, 40, offset=2)
+    many, many_queries = count_queries(app, lambda: client.get(path, headers=headers))
+
+    assert len(few.get_json()) == 2 and len(many.get_json()) == 42
+    assert many_queries == few_queries
+
+def test_listings_match_orm_serialization(app, user):
+    alice, rooms = user
+    add_bookings(alice, rooms, 4)
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': alice.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    client = app.test_client()
+
+    bookings = Booking.query.order_by(Booking.start_time).all()
+    assert client.get('/api/bookings/my_bookings', headers=headers).get_json() == [b.to_dict() for b in bookings]
+
+    events = client.get('/api/calendar/events', headers=headers).get_json()
+    assert [(e['summary'], e['location'], e['needs_room']) for e in events] == [
+        ('E0', 'Outside', False), ('E1', 'Beta', False), ('E2', 'Outside', False), ('E3', 'Beta', False)]
+
+    # A linked booking's room wins over the event location; no location and no booking: needs a room
+    Event.query.filter_by(uid='e0').one().location = ''
+    db.session.commit()
+    assert client.get('/api/calendar/events', headers=headers).get_json()[0]['needs_room'] is True
+
+@pytest.mark.skipif(serialization.orjson is None, reason="orjson not installed")
+def test_orjson_provider_keeps_flask_formats(app):
+    assert isinstance(app.json, serialization.OrjsonProvider)
+    payload = {'when': datetime(2025, 1, 2, 3, 4, 5), 1: 'non-str key', 'text': 'é'}
+    with app.test_request_context():
+        body = app.json.response(payload).get_data(as_text=True)
+    assert json.loads(body) == {'when': 'Thu, 02 Jan 2025 03:04:05 GMT', '1': 'non-str key', 'text': 'é'}
+    assert json.loads(app.json.dumps(payload)) == json.loads(body)
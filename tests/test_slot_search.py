@@ -0,0 +1,141 @@
+import random
+from urllib.parse import quote
+import jwt
+import pytest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.extensions import room_catalog
+from app.models import User, Room, Booking
+from app.services.slot_search import SlotSearchService
+from app.config import TestingConfig
+
+STEP = timedelta(minutes=TestingConfig.SLOT_SEARCH_GRANULARITY)
+PER_DAY = (TestingConfig.WORKING_HOURS_END - TestingConfig.WORKING_HOURS_START) * 60 // TestingConfig.SLOT_SEARCH_GRANULARITY
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def data(app):
+    rng = random.Random(3)
+    user = User(username='alice', email='alice@test.com')
+    rooms = [Room(name=f'Room {i}', capacity=rng.choice([2, 4, 8, 12]), equipment=['Projector'] if i % 3 == 0 else [])
+             for i in range(10)]
+    db.session.add_all([user] + rooms)
+    db.session.commit()
+    room_catalog.invalidate()
+    first_day = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+    bookings = []
+    for room in rooms:
+        for _ in range(rng.randint(0, 8)):
+            # Off-grid minutes, some starting before or ending after working hours
+            start = first_day + timedelta(days=rng.randint(0, 1), hours=rng.randint(6, 19), minutes=rng.randint(0, 59))
+            bookings.append(Booking(user_id=user.id, room_id=room.id, start_time=start,
+                                    end_time=start + timedelta(minutes=rng.randint(10, 180)),
+                                    status=rng.choice(['confirmed'] * 3 + ['cancelled'])))
+    # Overnight booking covering the end of day 1 and the start of day 2
+    bookings.append(Booking(user_id=user.id, room_id=rooms[1].id, start_time=first_day + timedelta(hours=17),
+                            end_time=first_day + timedelta(days=1, hours=9, minutes=30)))
+    db.session.add_all(bookings)
+    db.session.commit()
+    return user, first_day
+
+def reference_free(grid):
+    """free[room][day][slot] computed slot by slot from the confirmed bookings."""
+    bookings = Booking.query.filter_by(status='confirmed').all()
+    return [[[not any(b.room_id == room.id and b.start_time < grid.time_of(d, s) + STEP and b.end_time > grid.time_of(d, s)
+                      for b in bookings)
+              for s in range(PER_DAY)] for d in range(len(grid.dates))] for room in grid.rooms]
+
+def reference_runs(row):
+    runs, start = [], None
+    for s, free in enumerate(row + [False]):
+        if free and start is None:
+            start = s
+        elif not free and start is not None:
+            runs.append((start, s))
+            start = None
+    return runs
+
+def test_grid_matches_bookings(app, data):
+    _, first_day = data
+    grid = SlotSearchService.grid(first_day.date(), days=2)
+    assert [r.id for r in grid.rooms] == [r.id for r in room_catalog.active()]
+    assert grid.free.tolist() == reference_free(grid)
+
+    projector = SlotSearchService.grid(first_day.date(), days=2, attendees=4, equipment=['projector'])
+    assert projector.rooms and all('projector' in r.equipment_set and r.capacity >= 4 for r in projector.rooms)
+
+def test_queries_match_brute_force(app, data):
+    _, first_day = data
+    grid = SlotSearchService.grid(first_day.date(), days=2)
+    free = reference_free(grid)
+    duration = timedelta(minutes=45)
+    k = 9
+
+    fits = [(d, s, i) for d in range(2) for s in range(PER_DAY - k + 1) for i in range(len(grid.rooms))
+            if all(free[i][d][s:s + k])]
+    starts = sorted({(d, s) for d, s, _ in fits})[:3]
+    assert [(r['start'], [room['room_id'] for room in r['rooms']]) for r in SlotSearchService.earliest_fits(grid, duration, limit=3)] == \
+        [(grid.time_of(d, s), [grid.rooms[i].id for dd, ss, i in fits if (dd, ss) == (d, s)]) for d, s in starts]
+
+    spaced = SlotSearchService.earliest_fits(grid, duration, limit=4, spacing=duration)
+    assert all(b['start'] - a['start'] >= duration for a, b in zip(spaced, spaced[1:]))
+    assert spaced[0]['start'] == grid.time_of(*starts[0])
+
+    not_before = first_day + timedelta(hours=12, minutes=2)
+    assert SlotSearchService.earliest_fits(grid, duration, not_before=not_before)[0]['start'] == \
+        min(grid.time_of(d, s) for d, s, _ in fits if grid.time_of(d, s) >= not_before)
+
+    expected = []
+    for i, room in enumerate(grid.rooms):
+        windows = [{'start': grid.time_of(d, a), 'end': grid.time_of(d, b)} for d in range(2) for a, b in reference_runs(free[i][d]) if b - a >= k]
+        if windows:
+            expected.append({'room_id': room.id, 'room_name': room.name, 'capacity': room.capacity, 'windows': windows})
+    assert SlotSearchService.all_fits(grid, duration) == expected
+
+    for min_rooms in (None, 6):
+        needed = min_rooms or len(grid.rooms)
+        counts = [[sum(free[i][d][s] for i in range(len(grid.rooms))) for s in range(PER_DAY)] for d in range(2)]
+        expected = [{'start': grid.time_of(d, a), 'end': grid.time_of(d, b), 'free_rooms': min(counts[d][a:b])}
+                    for d in range(2) for a, b in reference_runs([c >= needed for c in counts[d]]) if b - a >= k]
+        assert SlotSearchService.common_free_windows(grid, duration, min_rooms=min_rooms) == expected
+
+def test_started_slots_are_busy(app, data):
+    _, first_day = data
+    now = first_day + timedelta(hours=10, minutes=2)
+    grid = SlotSearchService.grid(first_day.date(), now=now, room_ids=[room_catalog.active()[0].id])
+    first_free = SlotSearchService.earliest_fits(grid, timedelta(minutes=5))[0]['start']
+    assert first_free >= first_day + timedelta(hours=10, minutes=5)
+    assert not grid.free[0, 0, :(2 * 60 + 5) // 5].any()
+
+def test_search_endpoint(app, data):
+    user, first_day = data
+    headers = {'Authorization': f"Bearer {jwt.encode({'user_id': user.id}, app.config['SECRET_KEY'], algorithm='HS256')}"}
+    client = app.test_client()
+    day = first_day.strftime('%Y-%m-%d')
+
+    response = client.get(f'/api/bookings/search?date={day}&duration=45&attendees=4&equipment=Projector&limit=2', headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['mode'] == 'earliest' and len(body['results']) == 2
+    first = body['results'][0]
+    assert datetime.fromisoformat(first['end']) - datetime.fromisoformat(first['start']) == timedelta(minutes=45)
+    projector_rooms = {r.id for r in room_catalog.active(4) if 'projector' in r.equipment_set}
+    assert {r['room_id'] for r in first['rooms']} <= projector_rooms
+
+    assert client.get(f'/api/bookings/search?date={day}&mode=all&days=2', headers=headers).get_json()['results']
+    # not_before with an offset: same instant in local time
+    noon = first_day + timedelta(hours=12)
+    response = client.get(f'/api/bookings/search?date={day}&not_before={quote(noon.astimezone().isoformat())}', headers=headers)
+    assert response.status_code == 200
+    assert datetime.fromisoformat(response.get_json()['results'][0]['start']) >= noon
+    assert client.get(f'/api/bookings/search?date={day}&mode=common&min_rooms=2', headers=headers).status_code == 200
+    for query in ('mode=nope', 'duration=0', 'duration=abc', 'days=99', 'date=tomorrow'):
+        assert client.get(f'/api/bookings/search?{query}', headers=headers).status_code == 400